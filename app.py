@@ -1,19 +1,71 @@
+import json
+import sys
+import click
 from flask import Flask
 from flask_cors import CORS
 from views.questions_views import questions_blueprint
 from views.product_views import product_blueprint
 from views.quiz_filler import quiz_filler_blueprint
 from views.question_transitions_views import question_transitions_blueprint
+from views.catalog_views import catalog_blueprint
+from views.metrics_views import metrics_blueprint
+from services.catalog_io import CatalogImportError, parse_ndjson, parse_document, import_catalog, export_catalog
+from services.catalog import export_catalog_file
+from services.mongo_indexes import ensure_indexes
 
 app = Flask(__name__)
 # Enable CORS for all routes and allow the necessary methods
-CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"]}})
+CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+                             "expose_headers": ["ETag", "X-Next-After-Id"]}})
 
 # Register blueprints
 app.register_blueprint(questions_blueprint, url_prefix='/api/quiz')
 app.register_blueprint(product_blueprint, url_prefix='/api')
 app.register_blueprint(quiz_filler_blueprint, url_prefix='/api')
 app.register_blueprint(question_transitions_blueprint, url_prefix='/api')
+app.register_blueprint(catalog_blueprint, url_prefix='/api/catalog')
+app.register_blueprint(metrics_blueprint)
+
+
+@app.cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Create the MongoDB indexes used by the quiz filler."""
+    ensure_indexes()
+
+
+@app.cli.command('import-catalog')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_catalog_command(path):
+    """Import a catalog file, NDJSON if it ends in .ndjson and a JSON document otherwise."""
+    with open(path, encoding='utf-8') as catalog_file:
+        try:
+            if path.endswith('.ndjson'):
+                records = parse_ndjson(catalog_file)
+            else:
+                records = parse_document(json.load(catalog_file))
+            import_catalog(records)
+        except CatalogImportError as e:
+            for error in e.errors:
+                click.echo(error, err=True)
+            sys.exit(1)
+
+
+@app.cli.command('export-catalog')
+@click.argument('path', type=click.Path(dir_okay=False), default='-')
+def export_catalog_command(path):
+    """Export the catalog as NDJSON to a file, or to stdout."""
+    with click.open_file(path, 'w', encoding='utf-8') as catalog_file:
+        for line in export_catalog():
+            catalog_file.write(line)
+
+
+@app.cli.command('export-catalog-file')
+@click.argument('path', type=click.Path(dir_okay=False))
+def export_catalog_file_command(path):
+    """Write the compiled catalog to a binary file workers map with CATALOG_FILE."""
+    snapshot_id = export_catalog_file(path)
+    click.echo(f"Catalog file {path} written for snapshot {snapshot_id}.")
+
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
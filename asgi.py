@@ -0,0 +1,31 @@
+"""
+ASGI entry point serving the quiz filler endpoints with asyncio, next to the Flask app in app.py.
+
+A single process keeps many quiz sessions in flight while they wait on MongoDB. The admin
+endpoints stay on app.py; route /api/filler/ here and everything else to the Flask app.
+
+    hypercorn asgi:app --bind 0.0.0.0:5001
+"""
+from quart import Quart, request
+from views.async_quiz_filler import async_quiz_filler_blueprint
+
+app = Quart(__name__)
+
+app.register_blueprint(async_quiz_filler_blueprint, url_prefix='/api')
+
+
+@app.after_request
+async def allow_cors(response):
+    # Same policy as the flask-cors setup of app.py
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag, X-Next-After-Id'
+    # Preflights of JSON POSTs ask for Content-Type, any requested header is allowed.
+    requested_headers = request.headers.get('Access-Control-Request-Headers')
+    if requested_headers:
+        response.headers['Access-Control-Allow-Headers'] = requested_headers
+    return response
+
+
+if __name__ == '__main__':
+    app.run(debug=True, host='0.0.0.0', port=5001)
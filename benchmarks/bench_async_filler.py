@@ -0,0 +1,120 @@
+"""
+Throughput of the synchronous quiz filler service against the asyncio one.
+
+Every MongoDB call waits a fixed latency on an in-memory collection, so the numbers show how
+many quiz sessions each model keeps in flight while waiting on the database. The sync service
+runs on a thread pool, like a threaded WSGI worker; the async service runs all sessions on one
+event loop, like a single ASGI worker.
+
+    python -m benchmarks.bench_async_filler
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from domain.quiz_snapshot import QuizSnapshot
+from services import async_quiz_filler, quiz_filler
+from services.standins import MemoryCollection, AsyncMemoryCollection
+
+
+def build_snapshot(question_count):
+    """A chain of questions with two answers each, the last one recommending a product."""
+    questions, transitions = [], []
+    for question_id in range(1, question_count + 1):
+        answer_ids = [2 * question_id - 1, 2 * question_id]
+        questions.append({"id": question_id, "text": f"question {question_id}", "status": "published", "answers": [
+            {"id": answer_id, "text": f"answer {answer_id}", "status": "published"} for answer_id in answer_ids
+        ]})
+        for answer_id in answer_ids:
+            last = question_id == question_count
+            transitions.append({"id": answer_id, "answer_id": answer_id,
+                                "next_question_id": None if last else question_id + 1,
+                                "product_id": 1 if last else None})
+    return QuizSnapshot({
+        "questions": questions,
+        "products": [{"id": 1, "name": "product", "description": "", "status": "published"}],
+        "product_restrictions": [],
+        "question_transitions": transitions,
+    }, "bench")
+
+
+def sync_session(quiz_id, question_count):
+    quiz_filler.get_quiz_current_question(quiz_id)
+    for question_id in range(1, question_count + 1):
+        quiz_filler.answer_current_question(quiz_id, 2 * question_id - 1)
+
+
+async def async_session(quiz_id, question_count, semaphore):
+    async with semaphore:
+        await async_quiz_filler.get_quiz_current_question(quiz_id)
+        for question_id in range(1, question_count + 1):
+            await async_quiz_filler.answer_current_question(quiz_id, 2 * question_id - 1)
+
+
+def quiz_collection(collection_class, latency):
+    collection = collection_class(latency)
+    # Lookups by quiz_id are index lookups, as with services/mongo_indexes.py in MongoDB.
+    collection.create_index([("quiz_id", 1)], unique=True)
+    return collection
+
+
+def run_sync(snapshot, sessions, question_count, threads, latency):
+    collection = quiz_collection(MemoryCollection, latency)
+    with patch.object(quiz_filler, 'quiz_collection', collection), \
+            patch('domain.quiz_filler.quiz_collection', collection), \
+            patch.object(quiz_filler, 'get_current_quiz_snapshot', return_value=snapshot), \
+            patch.object(quiz_filler, 'get_quiz_snapshot', return_value=snapshot):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(lambda quiz_id: sync_session(quiz_id, question_count), range(sessions)))
+        return time.perf_counter() - started
+
+
+def run_async(snapshot, sessions, question_count, concurrency, latency):
+    collection = quiz_collection(AsyncMemoryCollection, latency)
+
+    async def get_quiz_snapshot(snapshot_id):
+        return snapshot
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(async_session(quiz_id, question_count, semaphore) for quiz_id in range(sessions)))
+
+    with patch.object(async_quiz_filler, 'async_quiz_collection', collection), \
+            patch.object(async_quiz_filler, 'get_current_quiz_snapshot', return_value=snapshot), \
+            patch.object(async_quiz_filler, 'get_quiz_snapshot', side_effect=get_quiz_snapshot):
+        started = time.perf_counter()
+        asyncio.run(main())
+        return time.perf_counter() - started
+
+
+def run(sessions, question_count, threads, concurrency, latency_ms):
+    snapshot = build_snapshot(question_count)
+    latency = latency_ms / 1000
+    requests = sessions * (question_count + 1)
+
+    print(f"{sessions} sessions, {requests} requests, {latency_ms} ms per MongoDB call")
+    print(f"{'service':>24} {'seconds':>9} {'requests/s':>11}")
+    # The services print a line per new quiz.
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = (
+            (f"sync, {threads} threads", run_sync(snapshot, sessions, question_count, threads, latency)),
+            (f"async, {concurrency} in flight", run_async(snapshot, sessions, question_count, concurrency, latency)),
+        )
+    for label, seconds in results:
+        print(f"{label:>24} {seconds:>9.2f} {requests / seconds:>11.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--questions', type=int, default=5, help="questions answered per session")
+    parser.add_argument('--threads', type=int, default=8, help="threads of the sync worker")
+    parser.add_argument('--concurrency', type=int, default=1000, help="sessions in flight on the event loop")
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    args = parser.parse_args()
+    run(args.sessions, args.questions, args.threads, args.concurrency, args.latency_ms)
@@ -0,0 +1,68 @@
+"""
+Micro-benchmark for rendering quiz filler responses.
+
+Compares jsonify of the response dicts with the responses of views/quiz_filler.py, rendered by
+render_quiz_json() from the question and product JSON rendered once per snapshot. Both include
+building the Flask response.
+
+    python -m benchmarks.bench_render
+    python -m benchmarks.bench_render --answers 8 --text-length 400
+"""
+import argparse
+import timeit
+
+from flask import Flask, jsonify
+
+from domain.quiz_json import render_quiz_json
+from domain.quiz_snapshot import QuizSnapshot
+from views.quiz_filler import quiz_json
+
+
+def build_snapshot(answers, products, text_length):
+    text = "x" * text_length
+    return QuizSnapshot({
+        "questions": [{"id": 1, "text": text, "status": "published", "answers": [
+            {"id": answer_id, "text": text[:40], "status": "published"} for answer_id in range(1, answers + 1)
+        ]}],
+        "products": [
+            {"id": product_id, "name": text[:40], "description": text, "status": "published"}
+            for product_id in range(1, products + 1)
+        ],
+        "product_restrictions": [],
+        "question_transitions": [],
+    })
+
+
+def run(args):
+    quiz_snapshot = build_snapshot(args.answers, args.products, args.text_length)
+    answers_given = [{"question_id": question_id, "answer_id": question_id} for question_id in range(1, 6)]
+    payloads = {
+        "current_question": {"current_question": quiz_snapshot.questions[1], "answers_given": answers_given},
+        "recommended_products": {"recommended_products": list(quiz_snapshot.products.values()),
+                                  "answers_given": answers_given},
+    }
+
+    app = Flask(__name__)
+
+    def best_us(work):
+        return min(timeit.repeat(work, number=args.number, repeat=5)) / args.number * 1e6
+
+    print(f"{'':>22} {'response (us)':>28} {'serialization only (us)':>28}")
+    print(f"{'':>22} {'jsonify':>9} {'fragments':>9} {'speedup':>8} {'dumps':>9} {'fragments':>9} {'speedup':>8}")
+    with app.app_context():
+        for name, payload in payloads.items():
+            assert render_quiz_json(payload, quiz_snapshot) == jsonify(payload).get_data()
+            response = (best_us(lambda: jsonify(payload).get_data()),
+                        best_us(lambda: quiz_json(payload, quiz_snapshot).get_data()))
+            serialization = (best_us(lambda: app.json.dumps(payload)),
+                             best_us(lambda: render_quiz_json(payload, quiz_snapshot)))
+            print(f"{name:>22} {response[0]:>9.1f} {response[1]:>9.1f} {response[0] / response[1]:>7.1f}x "
+                  f"{serialization[0]:>9.1f} {serialization[1]:>9.1f} {serialization[0] / serialization[1]:>7.1f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--answers', type=int, default=5, help="answers of the current question")
+    parser.add_argument('--products', type=int, default=5, help="recommended products")
+    parser.add_argument('--text-length', type=int, default=200, help="length of question and description texts")
+    parser.add_argument('--number', type=int, default=2000)
+    run(parser.parse_args())
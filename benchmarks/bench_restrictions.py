@@ -0,0 +1,75 @@
+"""
+Micro-benchmark for filtering recommended products by answer restrictions.
+
+Compares the previous linear scan over product_restrictions with the
+per-answer restriction arrays of the compiled QuizGraph.
+
+    python -m benchmarks.bench_restrictions
+"""
+import argparse
+import random
+import timeit
+
+from domain.quiz_filler import QuizFiller
+from domain.quiz_snapshot import QuizSnapshot
+
+
+def build_snapshot(restriction_count, answer_count, product_count, seed=0):
+    rng = random.Random(seed)
+    answers_per_question = 10
+    return {
+        "questions": [
+            {"id": question_id, "status": "published", "answers": [
+                {"id": answer_id} for answer_id in range(
+                    (question_id - 1) * answers_per_question + 1,
+                    min(question_id * answers_per_question, answer_count) + 1)
+            ]}
+            for question_id in range(1, (answer_count - 1) // answers_per_question + 2)
+        ],
+        "products": [{"id": product_id} for product_id in range(1, product_count + 1)],
+        "product_restrictions": [
+            {"id": restriction_id, "answer_id": rng.randint(1, answer_count), "product_id": rng.randint(1, product_count)}
+            for restriction_id in range(1, restriction_count + 1)
+        ],
+        "question_transitions": [],
+    }
+
+
+def linear_scan(product_restrictions, answer_ids):
+    """The filtering QuizFiller did before the restriction index existed."""
+    restricted_products = set()
+    for restriction in product_restrictions:
+        if restriction['answer_id'] in answer_ids:
+            restricted_products.add(restriction['product_id'])
+    return restricted_products
+
+
+def run(restriction_counts, answers_per_session, repeat):
+    print(f"{'restrictions':>12} {'linear (us)':>12} {'indexed (us)':>13} {'build (ms)':>11} {'speedup':>8}")
+    for restriction_count in restriction_counts:
+        answer_count = max(restriction_count // 20, answers_per_session)
+        snapshot = build_snapshot(restriction_count, answer_count, product_count=max(restriction_count // 50, 10))
+
+        build_seconds = timeit.timeit(lambda: QuizSnapshot(snapshot), number=1)
+        quiz_filler = QuizFiller(1, QuizSnapshot(snapshot))
+        answer_ids = random.Random(1).sample(range(1, answer_count + 1), answers_per_session)
+
+        assert linear_scan(snapshot["product_restrictions"], answer_ids) == \
+            quiz_filler._get_restricted_products_for_answers(answer_ids)
+
+        linear = min(timeit.repeat(
+            lambda: linear_scan(snapshot["product_restrictions"], answer_ids), number=10, repeat=repeat)) / 10
+        indexed = min(timeit.repeat(
+            lambda: quiz_filler._get_restricted_products_for_answers(answer_ids), number=1000, repeat=repeat)) / 1000
+
+        print(f"{restriction_count:>12} {linear * 1e6:>12.1f} {indexed * 1e6:>13.2f} "
+              f"{build_seconds * 1e3:>11.1f} {linear / indexed:>7.0f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--restrictions', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--answers', type=int, default=10, help="answers given per quiz session")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.restrictions, args.answers, args.repeat)
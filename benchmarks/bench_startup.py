@@ -0,0 +1,107 @@
+"""
+First request latency of a worker forked from a cold master, from a master that warmed up the
+catalog the way wsgi.py does under gunicorn, and of a worker that maps a catalog file
+(CATALOG_FILE) before its first request, without any catalog in its master.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --questions 2000 --branching 4 --mongo-latency-ms 1
+
+Runs on the local stand-ins of benchmarks/load_test.py. Each worker is forked from this process,
+serves a new quiz's current question through the Flask app, then a second new quiz.
+The file worker's first request includes opening the file.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.load_test import catalog_lines, standins
+from services.catalog_io import parse_ndjson, import_catalog
+from services.catalog import export_catalog_file
+from services.warmup import warm_up, warm_up_from_file
+
+
+def in_child(work):
+    """Runs work in a forked process, which leaves this one as cold as it was."""
+    pid = os.fork()
+    if pid == 0:
+        with contextlib.redirect_stdout(io.StringIO()):
+            work()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+
+def first_requests(app, quiz_id, catalog_file=None):
+    """
+    Forks a worker and returns the latencies in ms of its first two requests.
+
+    :param catalog_file: A catalog file the worker maps at the start of its first request
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        client = app.test_client()
+        latencies = []
+        for offset in range(2):
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if catalog_file and offset == 0:
+                    warm_up_from_file(catalog_file)
+                response = client.get(f"/api/filler/{quiz_id + offset}/current_question")
+            latencies.append((time.perf_counter() - started) * 1e3)
+            assert response.status_code == 200, response.get_data(as_text=True)
+        os.write(write_end, json.dumps(latencies).encode())
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as result:
+        latencies = json.loads(result.read())
+    os.waitpid(pid, 0)
+    return latencies
+
+
+def run(args):
+    with standins(args.mongo_latency_ms / 1000):
+        from app import app
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            import_catalog(parse_ndjson(catalog_lines(
+                args.questions, args.branching, args.products, args.restrictions)))
+
+        cold = first_requests(app, 1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            catalog_file = os.path.join(directory, "catalog.bin")
+            in_child(lambda: export_catalog_file(catalog_file))
+            catalog_file_kb = os.path.getsize(catalog_file) / 1024
+            mapped = first_requests(app, 5, catalog_file)
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            warm_up()
+        warm_up_ms = (time.perf_counter() - started) * 1e3
+        gc.freeze()
+        warm = first_requests(app, 3)
+
+    print(f"{args.questions} questions x {args.branching} answers, {args.products} products, "
+          f"{args.restrictions} restrictions")
+    print(f"{'worker':>8} {'first request ms':>17} {'second request ms':>18}")
+    print(f"{'cold':>8} {cold[0]:>17.2f} {cold[1]:>18.2f}")
+    print(f"{'warm':>8} {warm[0]:>17.2f} {warm[1]:>18.2f}")
+    print(f"{'file':>8} {mapped[0]:>17.2f} {mapped[1]:>18.2f}")
+    print(f"warm-up in the master took {warm_up_ms:.2f} ms, once for all workers")
+    print(f"catalog file of {catalog_file_kb:.0f} KiB, shared through the page cache")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=500)
+    parser.add_argument('--branching', type=int, default=4, help="answers per question")
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--restrictions', type=int, default=500)
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.0)
+    run(parser.parse_args())
@@ -0,0 +1,203 @@
+"""
+Load test of the quiz filler endpoints of the Flask app, on local stand-ins for MySQL and MongoDB.
+
+Seeds a synthetic catalog into a SQLite stand-in for MySQL, then drives quiz sessions through
+the Flask test client from several threads: every session fetches its current question, answers
+with a random answer until products are recommended, and now and then goes back to an earlier
+question. Reports p50/p95/p99 latency per endpoint and the overall throughput.
+
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --questions 200 --branching 4 --sessions 2000 --max-p95-ms 10
+
+Latencies include the Flask request handling and the stand-ins, not the network to real
+databases; add it with --mongo-latency-ms.
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from app import app
+from services.catalog import CatalogCache
+from services.catalog_io import parse_ndjson, import_catalog
+from services.catalog_version import CatalogVersions
+from services.db_config import ConnectionPool
+from services.metrics import metrics, InstrumentedCollection, instrument_connect
+from services.standins import SqliteDatabase, MemoryCollection
+
+ENDPOINTS = ("current_question", "answer", "reset_to_previous_question")
+
+
+def catalog_lines(questions, branching, products, restrictions, seed=0):
+    """
+    NDJSON lines of a synthetic catalog. Every question has `branching` answers, each leading to one
+    of the next `branching` questions; the answers of the last question recommend 1-3 products.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for question in range(1, questions + 1):
+        lines.append({"type": "question", "ref": f"q{question}", "text": f"question {question}",
+                      "status": "published"})
+        for answer in range(1, branching + 1):
+            ref = f"a{question}_{answer}"
+            lines.append({"type": "answer", "ref": ref, "question": f"q{question}", "text": f"answer {answer}",
+                          "status": "published"})
+            if question < questions:
+                next_question = rng.randint(question + 1, min(questions, question + branching))
+                lines.append({"type": "question_transition", "answer": ref, "next_question": f"q{next_question}"})
+            else:
+                for product in rng.sample(range(1, products + 1), min(products, rng.randint(1, 3))):
+                    lines.append({"type": "question_transition", "answer": ref, "product": f"p{product}"})
+    for product in range(1, products + 1):
+        lines.append({"type": "product", "ref": f"p{product}", "name": f"product {product}",
+                      "description": "", "status": "published"})
+    for _ in range(restrictions):
+        lines.append({"type": "product_restriction", "product": f"p{rng.randint(1, products)}",
+                      "answer": f"a{rng.randint(1, questions)}_{rng.randint(1, branching)}"})
+    return [json.dumps(line) for line in lines]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))]
+
+
+class LoadTest:
+
+    def __init__(self, app, reset_probability, seed=0):
+        self.app = app
+        self.reset_probability = reset_probability
+        self.seed = seed
+        self.latencies = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _request(self, endpoint, method, url):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        started = time.perf_counter()
+        response = getattr(client, method)(url, **({"json": self._local.body} if method == "post" else {}))
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            if response.status_code >= 400:
+                self.errors += 1
+        return response.get_json()
+
+    def session(self, quiz_id):
+        rng = random.Random(self.seed * 1_000_003 + quiz_id)
+        result = self._request("current_question", "get", f"/api/filler/{quiz_id}/current_question")
+        question = result.get("current_question")
+        while question:
+            self._local.body = {"answer_id": rng.choice(question["answers"])["id"]}
+            result = self._request("answer", "post", f"/api/filler/{quiz_id}/answer")
+            question = result.get("next_question")
+            answers_given = result.get("answers_given", [])
+            if len(answers_given) > 1 and rng.random() < self.reset_probability:
+                question_id = rng.choice(answers_given[1:])["question_id"]
+                result = self._request("reset_to_previous_question", "post",
+                                       f"/api/filler/{quiz_id}/reset_to_previous_question/{question_id}")
+                question = result.get("current_question")
+
+    def run(self, quiz_ids, concurrency):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(self.session, quiz_ids))
+        return time.perf_counter() - started
+
+
+@contextlib.contextmanager
+def standins(mongo_latency):
+    """Points the services at a fresh SQLite database and in-memory MongoDB collections."""
+    database = SqliteDatabase()
+    quiz_collection = InstrumentedCollection(MemoryCollection(mongo_latency))
+    quiz_collection.create_index([("quiz_id", 1)], unique=True)
+    snapshot_collection = InstrumentedCollection(MemoryCollection(mongo_latency))
+    patches = [
+        patch('services.db_config._pool', ConnectionPool(instrument_connect(database.connect), pool_size=32)),
+        patch('services.catalog.catalog_cache', CatalogCache(CatalogVersions())),
+        patch('services.quiz_filler.quiz_collection', quiz_collection),
+        patch('domain.quiz_filler.quiz_collection', quiz_collection),
+        patch('services.quiz_snapshot.snapshot_collection', snapshot_collection),
+    ]
+    try:
+        for p in patches:
+            p.start()
+        yield database
+    finally:
+        for p in reversed(patches):
+            p.stop()
+        database.close()
+
+
+def print_backend_time():
+    """Mean database time and calls per request of each endpoint, from the /metrics counters."""
+    requests = {}
+    for (endpoint, _, _), count in metrics.requests.samples().items():
+        requests[endpoint] = requests.get(endpoint, 0) + count
+    print(f"{'database time per request':>36} {'backend':>9} {'ms':>8} {'calls':>8}")
+    seconds = metrics.request_backend_seconds.samples()
+    for (endpoint, backend), calls in sorted(metrics.request_backend_calls.samples().items()):
+        print(f"{endpoint.split('.')[-1]:>36} {backend:>9} "
+              f"{seconds[endpoint, backend] / requests[endpoint] * 1e3:>8.2f} {calls / requests[endpoint]:>8.1f}")
+
+
+def run(args):
+    with standins(args.mongo_latency_ms / 1000):
+        with contextlib.redirect_stdout(io.StringIO()):
+            import_catalog(parse_ndjson(catalog_lines(
+                args.questions, args.branching, args.products, args.restrictions, args.seed)))
+            load_test = LoadTest(app, args.reset_probability, args.seed)
+            if args.warmup:
+                warmup_ids = range(args.sessions + 1, args.sessions + args.warmup + 1)
+                LoadTest(app, args.reset_probability, args.seed).run(warmup_ids, args.concurrency)
+            seconds = load_test.run(range(1, args.sessions + 1), args.concurrency)
+
+    requests = sum(len(latencies) for latencies in load_test.latencies.values())
+    print(f"{args.sessions} sessions, {requests} requests, {args.concurrency} threads, "
+          f"{args.questions} questions x {args.branching} answers, {args.products} products, "
+          f"{args.restrictions} restrictions")
+    print(f"{'endpoint':>28} {'requests':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    all_latencies = []
+    for endpoint, latencies in load_test.latencies.items():
+        latencies.sort()
+        all_latencies.extend(latencies)
+        print(f"{endpoint:>28} {len(latencies):>9} " + " ".join(
+            f"{percentile(latencies, fraction) * 1e3:>8.2f}" for fraction in (0.5, 0.95, 0.99)))
+    all_latencies.sort()
+    p95 = percentile(all_latencies, 0.95) * 1e3
+    print(f"{'all':>28} {len(all_latencies):>9} " + " ".join(
+        f"{percentile(all_latencies, fraction) * 1e3:>8.2f}" for fraction in (0.5, 0.95, 0.99)))
+    print(f"throughput {requests / seconds:.0f} requests/s, {load_test.errors} errors")
+    print_backend_time()
+
+    if load_test.errors or (args.max_p95_ms and p95 > args.max_p95_ms):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--branching', type=int, default=3, help="answers per question")
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--restrictions', type=int, default=50)
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help="threads sending requests, 1 matches one single threaded worker process")
+    parser.add_argument('--reset-probability', type=float, default=0.1,
+                        help="chance of going back to an earlier question after an answer")
+    parser.add_argument('--warmup', type=int, default=20, help="sessions run before measuring")
+    parser.add_argument('--mongo-latency-ms', type=float, default=0.0)
+    parser.add_argument('--max-p95-ms', type=float, default=None, help="exit with 1 if the overall p95 is higher")
+    parser.add_argument('--seed', type=int, default=0)
+    run(parser.parse_args())
@@ -0,0 +1,399 @@
+"""
+Compact binary file of a compiled quiz catalog, opened with mmap.
+
+A process opening the file maps it and reads ids, edges and texts in place, instead of building
+the dicts and arrays of a QuizSnapshot and its QuizGraph. Every worker on a host shares the one
+copy in the page cache, and opening takes no time however big the catalog is.
+
+Layout, in the native byte order of the host that wrote it:
+
+    header      MAGIC, FORMAT_VERSION, byte order, section count, then offset and length per section
+    sections    SECTIONS in order, each 8-byte aligned
+
+Ids and edges are the position-based arrays of QuizGraph. Entities are found by id with a
+binary search over their positions sorted by id. Texts, and the pre-rendered JSON of every question
+and product, live in one UTF-8 string table, referenced by index, -1 standing for None.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from domain.quiz_graph import QuizGraph, NO_NODE
+from domain.quiz_json import dump_json
+
+CATALOG_FIELDS = ("questions", "products", "product_restrictions", "question_transitions")
+
+MAGIC = b"MQCF"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct("=4sIBI")
+_SECTION = struct.Struct("=QQ")
+
+# Section name -> array typecode
+SECTIONS = {
+    "meta": 'i',                       # first question position, snapshot id string
+    "table_versions": 'q',             # (table name string, version) pairs
+    "question_ids": 'i',
+    "question_answer_start": 'i',
+    "answer_ids": 'i',
+    "answer_question": 'i',
+    "answer_next_question": 'i',
+    "answer_product_start": 'i',
+    "answer_products": 'i',
+    "answer_restriction_start": 'i',
+    "answer_restrictions": 'i',
+    "product_ids": 'i',
+    "question_by_id": 'i',             # question positions sorted by id
+    "answer_by_id": 'i',
+    "product_by_id": 'i',
+    "reachable_start": 'i',            # per question, into reachable_products
+    "reachable_products": 'i',
+    "question_strings": 'i',           # (text, status) per question
+    "answer_strings": 'i',             # (text, status) per answer
+    "product_strings": 'i',            # (name, description, status) per product
+    "question_json_strings": 'i',      # pre-rendered JSON per question, see domain/quiz_json.py
+    "product_json_strings": 'i',
+    "transitions": 'i',                # (id, answer_id, next_question_id, product_id) per row, -1 for None
+    "restrictions": 'i',               # (id, product_id, answer_id) per row
+    "string_offsets": 'i',
+    "string_data": 'B',
+}
+
+
+class _StringTable:
+
+    def __init__(self):
+        self.index = {}
+        self.offsets = array('i', [0])
+        self.data = bytearray()
+
+    def add(self, value):
+        if value is None:
+            return NO_NODE
+        if value not in self.index:
+            self.data += str(value).encode('utf-8')
+            self.offsets.append(len(self.data))
+            self.index[value] = len(self.index)
+        return self.index[value]
+
+
+def _none_to_node(value):
+    return NO_NODE if value is None else value
+
+
+def write_catalog_file(path, catalog, snapshot_id, table_versions=None):
+    """
+    Compiles a catalog and writes it to a catalog file. The file is replaced atomically, so
+    processes that mapped the previous one keep reading it unchanged.
+
+    :param catalog: Dict with questions, products, product_restrictions and question_transitions
+    :param snapshot_id: Id of the stored snapshot of the catalog
+    :param table_versions: Dict of table name to the version the catalog was read at
+    """
+    graph = QuizGraph(catalog['questions'], catalog['products'],
+                      catalog['question_transitions'], catalog['product_restrictions'])
+    strings = _StringTable()
+
+    def by_id(ids):
+        return array('i', sorted(range(len(ids)), key=ids.__getitem__))
+
+    reachable_start, reachable_products = array('i', [0]), array('i')
+    for products in graph.reachable_products:
+        reachable_products.extend(sorted(graph._product_pos[product_id] for product_id in products))
+        reachable_start.append(len(reachable_products))
+
+    question_strings, answer_strings, question_json = array('i'), array('i'), array('i')
+    for question in catalog['questions']:
+        question_strings.extend((strings.add(question['text']), strings.add(question.get('status'))))
+        question_json.append(strings.add(dump_json(question).decode('utf-8')))
+        for answer in question.get('answers', []):
+            answer_strings.extend((strings.add(answer['text']), strings.add(answer.get('status'))))
+    product_strings, product_json = array('i'), array('i')
+    for product in catalog['products']:
+        product_strings.extend((strings.add(product['name']), strings.add(product.get('description')),
+                                strings.add(product.get('status'))))
+        product_json.append(strings.add(dump_json(product).decode('utf-8')))
+
+    transitions = array('i')
+    for row in catalog['question_transitions']:
+        transitions.extend((_none_to_node(row.get('id')), row['answer_id'],
+                            _none_to_node(row.get('next_question_id')), _none_to_node(row.get('product_id'))))
+    restrictions = array('i')
+    for row in catalog['product_restrictions']:
+        restrictions.extend((_none_to_node(row.get('id')), row['product_id'], row['answer_id']))
+
+    versions = array('q')
+    for table, version in sorted((table_versions or {}).items()):
+        if version is not None:
+            versions.extend((strings.add(table), version))
+
+    sections = {
+        "meta": array('i', [graph.first_question, strings.add(snapshot_id)]),
+        "table_versions": versions,
+        "question_ids": graph.question_ids,
+        "question_answer_start": graph.question_answer_start,
+        "answer_ids": graph.answer_ids,
+        "answer_question": graph.answer_question,
+        "answer_next_question": graph.answer_next_question,
+        "answer_product_start": graph.answer_product_start,
+        "answer_products": graph.answer_products,
+        "answer_restriction_start": graph.answer_restriction_start,
+        "answer_restrictions": graph.answer_restrictions,
+        "product_ids": graph.product_ids,
+        "question_by_id": by_id(graph.question_ids),
+        "answer_by_id": by_id(graph.answer_ids),
+        "product_by_id": by_id(graph.product_ids),
+        "reachable_start": reachable_start,
+        "reachable_products": reachable_products,
+        "question_strings": question_strings,
+        "answer_strings": answer_strings,
+        "product_strings": product_strings,
+        "question_json_strings": question_json,
+        "product_json_strings": product_json,
+        "transitions": transitions,
+        "restrictions": restrictions,
+        "string_offsets": strings.offsets,
+        "string_data": array('B', strings.data),
+    }
+
+    offset = _HEADER.size + _SECTION.size * len(SECTIONS)
+    table, payloads = [], []
+    for name in SECTIONS:
+        payload = sections[name].tobytes()
+        offset += -offset % 8
+        table.append((offset, len(payload)))
+        payloads.append((offset, payload))
+        offset += len(payload)
+
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as catalog_file:
+        catalog_file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, sys.byteorder == 'little', len(SECTIONS)))
+        for section in table:
+            catalog_file.write(_SECTION.pack(*section))
+        for section_offset, payload in payloads:
+            catalog_file.write(b"\0" * (section_offset - catalog_file.tell()))
+            catalog_file.write(payload)
+    os.replace(temporary_path, path)
+
+
+class _Questions(Mapping):
+    """Question dicts by id, decoded from the file on access."""
+
+    def __init__(self, catalog_file):
+        self._file = catalog_file
+
+    def __getitem__(self, question_id):
+        question = self._file._position("question", question_id)
+        if question is None:
+            raise KeyError(question_id)
+        return self._file._question(question)
+
+    def __iter__(self):
+        return iter(self._file.question_ids)
+
+    def __len__(self):
+        return len(self._file.question_ids)
+
+
+class _Products(Mapping):
+    """Product dicts by id, decoded from the file on access."""
+
+    def __init__(self, catalog_file):
+        self._file = catalog_file
+
+    def __getitem__(self, product_id):
+        product = self._file._position("product", product_id)
+        if product is None:
+            raise KeyError(product_id)
+        return self._file._product(product)
+
+    def __iter__(self):
+        return iter(self._file.product_ids)
+
+    def __len__(self):
+        return len(self._file.product_ids)
+
+
+class _Fragments(Mapping):
+    """Pre-rendered JSON bytes of questions or products by id, read from the file on access."""
+
+    def __init__(self, catalog_file, kind):
+        self._file = catalog_file
+        self._kind = kind
+
+    def __getitem__(self, entity_id):
+        position = self._file._position(self._kind, entity_id)
+        if position is None:
+            raise KeyError(entity_id)
+        index = getattr(self._file, f"{self._kind}_json_strings")[position]
+        offsets = self._file.string_offsets
+        return bytes(self._file.string_data[offsets[index]:offsets[index + 1]])
+
+    def __iter__(self):
+        return iter(getattr(self._file, f"{self._kind}_ids"))
+
+    def __len__(self):
+        return len(getattr(self._file, f"{self._kind}_ids"))
+
+
+class _Catalog(Mapping):
+    """The catalog dict of the file, each field decoded on access."""
+
+    def __init__(self, catalog_file):
+        self._file = catalog_file
+
+    def __getitem__(self, field):
+        if field == "questions":
+            return [self._file._question(question) for question in range(len(self._file.question_ids))]
+        if field == "products":
+            return [self._file._product(product) for product in range(len(self._file.product_ids))]
+        if field == "question_transitions":
+            return self._file.question_transitions
+        if field == "product_restrictions":
+            return self._file.product_restrictions
+        raise KeyError(field)
+
+    def __contains__(self, field):
+        return field in CATALOG_FIELDS
+
+    def __iter__(self):
+        return iter(CATALOG_FIELDS)
+
+    def __len__(self):
+        return 4
+
+
+class CatalogFile:
+    """
+    A catalog file mapped into memory. Used in place of a QuizSnapshot, and as its own graph
+    for the lookups QuizGraph offers. Compilation issues are not kept, validate with QuizGraph.
+
+    :param path: The file written by write_catalog_file()
+    :raises ValueError: If the file is not a catalog file of this format and byte order
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as catalog_file:
+            self._mmap = mmap.mmap(catalog_file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, version, little_endian, section_count = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION or bool(little_endian) != (sys.byteorder == 'little') \
+                or section_count != len(SECTIONS):
+            raise ValueError(f"{path} is not a catalog file of format {FORMAT_VERSION} for this host.")
+        for index, (name, typecode) in enumerate(SECTIONS.items()):
+            offset, length = _SECTION.unpack_from(view, _HEADER.size + index * _SECTION.size)
+            setattr(self, name, view[offset:offset + length].cast(typecode))
+
+        self.first_question = self.meta[0]
+        self.snapshot_id = self._string(self.meta[1])
+        self.table_versions = {self._string(self.table_versions[i]): self.table_versions[i + 1]
+                               for i in range(0, len(self.table_versions), 2)}
+        self.questions = _Questions(self)
+        self.products = _Products(self)
+        self.catalog = _Catalog(self)
+        self.question_json = _Fragments(self, "question")
+        self.product_json = _Fragments(self, "product")
+        self.graph = self
+
+    # --- decoding ---
+
+    def _string(self, index):
+        if index == NO_NODE:
+            return None
+        return str(self.string_data[self.string_offsets[index]:self.string_offsets[index + 1]], 'utf-8')
+
+    def _position(self, kind, entity_id):
+        ids = getattr(self, f"{kind}_ids")
+        by_id = getattr(self, f"{kind}_by_id")
+        index = bisect_left(by_id, entity_id, key=ids.__getitem__)
+        if index < len(by_id) and ids[by_id[index]] == entity_id:
+            return by_id[index]
+        return None
+
+    def _question(self, question):
+        answers = []
+        for answer in range(self.question_answer_start[question], self.question_answer_start[question + 1]):
+            answers.append({
+                'id': self.answer_ids[answer],
+                'text': self._string(self.answer_strings[2 * answer]),
+                'status': self._string(self.answer_strings[2 * answer + 1]),
+            })
+        return {
+            'id': self.question_ids[question],
+            'text': self._string(self.question_strings[2 * question]),
+            'status': self._string(self.question_strings[2 * question + 1]),
+            'answers': answers,
+        }
+
+    def _product(self, product):
+        return {
+            'id': self.product_ids[product],
+            'name': self._string(self.product_strings[3 * product]),
+            'description': self._string(self.product_strings[3 * product + 1]),
+            'status': self._string(self.product_strings[3 * product + 2]),
+        }
+
+    @property
+    def question_transitions(self):
+        rows = self.transitions
+        return [
+            {'id': None if rows[i] == NO_NODE else rows[i], 'answer_id': rows[i + 1],
+             'next_question_id': None if rows[i + 2] == NO_NODE else rows[i + 2],
+             'product_id': None if rows[i + 3] == NO_NODE else rows[i + 3]}
+            for i in range(0, len(rows), 4)
+        ]
+
+    @property
+    def product_restrictions(self):
+        rows = self.restrictions
+        return [
+            {'id': None if rows[i] == NO_NODE else rows[i], 'product_id': rows[i + 1], 'answer_id': rows[i + 2]}
+            for i in range(0, len(rows), 3)
+        ]
+
+    # --- lookups by id, as in QuizGraph ---
+
+    @property
+    def first_question_id(self):
+        return self.question_ids[self.first_question] if self.first_question != NO_NODE else None
+
+    def is_valid_answer(self, question_id, answer_id):
+        """Whether answer_id is one of the answers of question_id."""
+        answer = self._position("answer", answer_id)
+        return answer is not None and self.answer_question[answer] == self._position("question", question_id)
+
+    def next_question_id(self, answer_id):
+        """The question following an answer, or None if the answer leads to products."""
+        answer = self._position("answer", answer_id)
+        if answer is None or self.answer_next_question[answer] == NO_NODE:
+            return None
+        return self.question_ids[self.answer_next_question[answer]]
+
+    def product_ids_for_answer(self, answer_id):
+        """Products recommended by an answer, in transition order."""
+        answer = self._position("answer", answer_id)
+        if answer is None:
+            return []
+        start, end = self.answer_product_start[answer], self.answer_product_start[answer + 1]
+        return [self.product_ids[product] for product in self.answer_products[start:end]]
+
+    def restricted_product_ids(self, answer_ids):
+        """Products that must not be recommended once any of answer_ids was given."""
+        restricted = set()
+        for answer_id in answer_ids:
+            answer = self._position("answer", answer_id)
+            if answer is not None:
+                start, end = self.answer_restriction_start[answer], self.answer_restriction_start[answer + 1]
+                restricted.update(self.product_ids[product] for product in self.answer_restrictions[start:end])
+        return restricted
+
+    def reachable_product_ids(self, question_id):
+        """Every product that can still be recommended from a question."""
+        question = self._position("question", question_id)
+        if question is None:
+            return frozenset()
+        start, end = self.reachable_start[question], self.reachable_start[question + 1]
+        return frozenset(self.product_ids[product] for product in self.reachable_products[start:end])
@@ -1,13 +1,25 @@
+from domain.quiz_snapshot import QuizSnapshot
 from services.db_config import quiz_collection
 
 
+class QuizConflictError(Exception):
+    """Raised when the quiz progress kept changing concurrently and could not be saved."""
+
+
 class QuizFiller:
     def __init__(self, quiz_id, quiz_snapshot, progress=None):
+        """
+        :param quiz_id: The ID of the quiz
+        :param quiz_snapshot: A shared QuizSnapshot or CatalogFile, or the raw snapshot dict to decode
+        :param progress: The stored progress, a fresh one is started if omitted
+        """
+        if isinstance(quiz_snapshot, dict):
+            quiz_snapshot = QuizSnapshot(quiz_snapshot)
+
         self.quiz_id = quiz_id
-        self.questions = {q['id']: q for q in quiz_snapshot['questions']}
-        self.products = {product['id']: product for product in quiz_snapshot['products']}
-        self.product_restrictions = quiz_snapshot['product_restrictions']
-        self.question_transitions = quiz_snapshot['question_transitions']
+        self.snapshot = quiz_snapshot
+        self.questions = quiz_snapshot.questions
+        self.products = quiz_snapshot.products
 
         self.progress = progress or {
             "answers_given": [],
@@ -15,12 +27,20 @@ class QuizFiller:
             "recommended_products": []
         }
 
+        # Version of the stored progress, bumped by every save. Saves only apply on top
+        # of the version that was loaded, see save_progress().
+        self.version = self.progress.get('version', 0)
+
+        # Changes not yet written to MongoDB, see progress_update()
+        self._rewrite_progress = not progress
+        self._saved_answer_count = len(self.progress['answers_given'])
+        self._truncate_answers_to = None
+        self._pushed_answers = []
+        self._changed_fields = set()
+
     def _get_first_question_id(self):
         """Get the first published question's ID."""
-        for question in self.questions.values():
-            if question.get('status') == 'published':
-                return question['id']
-        return None
+        return self.snapshot.first_question_id
 
     def get_current_question(self):
         """Get the current question based on the progress."""
@@ -35,19 +55,20 @@ class QuizFiller:
         ensuring restricted products are not recommended.
         """
         # Validate the answer ID
-        valid_answer = next((answer for answer in current_question['answers'] if answer['id'] == answer_id), None)
-        if valid_answer is None:
+        if not self.snapshot.graph.is_valid_answer(current_question['id'], answer_id):
             raise ValueError(f"Invalid answer ID {answer_id} for question {current_question['id']}")
 
         # Append the current answer to the progress
-        self.progress['answers_given'].append({'question_id': current_question['id'], 'answer_id': answer_id})
+        answer_given = {'question_id': current_question['id'], 'answer_id': answer_id}
+        self.progress['answers_given'].append(answer_given)
+        self._pushed_answers.append(answer_given)
 
         # Get the result of the answer to decide the next question or recommended products
         transition_result = self._get_transition_result(answer_id)
 
         if transition_result.get('next_question_id'):
             # Move to the next question if available
-            self.progress['current_question_id'] = transition_result['next_question_id']
+            self._set_progress_field('current_question_id', transition_result['next_question_id'])
             return self.get_current_question()
 
         elif transition_result.get('product_ids'):
@@ -64,14 +85,41 @@ class QuizFiller:
                 if product_id not in restricted_product_ids
             ]
 
-            self.progress['recommended_products'] = recommended_products
+            self._set_progress_field('recommended_products', recommended_products)
 
             return {"recommended_products": recommended_products}
 
         # End of quiz (no more questions or recommendations)
-        self.progress['current_question_id'] = None
+        self._set_progress_field('current_question_id', None)
         return None
 
+    def reset_to_question(self, question_id):
+        """
+        Removes the answer to the given question and all answers after it,
+        and makes the question the current one again.
+
+        :raises ValueError: If the question has not been answered
+        """
+        question_index = next(
+            (index for index, answer in enumerate(self.progress['answers_given']) if answer['question_id'] == question_id),
+            None
+        )
+        if question_index is None:
+            raise ValueError(f"Question with ID {question_id} has not been answered yet.")
+
+        self.progress['answers_given'] = self.progress['answers_given'][:question_index]
+        if question_index < self._saved_answer_count:
+            self._truncate_answers_to = self._saved_answer_count = question_index
+            self._pushed_answers = []
+        else:
+            self._pushed_answers = self._pushed_answers[:question_index - self._saved_answer_count]
+
+        self._set_progress_field('current_question_id', question_id)
+
+    def _set_progress_field(self, field, value):
+        self.progress[field] = value
+        self._changed_fields.add(field)
+
     def _get_restricted_products_for_answers(self, answer_ids):
         """
         Get restricted product IDs for a given set of answer_ids from product_restrictions.
@@ -79,37 +127,71 @@ class QuizFiller:
         :param answer_ids: List of answer IDs for which to fetch restrictions.
         :return: Set of restricted product IDs.
         """
-        restricted_products = set()
-
-        # Loop through all restrictions in product_restrictions
-        for restriction in self.product_restrictions:
-            if restriction['answer_id'] in answer_ids:
-                restricted_products.add(restriction['product_id'])
-
-        return restricted_products
+        return self.snapshot.graph.restricted_product_ids(answer_ids)
 
     def _get_transition_result(self, answer_id):
         """
         Determines the next action based on the given answer ID using the question_transitions.
         Either returns a next question ID or a list of product IDs.
         """
-        next_question_id = None
-        product_ids = []
+        return {
+            "next_question_id": self.snapshot.graph.next_question_id(answer_id),
+            "product_ids": self.snapshot.graph.product_ids_for_answer(answer_id)
+        }
 
-        for transition in self.question_transitions:
-            if transition['answer_id'] == answer_id:
-                if transition.get('next_question_id'):
-                    next_question_id = transition['next_question_id']
-                    break
-                elif transition.get('product_id'):
-                    product_ids.append(transition['product_id'])
+    def progress_update(self):
+        """
+        Builds the minimal MongoDB update for the changes made since the quiz was loaded or last saved:
+        new answers are pushed, truncated answers are sliced off and only changed fields are set.
 
-        return {"next_question_id": next_question_id, "product_ids": product_ids}
+        :return: The update document, or None if nothing changed
+        """
+        if self._rewrite_progress:
+            return {"$set": {"progress": dict(self.progress, version=self.version + 1)}}
+
+        update = {}
+        changed_fields = set(self._changed_fields)
+        if self._truncate_answers_to is not None and self._pushed_answers:
+            # MongoDB slices after pushing, so a truncation followed by new answers rewrites the list.
+            changed_fields.add('answers_given')
+        elif self._truncate_answers_to is not None:
+            update["$push"] = {"progress.answers_given": {"$each": [], "$slice": self._truncate_answers_to}}
+        elif self._pushed_answers:
+            update["$push"] = {"progress.answers_given": {"$each": self._pushed_answers}}
+        if changed_fields:
+            update["$set"] = {f"progress.{field}": self.progress[field] for field in sorted(changed_fields)}
+        if update:
+            update["$inc"] = {"progress.version": 1}
+        return update or None
+
+    def mark_saved(self):
+        """Records that the pending changes have been written, see progress_update()."""
+        self.version += 1
+        self.progress['version'] = self.version
+        self._rewrite_progress = False
+        self._saved_answer_count = len(self.progress['answers_given'])
+        self._truncate_answers_to = None
+        self._pushed_answers = []
+        self._changed_fields = set()
+
+    def progress_filter(self):
+        """Matches the quiz only while its progress is still at the loaded version."""
+        # Progress saved before versioning has no version field, which counts as version 0.
+        version = self.version if self.version else {"$in": [0, None]}
+        return {"quiz_id": self.quiz_id, "progress.version": version}
 
     def save_progress(self):
-        """Updates the MongoDB document with the quiz's progress."""
-        quiz_collection.update_one(
-            {"quiz_id": self.quiz_id},
-            {"$set": {"progress": self.progress}},
-            upsert=True
-        )
+        """
+        Writes the pending progress changes to MongoDB with a compare-and-set on the progress version.
+        Does nothing if there are no changes.
+
+        :return: False if the progress was changed concurrently and nothing was written, True otherwise
+        """
+        update = self.progress_update()
+        if update is None:
+            return True
+        result = quiz_collection.update_one(self.progress_filter(), update)
+        if result.matched_count == 0:
+            return False
+        self.mark_saved()
+        return True
@@ -0,0 +1,267 @@
+from array import array
+from collections import namedtuple
+
+NO_NODE = -1
+
+GraphIssue = namedtuple('GraphIssue', ['kind', 'entity_id', 'message'])
+
+
+class QuizGraph:
+    """
+    Immutable, array-backed compilation of a quiz catalog.
+
+    Questions, answers and products are numbered by position. Answers are stored grouped
+    by question, transitions and restrictions as offset/target arrays per answer. Ids are
+    translated to positions once at the edge of every lookup.
+
+    The catalog is validated while compiling. Problems never prevent compilation, they are
+    collected in `issues` so they can be reported before a catalog version is rolled out:
+        unknown_answer, unknown_question, unknown_product - references to missing entities
+        dead_end - an answer without any transition
+        ambiguous_transition - an answer leading both to a question and to products
+        unreachable_question - a question that cannot be reached from the first question
+        cycle - questions that can lead back to themselves
+    """
+
+    def __init__(self, questions, products, question_transitions, product_restrictions):
+        """
+        :param questions: Question dicts with their answers, in catalog order
+        :param products: Product dicts
+        :param question_transitions: Transition rows (answer_id, next_question_id, product_id)
+        :param product_restrictions: Restriction rows (answer_id, product_id)
+        """
+        self.issues = []
+
+        self.question_ids = array('i')
+        self.question_status = []
+        self.question_answer_start = array('i', [0])
+        self.answer_ids = array('i')
+        self.answer_question = array('i')
+        for question in questions:
+            self.question_ids.append(question['id'])
+            self.question_status.append(question.get('status'))
+            for answer in question.get('answers', []):
+                self.answer_ids.append(answer['id'])
+                self.answer_question.append(len(self.question_ids) - 1)
+            self.question_answer_start.append(len(self.answer_ids))
+        self.product_ids = array('i', (product['id'] for product in products))
+
+        self._question_pos = {question_id: pos for pos, question_id in enumerate(self.question_ids)}
+        self._answer_pos = {answer_id: pos for pos, answer_id in enumerate(self.answer_ids)}
+        self._product_pos = {product_id: pos for pos, product_id in enumerate(self.product_ids)}
+
+        self.first_question = next(
+            (pos for pos, status in enumerate(self.question_status) if status == 'published'), NO_NODE)
+
+        self._compile_transitions(question_transitions)
+        self.answer_restriction_start, self.answer_restrictions = self._compile_edges(
+            'restriction', ((row['answer_id'], row['product_id']) for row in product_restrictions))
+        # answer position -> frozenset of restricted product ids, filled on first use
+        self._restricted_product_ids = {}
+
+        self._question_successors = [
+            sorted({self.answer_next_question[answer]
+                    for answer in self._answers_of(question) if self.answer_next_question[answer] != NO_NODE})
+            for question in range(len(self.question_ids))
+        ]
+        self._validate_answers()
+        self._validate_reachability()
+        self.reachable_products = self._compile_reachable_products()
+
+    # --- compilation ---
+
+    def _compile_transitions(self, question_transitions):
+        next_question = array('i', [NO_NODE]) * len(self.answer_ids)
+        product_edges = []
+        for transition in question_transitions:
+            answer = self._answer_pos.get(transition['answer_id'])
+            if answer is None:
+                self._issue('unknown_answer', transition['answer_id'],
+                            f"Transition {transition.get('id')} starts from unknown answer {transition['answer_id']}.")
+                continue
+            if transition.get('next_question_id'):
+                question = self._question_pos.get(transition['next_question_id'])
+                if question is None:
+                    self._issue('unknown_question', transition['next_question_id'],
+                                f"Transition {transition.get('id')} leads to unknown question "
+                                f"{transition['next_question_id']}.")
+                elif next_question[answer] == NO_NODE:
+                    # As before, the first next question of an answer wins over later ones.
+                    next_question[answer] = question
+            elif transition.get('product_id'):
+                product_edges.append((transition['answer_id'], transition['product_id']))
+
+        self.answer_next_question = next_question
+        self.answer_product_start, self.answer_products = self._compile_edges('transition', product_edges)
+
+    def _compile_edges(self, source, edges):
+        """Builds offset/target arrays of product positions per answer position."""
+        targets_by_answer = [[] for _ in self.answer_ids]
+        for answer_id, product_id in edges:
+            answer = self._answer_pos.get(answer_id)
+            product = self._product_pos.get(product_id)
+            if answer is None:
+                self._issue('unknown_answer', answer_id, f"A product {source} references unknown answer {answer_id}.")
+            elif product is None:
+                self._issue('unknown_product', product_id, f"A product {source} references unknown product {product_id}.")
+            elif product not in targets_by_answer[answer]:
+                targets_by_answer[answer].append(product)
+
+        start, targets = array('i', [0]), array('i')
+        for answer_targets in targets_by_answer:
+            targets.extend(answer_targets)
+            start.append(len(targets))
+        return start, targets
+
+    def _validate_answers(self):
+        for answer, answer_id in enumerate(self.answer_ids):
+            has_next_question = self.answer_next_question[answer] != NO_NODE
+            has_products = self.answer_product_start[answer] != self.answer_product_start[answer + 1]
+            if not has_next_question and not has_products:
+                self._issue('dead_end', answer_id, f"Answer {answer_id} has no transition.")
+            elif has_next_question and has_products:
+                self._issue('ambiguous_transition', answer_id,
+                            f"Answer {answer_id} leads to a question and to products, the question wins.")
+
+    def _validate_reachability(self):
+        reached = [False] * len(self.question_ids)
+        pending = [self.first_question] if self.first_question != NO_NODE else []
+        while pending:
+            question = pending.pop()
+            if not reached[question]:
+                reached[question] = True
+                pending.extend(self._question_successors[question])
+
+        for question, question_id in enumerate(self.question_ids):
+            if not reached[question]:
+                self._issue('unreachable_question', question_id,
+                            f"Question {question_id} cannot be reached from the first question.")
+
+    def _compile_reachable_products(self):
+        """
+        Products reachable from every question. Strongly connected components are emitted
+        sinks first, so the products of all successors are known when a component is handled.
+        """
+        reachable = [frozenset()] * len(self.question_ids)
+        for component in self._strongly_connected_components():
+            members = set(component)
+            if len(component) > 1 or component[0] in self._question_successors[component[0]]:
+                cycle = sorted(self.question_ids[question] for question in component)
+                self._issue('cycle', cycle[0], f"Questions {cycle} form a cycle.")
+
+            products = set()
+            for question in component:
+                for answer in self._answers_of(question):
+                    products.update(self.product_ids[product] for product in self._products_of(answer))
+                for successor in self._question_successors[question]:
+                    if successor not in members:
+                        products.update(reachable[successor])
+            products = frozenset(products)
+            for question in component:
+                reachable[question] = products
+        return tuple(reachable)
+
+    def _strongly_connected_components(self):
+        """Iterative Tarjan, components are returned in reverse topological order."""
+        successors = self._question_successors
+        index = [NO_NODE] * len(successors)
+        low = [0] * len(successors)
+        on_stack = [False] * len(successors)
+        stack, components, counter = [], [], 0
+
+        for root in range(len(successors)):
+            if index[root] != NO_NODE:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, iter(successors[root]))]
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if index[child] == NO_NODE:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, iter(successors[child])))
+                        break
+                    if on_stack[child]:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+        return components
+
+    def _issue(self, kind, entity_id, message):
+        self.issues.append(GraphIssue(kind, entity_id, message))
+
+    def _answers_of(self, question):
+        return range(self.question_answer_start[question], self.question_answer_start[question + 1])
+
+    def _products_of(self, answer):
+        return self.answer_products[self.answer_product_start[answer]:self.answer_product_start[answer + 1]]
+
+    # --- lookups by id ---
+
+    @property
+    def is_valid(self):
+        return not self.issues
+
+    @property
+    def first_question_id(self):
+        return self.question_ids[self.first_question] if self.first_question != NO_NODE else None
+
+    def is_valid_answer(self, question_id, answer_id):
+        """Whether answer_id is one of the answers of question_id."""
+        answer = self._answer_pos.get(answer_id)
+        return answer is not None and self.answer_question[answer] == self._question_pos.get(question_id)
+
+    def next_question_id(self, answer_id):
+        """The question following an answer, or None if the answer leads to products."""
+        answer = self._answer_pos.get(answer_id)
+        if answer is None or self.answer_next_question[answer] == NO_NODE:
+            return None
+        return self.question_ids[self.answer_next_question[answer]]
+
+    def product_ids_for_answer(self, answer_id):
+        """Products recommended by an answer, in transition order."""
+        answer = self._answer_pos.get(answer_id)
+        if answer is None:
+            return []
+        return [self.product_ids[product] for product in self._products_of(answer)]
+
+    def restricted_product_ids(self, answer_ids):
+        """Products that must not be recommended once any of answer_ids was given."""
+        restricted = set()
+        for answer_id in answer_ids:
+            answer = self._answer_pos.get(answer_id)
+            if answer is not None:
+                restricted |= self._restricted_for_answer(answer)
+        return restricted
+
+    def _restricted_for_answer(self, answer):
+        product_ids = self._restricted_product_ids.get(answer)
+        if product_ids is None:
+            start, end = self.answer_restriction_start[answer], self.answer_restriction_start[answer + 1]
+            product_ids = frozenset(self.product_ids[product] for product in self.answer_restrictions[start:end])
+            # Concurrent fills compute the same value, so the race is harmless.
+            self._restricted_product_ids[answer] = product_ids
+        return product_ids
+
+    def reachable_product_ids(self, question_id):
+        """Every product that can still be recommended from a question."""
+        question = self._question_pos.get(question_id)
+        return self.reachable_products[question] if question is not None else frozenset()
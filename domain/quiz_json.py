@@ -0,0 +1,94 @@
+"""
+JSON of quiz filler responses, assembled from fragments rendered once per snapshot.
+
+The questions and products of a snapshot never change, so each is serialized once, the first
+time a response shows it or when the catalog file is written, and a response only serializes
+its own small parts, such as answers_given, around them. The bytes are those jsonify produces outside debug mode.
+"""
+import json
+from collections.abc import Mapping
+
+# Response fields holding a question of the snapshot
+QUESTION_FIELDS = ("current_question", "next_question")
+
+# json.dumps() builds a new encoder on every call made with options.
+_encoder = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+# Rendered response field names, followed by their colon
+_field_prefixes = {}
+
+
+def dump_json(value):
+    """Compact JSON with sorted keys, as Flask's jsonify renders it outside debug mode."""
+    return _encoder.encode(value).encode('utf-8')
+
+
+def _field_prefix(field):
+    prefix = _field_prefixes.get(field)
+    if prefix is None:
+        prefix = _field_prefixes.setdefault(field, dump_json(field) + b":")
+    return prefix
+
+
+class Fragments(Mapping):
+    """
+    Pre-rendered JSON of questions or products by id. Each is rendered on first access and kept,
+    so decoding a snapshot renders nothing up front.
+
+    :param entities: Dict of id to the question or product dict
+    """
+
+    def __init__(self, entities):
+        self._entities = entities
+        self._rendered = {}
+
+    def __getitem__(self, entity_id):
+        fragment = self._rendered.get(entity_id)
+        if fragment is None:
+            # Threads racing on the same entity render the same bytes, the first one is kept.
+            fragment = self._rendered.setdefault(entity_id, dump_json(self._entities[entity_id]))
+        return fragment
+
+    def __iter__(self):
+        return iter(self._entities)
+
+    def __len__(self):
+        return len(self._entities)
+
+
+class QuizResult(dict):
+    """
+    The response of a quiz filler request, a dict, along with the snapshot the quiz is answered
+    against, whose fragments render_quiz_json() uses.
+    """
+
+    def __init__(self, quiz_snapshot, fields):
+        super().__init__(fields)
+        self.quiz_snapshot = quiz_snapshot
+
+
+def _fragment(fragments, entity):
+    fragment = fragments.get(entity['id'])
+    # A question or product outside the snapshot, e.g. of a stored progress, is rendered as usual.
+    return fragment if fragment is not None else dump_json(entity)
+
+
+def render_quiz_json(payload, quiz_snapshot):
+    """
+    Renders a response of the quiz filler.
+
+    :param payload: Dict of response fields
+    :param quiz_snapshot: The QuizSnapshot or CatalogFile the questions and products come from
+    :return: The JSON bytes
+    """
+    parts = []
+    for field in sorted(payload):
+        value = payload[field]
+        if field in QUESTION_FIELDS and value is not None:
+            fragment = _fragment(quiz_snapshot.question_json, value)
+        elif field == "recommended_products" and value is not None:
+            fragment = b"[" + b",".join(_fragment(quiz_snapshot.product_json, product) for product in value) + b"]"
+        else:
+            fragment = dump_json(value)
+        parts.append(_field_prefix(field) + fragment)
+    # jsonify ends the body with a newline as well.
+    return b"{" + b",".join(parts) + b"}\n"
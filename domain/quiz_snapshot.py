@@ -0,0 +1,29 @@
+from domain.quiz_graph import QuizGraph
+from domain.quiz_json import Fragments
+
+
+class QuizSnapshot:
+    """
+    Decoded, read-only view of a quiz catalog snapshot.
+
+    Built once per snapshot and shared by every QuizFiller answering against it,
+    so it must never be mutated after construction. The quiz flow itself runs
+    against the compiled `graph`, and its responses are assembled from the JSON of its
+    questions and products, each rendered once on first use.
+    """
+
+    def __init__(self, quiz_snapshot, snapshot_id=None):
+        self.snapshot_id = snapshot_id
+        self.questions = {q['id']: q for q in quiz_snapshot['questions']}
+        self.products = {product['id']: product for product in quiz_snapshot['products']}
+        self.product_restrictions = quiz_snapshot['product_restrictions']
+        self.question_transitions = quiz_snapshot['question_transitions']
+        self.graph = QuizGraph(
+            quiz_snapshot['questions'],
+            quiz_snapshot['products'],
+            self.question_transitions,
+            self.product_restrictions
+        )
+        self.first_question_id = self.graph.first_question_id
+        self.question_json = Fragments(self.questions)
+        self.product_json = Fragments(self.products)
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from domain.catalog_file import CatalogFile, write_catalog_file
+from domain.quiz_filler import QuizFiller
+from domain.quiz_graph import QuizGraph
+from domain.test_quiz_graph import question, to_question, to_product
+
+
+class TestCatalogFile(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = {
+            "questions": [question(1, 1, 2), question(2, 3, 4, 5), question(3, status="draft")],
+            "products": [
+                {"id": 1, "name": "A", "description": "Für die Haut", "status": "published"},
+                {"id": 2, "name": "B", "description": None, "status": "draft"},
+            ],
+            "question_transitions": [
+                to_question(1, 1, 2),
+                to_question(2, 2, 2),
+                to_product(3, 3, 1),
+                to_product(4, 4, 2),
+                to_product(5, 5, 1),
+                to_product(6, 5, 2),
+            ],
+            "product_restrictions": [{"id": 1, "answer_id": 2, "product_id": 2}],
+        }
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "catalog.bin")
+        write_catalog_file(self.path, self.catalog, "snapshot-1", {"questions": 3, "answers": 7})
+
+    def test_lookups_match_quiz_graph(self):
+        graph = QuizGraph(self.catalog["questions"], self.catalog["products"],
+                          self.catalog["question_transitions"], self.catalog["product_restrictions"])
+        catalog_file = CatalogFile(self.path)
+
+        self.assertEqual(catalog_file.first_question_id, graph.first_question_id)
+        for question_id in (1, 2, 3, 99):
+            self.assertEqual(catalog_file.reachable_product_ids(question_id), graph.reachable_product_ids(question_id))
+            for answer_id in (1, 3, 5, 99):
+                self.assertEqual(catalog_file.is_valid_answer(question_id, answer_id),
+                                 graph.is_valid_answer(question_id, answer_id))
+        for answer_id in (1, 2, 3, 4, 5, 99):
+            self.assertEqual(catalog_file.next_question_id(answer_id), graph.next_question_id(answer_id))
+            self.assertEqual(catalog_file.product_ids_for_answer(answer_id), graph.product_ids_for_answer(answer_id))
+        self.assertEqual(catalog_file.restricted_product_ids([1, 2]), graph.restricted_product_ids([1, 2]))
+
+    def test_decodes_the_catalog(self):
+        catalog_file = CatalogFile(self.path)
+
+        self.assertEqual(catalog_file.snapshot_id, "snapshot-1")
+        self.assertEqual(catalog_file.table_versions, {"questions": 3, "answers": 7})
+        self.assertEqual(catalog_file.questions[2], self.catalog["questions"][1])
+        self.assertIsNone(catalog_file.questions.get(99))
+        self.assertEqual(list(catalog_file.products), [1, 2])
+        self.assertIn("questions", catalog_file.catalog)
+        self.assertEqual(dict(catalog_file.catalog), self.catalog)
+
+    def test_quiz_filler_runs_on_the_mapped_file(self):
+        quiz_filler = QuizFiller(5, CatalogFile(self.path))
+
+        next_question = quiz_filler.answer(1, quiz_filler.get_current_question())
+        result = quiz_filler.answer(5, next_question)
+
+        self.assertEqual([product["id"] for product in result["recommended_products"]], [1, 2])
+        self.assertEqual(result["recommended_products"][0]["description"], "Für die Haut")
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'r+b') as catalog_file:
+            catalog_file.write(b"JSON")
+
+        with self.assertRaises(ValueError):
+            CatalogFile(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from domain.quiz_graph import QuizGraph
+
+
+def question(question_id, *answer_ids, status="published"):
+    return {"id": question_id, "text": f"q{question_id}", "status": status,
+            "answers": [{"id": answer_id, "text": f"a{answer_id}", "status": "published"} for answer_id in answer_ids]}
+
+
+def to_question(transition_id, answer_id, next_question_id):
+    return {"id": transition_id, "answer_id": answer_id, "next_question_id": next_question_id, "product_id": None}
+
+
+def to_product(transition_id, answer_id, product_id):
+    return {"id": transition_id, "answer_id": answer_id, "next_question_id": None, "product_id": product_id}
+
+
+class TestQuizGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.questions = [question(1, 1, 2), question(2, 3, 4, 5)]
+        self.products = [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]
+        self.transitions = [
+            to_question(1, 1, 2),
+            to_question(2, 2, 2),
+            to_product(3, 3, 1),
+            to_product(4, 4, 2),
+            to_product(5, 5, 1),
+            to_product(6, 5, 2),
+        ]
+        self.restrictions = [{"id": 1, "answer_id": 2, "product_id": 2}]
+
+    def compile(self):
+        return QuizGraph(self.questions, self.products, self.transitions, self.restrictions)
+
+    def test_lookups(self):
+        graph = self.compile()
+
+        self.assertTrue(graph.is_valid)
+        self.assertEqual(graph.first_question_id, 1)
+        self.assertTrue(graph.is_valid_answer(2, 4))
+        self.assertFalse(graph.is_valid_answer(1, 4))
+        self.assertFalse(graph.is_valid_answer(1, 99))
+        self.assertEqual(graph.next_question_id(1), 2)
+        self.assertIsNone(graph.next_question_id(3))
+        self.assertEqual(graph.product_ids_for_answer(5), [1, 2])
+        self.assertEqual(graph.restricted_product_ids([1, 2]), {2})
+
+    def test_first_next_question_wins(self):
+        self.questions.append(question(3, 6))
+        self.transitions += [to_question(7, 1, 3), to_product(8, 6, 1)]
+
+        graph = self.compile()
+
+        self.assertEqual(graph.next_question_id(1), 2)
+        self.assertEqual([issue.kind for issue in graph.issues], ["unreachable_question"])
+
+    def test_reachable_products(self):
+        graph = self.compile()
+
+        self.assertEqual(graph.reachable_product_ids(1), frozenset({1, 2}))
+        self.assertEqual(graph.reachable_product_ids(2), frozenset({1, 2}))
+
+    def test_dead_end_and_unknown_references(self):
+        self.transitions = [t for t in self.transitions if t["answer_id"] != 4]
+        self.transitions.append(to_product(9, 3, 42))
+        self.restrictions.append({"id": 2, "answer_id": 77, "product_id": 1})
+
+        graph = self.compile()
+
+        self.assertIn(("dead_end", 4), [(issue.kind, issue.entity_id) for issue in graph.issues])
+        self.assertIn(("unknown_product", 42), [(issue.kind, issue.entity_id) for issue in graph.issues])
+        self.assertIn(("unknown_answer", 77), [(issue.kind, issue.entity_id) for issue in graph.issues])
+
+    def test_cycle_detection(self):
+        self.questions.append(question(3, 6))
+        self.transitions = [t for t in self.transitions if t["answer_id"] != 3]
+        self.transitions += [to_question(7, 3, 3), to_question(8, 6, 2)]
+
+        graph = self.compile()
+
+        cycles = [issue for issue in graph.issues if issue.kind == "cycle"]
+        self.assertEqual(len(cycles), 1)
+        self.assertIn("[2, 3]", cycles[0].message)
+        # Both questions of the cycle can still reach the products behind answers 4 and 5.
+        self.assertEqual(graph.reachable_product_ids(3), frozenset({1, 2}))
+
+    def test_self_loop_is_a_cycle(self):
+        self.transitions[1] = to_question(2, 2, 1)
+
+        graph = self.compile()
+
+        self.assertEqual([issue.kind for issue in graph.issues], ["cycle"])
+
+    def test_ambiguous_transition(self):
+        self.transitions.append(to_product(9, 1, 1))
+
+        graph = self.compile()
+
+        self.assertEqual([(issue.kind, issue.entity_id) for issue in graph.issues], [("ambiguous_transition", 1)])
+        self.assertEqual(graph.next_question_id(1), 2)
+
+    def test_no_published_question(self):
+        self.questions = [question(1, 1, 2, status="draft")]
+        self.transitions = [to_product(1, 1, 1), to_product(2, 2, 2)]
+
+        graph = self.compile()
+
+        self.assertIsNone(graph.first_question_id)
+        self.assertEqual([issue.kind for issue in graph.issues], ["unreachable_question"])
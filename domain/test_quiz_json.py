@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from flask import Flask, jsonify
+from domain.catalog_file import CatalogFile, write_catalog_file
+from domain.quiz_json import render_quiz_json
+from domain.quiz_snapshot import QuizSnapshot
+from domain.test_quiz_graph import question, to_product
+
+
+class TestRenderQuizJson(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = {
+            "questions": [question(1, 1, 2)],
+            "products": [{"id": 1, "name": "Crème", "description": "A", "status": "published"},
+                         {"id": 2, "name": "B", "description": None, "status": "draft"}],
+            "question_transitions": [to_product(1, 1, 1), to_product(2, 2, 2)],
+            "product_restrictions": [],
+        }
+        self.quiz_snapshot = QuizSnapshot(self.catalog)
+        self.app = Flask(__name__)
+
+    def assertRendersLikeJsonify(self, payload, quiz_snapshot):
+        with self.app.app_context():
+            self.assertEqual(render_quiz_json(payload, quiz_snapshot), jsonify(payload).get_data())
+
+    def test_same_bytes_as_jsonify(self):
+        answers_given = [{"question_id": 1, "answer_id": 2}]
+        products = [self.quiz_snapshot.products[1], self.quiz_snapshot.products[2]]
+
+        self.assertRendersLikeJsonify(
+            {"current_question": self.quiz_snapshot.questions[1], "answers_given": []}, self.quiz_snapshot)
+        self.assertRendersLikeJsonify(
+            {"recommended_products": products, "answers_given": answers_given}, self.quiz_snapshot)
+        self.assertRendersLikeJsonify(
+            {"answers_accepted": 0, "answers_given": [], "next_question": self.quiz_snapshot.questions[1],
+             "error": "Invalid answer ID 7 for question 1"}, self.quiz_snapshot)
+        self.assertRendersLikeJsonify({"message": "No more questions", "answers_given": []}, self.quiz_snapshot)
+
+    def test_questions_and_products_are_not_serialized_again(self):
+        self.quiz_snapshot.question_json._rendered[1] = b'"question 1"'
+        self.quiz_snapshot.product_json._rendered[2] = b'"product 2"'
+
+        rendered = render_quiz_json({"current_question": self.quiz_snapshot.questions[1],
+                                     "recommended_products": [{"id": 2}, {"id": 99}]}, self.quiz_snapshot)
+
+        self.assertEqual(rendered, b'{"current_question":"question 1","recommended_products":["product 2",{"id":99}]}\n')
+
+    def test_fragments_are_rendered_on_first_use(self):
+        self.assertEqual(self.quiz_snapshot.question_json._rendered, {})
+
+        render_quiz_json({"current_question": self.quiz_snapshot.questions[1]}, self.quiz_snapshot)
+
+        self.assertEqual(list(self.quiz_snapshot.question_json._rendered), [1])
+        self.assertEqual(self.quiz_snapshot.product_json._rendered, {})
+        self.assertEqual(len(self.quiz_snapshot.product_json), 2)
+
+    def test_catalog_file_has_the_same_fragments(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "catalog.bin")
+        write_catalog_file(path, self.catalog, "snapshot-1")
+
+        catalog_file = CatalogFile(path)
+
+        self.assertEqual(dict(catalog_file.question_json), self.quiz_snapshot.question_json)
+        self.assertEqual(dict(catalog_file.product_json), self.quiz_snapshot.product_json)
+
+
+if __name__ == '__main__':
+    unittest.main()
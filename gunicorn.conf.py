@@ -0,0 +1,25 @@
+"""
+gunicorn settings for wsgi.py, see the Launch Instructions of the README.
+
+The app is imported and the catalog warmed up once in the master, then the workers are forked
+and share those objects copy-on-write.
+"""
+import gc
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:app"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Moves everything the master built, the catalog included, out of the collector's reach, so
+    # collections in the workers do not write to, and so copy, the pages holding it.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from services.db_config import reset_pool_after_fork
+    reset_pool_after_fork()
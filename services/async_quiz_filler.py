@@ -0,0 +1,156 @@
+"""
+asyncio variant of services/quiz_filler.py for the ASGI app in asgi.py.
+
+MongoDB is accessed through motor, so a request waiting on the database does not hold a thread.
+The catalog stays behind the synchronous CatalogCache, which only touches MySQL when an admin
+changed something; it runs in a worker thread so a reload never blocks the event loop.
+Quiz logic and the shape of the results are shared with the synchronous service.
+"""
+import asyncio
+from domain.quiz_filler import QuizFiller, QuizConflictError
+from domain.quiz_snapshot import QuizSnapshot
+from services.catalog import get_current_quiz_snapshot
+from services.db_config import async_quiz_collection, async_snapshot_collection
+from services.quiz_filler import (
+    CURRENT_QUESTION_PROJECTION, ANSWER_PROJECTION, RESET_PROJECTION, MAX_SAVE_ATTEMPTS,
+    initial_progress, new_quiz_document, current_question_result,
+    apply_answer, answer_result, apply_answers, answers_result, reset_result
+)
+from services.quiz_snapshot import snapshot_cache, cache_quiz_snapshot
+
+
+async def get_quiz_snapshot(snapshot_id):
+    """
+    Returns the decoded QuizSnapshot for an id, loading it from MongoDB only on a cache miss.
+    The cache is shared with the synchronous service.
+
+    :raises ValueError: If no snapshot with this id exists
+    """
+    quiz_snapshot = snapshot_cache.get(snapshot_id)
+    if quiz_snapshot is None:
+        snapshot = await async_snapshot_collection.find_one({"_id": snapshot_id}, {"_id": 0, "created_at": 0})
+        if snapshot is None:
+            raise ValueError(f"No quiz snapshot found for id {snapshot_id}")
+        # Decoding compiles the quiz graph, so it runs off the event loop. The JSON is rendered on first use.
+        quiz_snapshot = await asyncio.to_thread(cache_quiz_snapshot, snapshot_id, snapshot)
+    return quiz_snapshot
+
+
+async def init_quiz(quiz_id):
+    """
+    Initializes a new quiz from the cached catalog and inserts the initial progress into MongoDB.
+
+    :return: A QuizFiller for the new quiz, built from the data just written
+    """
+    try:
+        quiz_snapshot = await asyncio.to_thread(get_current_quiz_snapshot)
+        progress = initial_progress(quiz_snapshot)
+
+        result = await async_quiz_collection.update_one(
+            {"quiz_id": quiz_id},
+            {"$setOnInsert": new_quiz_document(quiz_id, quiz_snapshot, progress)},
+            upsert=True
+        )
+
+        if result.upserted_id is None:
+            # A concurrent request created the quiz first, continue with its progress.
+            return await get_quiz(quiz_id)
+
+        print(f"Quiz initialized {quiz_id} and stored in MongoDB.")
+        return QuizFiller(quiz_id, quiz_snapshot, progress)
+    except Exception as e:
+        print(f"Error initializing quiz for quiz {quiz_id}: {e}")
+        raise e
+
+
+async def get_quiz(quiz_id, force_create=False, projection=CURRENT_QUESTION_PROJECTION):
+    """
+    Retrieves the quiz from MongoDB.
+    If force_create is True, it initializes a new quiz if none exists.
+
+    :param quiz_id: The ID of the quiz to retrieve the quiz for
+    :param force_create: If True, create a new quiz if no quiz exists for the id
+    :param projection: The quiz document fields the caller needs
+    :return: A QuizFiller object if a quiz is found or created
+    """
+    quiz_data = await async_quiz_collection.find_one({"quiz_id": quiz_id}, projection)
+
+    if quiz_data:
+        # Quizzes created before snapshots were deduplicated embed their own copy.
+        if 'snapshot_id' in quiz_data:
+            quiz_snapshot = await get_quiz_snapshot(quiz_data['snapshot_id'])
+        else:
+            quiz_snapshot = await asyncio.to_thread(QuizSnapshot, quiz_data['quiz_snapshot'])
+
+        return QuizFiller(
+            quiz_id,
+            quiz_snapshot,
+            quiz_data.get('progress', {})
+        )
+    elif force_create:
+        return await init_quiz(quiz_id)
+    else:
+        raise ValueError(f"No quiz found for id {quiz_id}")
+
+
+async def save_progress(quiz_filler):
+    """
+    Writes the pending progress changes with a compare-and-set on the progress version,
+    see QuizFiller.save_progress().
+
+    :return: False if the progress was changed concurrently and nothing was written, True otherwise
+    """
+    update = quiz_filler.progress_update()
+    if update is None:
+        return True
+    result = await async_quiz_collection.update_one(quiz_filler.progress_filter(), update)
+    if result.matched_count == 0:
+        return False
+    quiz_filler.mark_saved()
+    return True
+
+
+async def get_quiz_current_question(quiz_id):
+    return current_question_result(await get_quiz(quiz_id, force_create=True))
+
+
+async def _update_quiz(quiz_id, projection, change):
+    """
+    Loads the quiz, applies the change and saves it, retrying on concurrent saves like the
+    synchronous _update_quiz().
+
+    :raises QuizConflictError: If the quiz could not be saved within MAX_SAVE_ATTEMPTS
+    """
+    for _ in range(MAX_SAVE_ATTEMPTS):
+        quiz_filler = await get_quiz(quiz_id, projection=projection)
+        result = change(quiz_filler)
+        if await save_progress(quiz_filler):
+            return quiz_filler, result
+    raise QuizConflictError(f"Quiz {quiz_id} is being changed concurrently, please retry.")
+
+
+async def answer_current_question(quiz_id, answer_id):
+    quiz_filler, result = await _update_quiz(
+        quiz_id,
+        ANSWER_PROJECTION,
+        lambda quiz_filler: apply_answer(quiz_filler, answer_id)
+    )
+    return answer_result(quiz_filler, result)
+
+
+async def answer_questions(quiz_id, answer_ids):
+    quiz_filler, (accepted, result, error) = await _update_quiz(
+        quiz_id,
+        ANSWER_PROJECTION,
+        lambda quiz_filler: apply_answers(quiz_filler, answer_ids)
+    )
+    return answers_result(quiz_filler, accepted, result, error)
+
+
+async def reset_to_previous_question(quiz_id, question_id):
+    quiz_filler, _ = await _update_quiz(
+        quiz_id,
+        RESET_PROJECTION,
+        lambda quiz_filler: quiz_filler.reset_to_question(question_id)
+    )
+    return reset_result(quiz_filler)
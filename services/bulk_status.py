@@ -0,0 +1,63 @@
+from mysql.connector import Error
+from services.catalog_version import record_catalog_change
+from services.db_config import get_db_connection, release_connection
+
+
+def change_statuses(table, ids, status, from_statuses):
+    """
+    Moves many rows of a catalog table to a new status in one transaction, applying the same
+    rule as the single-row publish and disable functions: only rows currently in one of
+    from_statuses change. The rows are locked and read once to report per-id outcomes, then
+    changed with a single conditional UPDATE, and the catalog change is recorded once.
+
+    :param table: questions, answers or products
+    :param ids: The row ids, duplicates are ignored
+    :param status: The new status
+    :param from_statuses: The statuses a row may be moved to the new status from
+    :return: List of {"id", "outcome", "status"} in the order of ids, where outcome is
+             updated, unchanged (already in the new status), rejected or not_found,
+             and status is the status of the row after the call
+    """
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return []
+    placeholders = ", ".join(["%s"] * len(ids))
+
+    connection = get_db_connection()
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        connection.start_transaction()
+
+        cursor.execute(f"SELECT id, status FROM {table} WHERE id IN ({placeholders}) FOR UPDATE", ids)
+        current = dict(cursor.fetchall())
+
+        to_update = [row_id for row_id in ids if current.get(row_id) in from_statuses]
+        if to_update:
+            id_placeholders = ", ".join(["%s"] * len(to_update))
+            status_placeholders = ", ".join(["%s"] * len(from_statuses))
+            cursor.execute(
+                f"UPDATE {table} SET status = %s WHERE id IN ({id_placeholders}) AND status IN ({status_placeholders})",
+                (status, *to_update, *from_statuses)
+            )
+            record_catalog_change(connection, table)
+        connection.commit()
+    except Error as e:
+        print(f"Error: {e}")
+        connection.rollback()
+        raise
+    finally:
+        release_connection(connection, cursor)
+
+    results = []
+    for row_id in ids:
+        if row_id not in current:
+            results.append({"id": row_id, "outcome": "not_found", "status": None})
+        elif current[row_id] in from_statuses:
+            results.append({"id": row_id, "outcome": "updated", "status": status})
+        elif current[row_id] == status:
+            results.append({"id": row_id, "outcome": "unchanged", "status": status})
+        else:
+            results.append({"id": row_id, "outcome": "rejected", "status": current[row_id]})
+    print(f"{table}: {len(to_update)} of {len(ids)} set to '{status}'.")
+    return results
@@ -0,0 +1,225 @@
+import threading
+from domain.catalog_file import CatalogFile, write_catalog_file
+from domain.quiz_graph import QuizGraph
+from services.catalog_version import catalog_versions
+from services.product import get_all_products
+from services.quiz import get_all_questions, get_all_product_restrictions
+from services.question_transitions import get_question_transitions
+from services.quiz_snapshot import snapshot_cache, store_quiz_snapshot
+
+# Catalog field -> the tables it is read from
+CATALOG_FIELD_TABLES = {
+    "questions": ("questions", "answers"),
+    "products": ("products",),
+    "product_restrictions": ("product_restrictions",),
+    "question_transitions": ("question_transitions",),
+}
+
+
+def load_catalog(fields=tuple(CATALOG_FIELD_TABLES)):
+    """
+    Reads the quiz catalog from MySQL.
+
+    :param fields: The catalog fields to read, all of them by default
+    :return: Dict with questions, products, product_restrictions and question_transitions
+    """
+    loaders = {
+        "questions": get_all_questions,
+        "products": get_all_products,
+        "product_restrictions": get_all_product_restrictions,
+        "question_transitions": get_question_transitions,
+    }
+    return {field: loaders[field]() for field in fields}
+
+
+class CatalogCache:
+    """
+    Read-through cache of the catalog, kept current through the catalog_versions change feed.
+    Only the fields whose tables changed since they were read are loaded again.
+
+    :param versions: The CatalogVersions of this worker
+    """
+
+    def __init__(self, versions):
+        self._versions = versions
+        # (table versions the fields were read at, catalog, stored QuizSnapshot), swapped as a whole
+        self._state = ({}, {}, None)
+        self._lock = threading.Lock()
+
+    def _stale_fields(self, loaded_versions, catalog, versions):
+        return [
+            field for field, tables in CATALOG_FIELD_TABLES.items()
+            if field not in catalog or any(loaded_versions.get(table) != versions.get(table) for table in tables)
+        ]
+
+    def _current(self):
+        versions = self._versions.get()
+        state = self._state
+        if not self._stale_fields(state[0], state[1], versions):
+            return state
+
+        with self._lock:
+            # Another thread may have reloaded while this one waited for the lock.
+            loaded_versions, catalog, _ = self._state
+            stale = self._stale_fields(loaded_versions, catalog, versions)
+            if stale:
+                # Versions are read before loading, so a write committed during the load
+                # leaves the field stale and it is read again next time.
+                catalog = dict(catalog, **load_catalog(stale))
+                loaded_versions = dict(loaded_versions)
+                for field in stale:
+                    for table in CATALOG_FIELD_TABLES[field]:
+                        loaded_versions[table] = versions.get(table)
+                self._state = (loaded_versions, catalog, store_quiz_snapshot(catalog))
+            return self._state
+
+    def use_catalog_file(self, catalog_file):
+        """
+        Serves the catalog of a CatalogFile as read at the table versions it was exported at.
+        Fields whose tables changed since are loaded from MySQL as usual.
+        """
+        with self._lock:
+            self._state = (dict(catalog_file.table_versions), catalog_file.catalog, catalog_file)
+
+    def get_catalog(self):
+        """The current catalog. Shared between requests, must not be mutated."""
+        return self._current()[1]
+
+    def get_checked_catalog(self):
+        """
+        The current catalog for checking an admin write against. The versions are probed now instead
+        of trusted for the probe interval, so a write of another worker is not missed.
+        Only the fields whose tables changed are read from MySQL.
+        """
+        self._versions.invalidate()
+        return self.get_catalog()
+
+    def get_quiz_snapshot(self):
+        """The QuizSnapshot of the current catalog, already stored in MongoDB."""
+        return self._current()[2]
+
+
+catalog_cache = CatalogCache(catalog_versions)
+
+
+def get_catalog():
+    """
+    The current catalog of this worker. MySQL is only queried again for the tables an admin
+    write changed, as reported by the catalog_versions change feed.
+    """
+    return catalog_cache.get_catalog()
+
+
+def get_current_quiz_snapshot():
+    """
+    The QuizSnapshot of the current catalog, already stored in MongoDB, for starting new quizzes.
+    """
+    return catalog_cache.get_quiz_snapshot()
+
+
+def export_catalog_file(path):
+    """
+    Writes the current catalog, compiled, to a catalog file workers can map instead of loading
+    the catalog from MySQL, see domain/catalog_file.py. Its snapshot is already stored in MongoDB.
+
+    :param path: The file to write, replaced atomically
+    :return: The snapshot id of the catalog written
+    """
+    loaded_versions, catalog, quiz_snapshot = catalog_cache._current()
+    write_catalog_file(path, catalog, quiz_snapshot.snapshot_id, loaded_versions)
+    return quiz_snapshot.snapshot_id
+
+
+def load_catalog_file(path):
+    """
+    Maps a catalog file and serves new quizzes, and quizzes on its snapshot, from it.
+    Nothing is read from MySQL until catalog_versions reports a change of its tables.
+
+    :param path: A file written by export_catalog_file()
+    :return: The CatalogFile
+    """
+    catalog_file = CatalogFile(path)
+    catalog_cache.use_catalog_file(catalog_file)
+    # The mapped pages are shared with every process mapping the file, they do not count against the cache.
+    snapshot_cache.put(catalog_file.snapshot_id, catalog_file, 0)
+    return catalog_file
+
+
+def _compile(catalog):
+    return QuizGraph(
+        catalog['questions'],
+        catalog['products'],
+        catalog['question_transitions'],
+        catalog['product_restrictions']
+    )
+
+
+def validate_catalog():
+    """
+    Compiles the current catalog into a QuizGraph and reports every problem found,
+    so a broken quiz flow is caught before it is published rather than when a user hits it.
+
+    :return: Dict with a valid flag and the list of issues
+    """
+    graph = _compile(get_catalog())
+    return {
+        "valid": graph.is_valid,
+        "issues": [issue._asdict() for issue in graph.issues]
+    }
+
+
+class CatalogValidationError(ValueError):
+    """Raised when a change would add issues to the quiz graph. Nothing has been written."""
+
+    def __init__(self, issues):
+        super().__init__(f"The change would break the quiz flow: {len(issues)} new issue(s).")
+        self.issues = issues
+
+
+def _check_change(catalog, **changes):
+    current_issues = set(_compile(catalog).issues)
+    new_issues = [
+        issue._asdict() for issue in _compile(dict(catalog, **changes)).issues if issue not in current_issues
+    ]
+    if new_issues:
+        raise CatalogValidationError(new_issues)
+
+
+def check_publish(question_ids):
+    """
+    Compiles the catalog as it would be once the given questions are published and rejects the
+    publish if that adds issues, e.g. a question that becomes unreachable because the first
+    published question changes. Issues the catalog already has do not block a publish.
+    Publishing answers needs no check, the quiz graph does not depend on their status.
+
+    :param question_ids: The ids about to be published
+    :raises CatalogValidationError: With the issues the publish would add
+    """
+    # Fields of a mapped catalog file are decoded on every access, so they are decoded once here.
+    catalog = dict(catalog_cache.get_checked_catalog())
+    question_ids = set(question_ids)
+    questions = [
+        dict(question, status='published') if question['id'] in question_ids else question
+        for question in catalog['questions']
+    ]
+    _check_change(catalog, questions=questions)
+
+
+def check_transition_change(transition_id=None, transition=None):
+    """
+    Compiles the catalog as it would be once a question transition is created, updated or deleted
+    and rejects the change if that adds issues, e.g. a dead end or a cycle.
+
+    :param transition_id: The transition to update or delete, None to create one
+    :param transition: Dict with answer_id, next_question_id and product_id, None to delete
+    :raises CatalogValidationError: With the issues the change would add
+    """
+    catalog = dict(catalog_cache.get_checked_catalog())
+    rows = list(catalog['question_transitions'])
+    if transition_id is None:
+        transitions = rows + [dict(transition, id=None)]
+    elif transition is None:
+        transitions = [row for row in rows if row['id'] != transition_id]
+    else:
+        transitions = [dict(transition, id=transition_id) if row['id'] == transition_id else row for row in rows]
+    _check_change(catalog, question_transitions=transitions)
@@ -0,0 +1,316 @@
+"""
+Bulk import and export of the quiz catalog.
+
+A catalog file is either NDJSON, one record per line:
+
+    {"type": "question", "ref": "q1", "text": "am i old", "status": "published"}
+    {"type": "answer", "ref": "a1", "question": "q1", "text": "yes", "status": "published"}
+    {"type": "product", "ref": "p1", "name": "name1", "description": "desc1"}
+    {"type": "question_transition", "answer": "a1", "product": "p1"}
+    {"type": "product_restriction", "answer": "a1", "product": "p1"}
+
+or one JSON document with the same records grouped by kind, answers nested in their question:
+
+    {"questions": [{"ref": "q1", "text": "am i old", "answers": [{"ref": "a1", "text": "yes"}]}],
+     "products": [...], "question_transitions": [...], "product_restrictions": [...]}
+
+References are strings naming a ref defined in the same file, or integer ids of rows that
+already exist. The export writes NDJSON with refs derived from the ids, which imports
+back into an empty database as the same catalog.
+"""
+import json
+from services.catalog_version import record_catalog_change
+from services.db_config import get_db_connection, release_connection, stream_rows
+
+STATUSES = ('draft', 'published', 'disabled')
+
+# Record type -> (table, ref prefix used by the export)
+RECORD_TYPES = {
+    "question": ("questions", "q"),
+    "answer": ("answers", "a"),
+    "product": ("products", "p"),
+    "question_transition": ("question_transitions", None),
+    "product_restriction": ("product_restrictions", None),
+}
+
+# Fields holding text, refs included
+STRING_FIELDS = ("ref", "text", "name", "description", "status")
+
+# Record field -> the record type it references
+REFERENCE_FIELDS = {"question": "question", "answer": "answer", "next_question": "question", "product": "product"}
+
+# Rows per multi-row INSERT of questions, answers or products, well below max_allowed_packet.
+INSERT_BATCH_SIZE = 1000
+
+
+class CatalogImportError(ValueError):
+    """Raised when a catalog file is invalid. Nothing has been written."""
+
+    def __init__(self, errors):
+        super().__init__(f"Invalid catalog: {len(errors)} error(s).")
+        self.errors = errors
+
+
+def parse_ndjson(lines):
+    """
+    :param lines: Iterable of NDJSON lines, as str or bytes
+    :return: The list of records
+    :raises CatalogImportError: If a line is not a JSON object
+    """
+    records, errors = [], []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            errors.append(f"line {line_number}: {e}")
+            continue
+        if not isinstance(record, dict):
+            errors.append(f"line {line_number}: expected a JSON object")
+            continue
+        records.append(dict(record, _line=line_number))
+    if errors:
+        raise CatalogImportError(errors)
+    return records
+
+
+def parse_document(document):
+    """
+    :param document: The decoded JSON document, see the module docstring
+    :return: The list of records
+    :raises CatalogImportError: If the document or one of its lists has the wrong shape
+    """
+    if not isinstance(document, dict):
+        raise CatalogImportError(["expected a JSON object with questions, products, "
+                                  "question_transitions and product_restrictions"])
+    records, errors = [], []
+
+    def entries(container, key, where):
+        value = container.get(key, [])
+        if not isinstance(value, list):
+            errors.append(f"{where}: expected a list")
+            return
+        for index, entry in enumerate(value):
+            if isinstance(entry, dict):
+                yield index, entry
+            else:
+                errors.append(f"{where}[{index}]: expected a JSON object")
+
+    for index, question in entries(document, "questions", "questions"):
+        question = dict(question, type="question", _line=f"questions[{index}]")
+        question.setdefault("ref", question["_line"])
+        records.append(question)
+        for answer_index, answer in entries(question, "answers", f"questions[{index}].answers"):
+            records.append(dict(answer, type="answer", question=question["ref"],
+                                _line=f"questions[{index}].answers[{answer_index}]"))
+        question.pop("answers", None)
+    for key, record_type in (("products", "product"), ("question_transitions", "question_transition"),
+                             ("product_restrictions", "product_restriction")):
+        for index, record in entries(document, key, key):
+            records.append(dict(record, type=record_type, _line=f"{key}[{index}]"))
+    if errors:
+        raise CatalogImportError(errors)
+    return records
+
+
+def _where(record):
+    line = record['_line']
+    return f"record {line}" if isinstance(line, str) else f"line {line}"
+
+
+def _key(record):
+    """The ref of a record, records nothing refers to may omit it."""
+    return record.get("ref", f"#{record['_line']}")
+
+
+def validate_records(records):
+    """
+    Checks types, required fields, statuses and that every reference is a ref of the file or an id.
+
+    :return: The list of error messages, empty if the records can be imported
+    """
+    errors = []
+    refs = {record_type: set() for record_type in RECORD_TYPES}
+
+    for record in records:
+        where = _where(record)
+        record_type = record.get("type")
+        if not isinstance(record_type, str) or record_type not in RECORD_TYPES:
+            errors.append(f"{where}: unknown type {record_type!r}")
+            continue
+        for field in STRING_FIELDS:
+            if record.get(field) is not None and not isinstance(record[field], str):
+                errors.append(f"{where}: {field} must be a string")
+        if record_type in ("question", "answer") and not record.get("text"):
+            errors.append(f"{where}: text is required")
+        if record_type == "product" and not record.get("name"):
+            errors.append(f"{where}: name is required")
+        status = record.get("status", "draft")
+        if status is None or isinstance(status, str) and status not in STATUSES:
+            errors.append(f"{where}: status must be one of {', '.join(STATUSES)}")
+        if isinstance(record.get("ref"), str):
+            if record["ref"] in refs[record_type]:
+                errors.append(f"{where}: duplicate {record_type} ref {record['ref']!r}")
+            refs[record_type].add(record["ref"])
+
+    for record in records:
+        record_type = record.get("type")
+        if not isinstance(record_type, str) or record_type not in RECORD_TYPES:
+            continue
+        where = _where(record)
+        required = {
+            "answer": ("question",),
+            "question_transition": ("answer",),
+            "product_restriction": ("answer", "product"),
+        }.get(record_type, ())
+        for field in required:
+            if record.get(field) is None:
+                errors.append(f"{where}: {field} is required")
+        if record_type == "question_transition" and \
+                (record.get("next_question") is None) == (record.get("product") is None):
+            errors.append(f"{where}: exactly one of next_question or product is required")
+        if record_type in ("question", "product"):
+            continue
+        for field, referenced_type in REFERENCE_FIELDS.items():
+            value = record.get(field)
+            if value is None or isinstance(value, int) and not isinstance(value, bool):
+                continue
+            if not isinstance(value, str) or value not in refs[referenced_type]:
+                errors.append(f"{where}: {field} {value!r} is neither a ref of the file nor an id")
+    return errors
+
+
+def _id_step(cursor):
+    """
+    The step between the AUTO_INCREMENT ids of the rows of one multi-row INSERT, or None if they may
+    not be consecutive. InnoDB allocates the ids of such an INSERT in one go when innodb_autoinc_lock_mode
+    is 0 or 1. With interleaved allocation (2, the default since MySQL 8) concurrent inserts can take
+    ids in between.
+    """
+    cursor.execute("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+    lock_mode, increment = cursor.fetchone()
+    return int(increment) if int(lock_mode) <= 1 else None
+
+
+def _insert_rows(cursor, query, records, values, id_step):
+    """
+    Inserts rows and maps the ref of each record to the AUTO_INCREMENT id it got, so later rows can
+    reference it. If the ids of a multi-row INSERT are consecutive, see _id_step(), the rows are
+    inserted INSERT_BATCH_SIZE at a time and their ids counted from the first one. Otherwise they
+    are inserted one at a time, one round trip per row.
+    """
+    ids = {}
+    if id_step is None:
+        for record in records:
+            cursor.execute(query, values(record))
+            ids[_key(record)] = cursor.lastrowid
+        return ids
+    for start in range(0, len(records), INSERT_BATCH_SIZE):
+        batch = records[start:start + INSERT_BATCH_SIZE]
+        # executemany() sends an INSERT as one multi-row statement, lastrowid is the id of its first row.
+        cursor.executemany(query, [values(record) for record in batch])
+        for offset, record in enumerate(batch):
+            ids[_key(record)] = cursor.lastrowid + offset * id_step
+    return ids
+
+
+def import_catalog(records):
+    """
+    Validates the records and inserts them in a single transaction. Questions, answers and products
+    are inserted in batches, or row by row if their ids cannot be derived, see _insert_rows().
+    Transitions and restrictions are inserted with one executemany each.
+    Either the whole catalog is imported or nothing is.
+
+    :return: Dict of table name to the number of rows inserted
+    :raises CatalogImportError: If the records are invalid
+    """
+    errors = validate_records(records)
+    if errors:
+        raise CatalogImportError(errors)
+
+    by_type = {record_type: [r for r in records if r["type"] == record_type] for record_type in RECORD_TYPES}
+    ids = {}
+
+    def resolve(record_type, value):
+        return value if isinstance(value, int) else ids[record_type][value]
+
+    connection = get_db_connection()
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        connection.start_transaction()
+        id_step = _id_step(cursor)
+
+        ids["question"] = _insert_rows(
+            cursor, "INSERT INTO questions (text, status) VALUES (%s, %s)", by_type["question"],
+            lambda r: (r["text"], r.get("status", "draft")), id_step
+        )
+        ids["answer"] = _insert_rows(
+            cursor, "INSERT INTO answers (question_id, text, status) VALUES (%s, %s, %s)", by_type["answer"],
+            lambda r: (resolve("question", r["question"]), r["text"], r.get("status", "draft")), id_step
+        )
+        ids["product"] = _insert_rows(
+            cursor, "INSERT INTO products (name, description, status) VALUES (%s, %s, %s)", by_type["product"],
+            lambda r: (r["name"], r.get("description"), r.get("status", "draft")), id_step
+        )
+        if by_type["question_transition"]:
+            cursor.executemany(
+                "INSERT INTO question_transitions (answer_id, next_question_id, product_id) VALUES (%s, %s, %s)",
+                [(resolve("answer", r["answer"]),
+                  resolve("question", r["next_question"]) if r.get("next_question") is not None else None,
+                  resolve("product", r["product"]) if r.get("product") is not None else None)
+                 for r in by_type["question_transition"]]
+            )
+        if by_type["product_restriction"]:
+            cursor.executemany(
+                "INSERT INTO product_restrictions (product_id, answer_id) VALUES (%s, %s)",
+                [(resolve("product", r["product"]), resolve("answer", r["answer"]))
+                 for r in by_type["product_restriction"]]
+            )
+
+        counts = {RECORD_TYPES[t][0]: len(rows) for t, rows in by_type.items() if rows}
+        if counts:
+            record_catalog_change(connection, *counts)
+        connection.commit()
+        print(f"Catalog imported: {counts}")
+        return counts
+    except Exception as e:
+        print(f"Error importing catalog: {e}")
+        connection.rollback()
+        raise
+    finally:
+        release_connection(connection, cursor)
+
+
+def export_catalog():
+    """
+    Yields the whole catalog as NDJSON lines, see the module docstring. Rows are streamed
+    table by table, so memory use does not grow with the size of the catalog.
+    """
+    def ref(record_type, row_id):
+        return f"{RECORD_TYPES[record_type][1]}{row_id}"
+
+    for row in stream_rows("SELECT id, text, status FROM questions ORDER BY id"):
+        yield _line({"type": "question", "ref": ref("question", row["id"]),
+                     "text": row["text"], "status": row["status"]})
+    for row in stream_rows("SELECT id, question_id, text, status FROM answers ORDER BY id"):
+        yield _line({"type": "answer", "ref": ref("answer", row["id"]), "question": ref("question", row["question_id"]),
+                     "text": row["text"], "status": row["status"]})
+    for row in stream_rows("SELECT id, name, description, status FROM products ORDER BY id"):
+        yield _line({"type": "product", "ref": ref("product", row["id"]), "name": row["name"],
+                     "description": row["description"], "status": row["status"]})
+    for row in stream_rows("SELECT answer_id, next_question_id, product_id FROM question_transitions ORDER BY id"):
+        transition = {"type": "question_transition", "answer": ref("answer", row["answer_id"])}
+        if row["next_question_id"] is not None:
+            transition["next_question"] = ref("question", row["next_question_id"])
+        if row["product_id"] is not None:
+            transition["product"] = ref("product", row["product_id"])
+        yield _line(transition)
+    for row in stream_rows("SELECT answer_id, product_id FROM product_restrictions ORDER BY id"):
+        yield _line({"type": "product_restriction", "answer": ref("answer", row["answer_id"]),
+                     "product": ref("product", row["product_id"])})
+
+
+def _line(record):
+    return json.dumps(record, separators=(',', ':')) + "\n"
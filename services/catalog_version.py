@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from services.db_config import get_db_connection
+
+# Tables whose changes invalidate cached catalogs. Each has a row in catalog_versions.
+CATALOG_TABLES = ('questions', 'answers', 'products', 'product_restrictions', 'question_transitions')
+
+# Seconds a worker trusts the versions it last read before probing MySQL again.
+# 0 probes on every use.
+VERSION_PROBE_INTERVAL = 1.0
+
+
+class CatalogVersions:
+    """
+    A worker's view of the catalog_versions table, the change feed shared by all workers.
+
+    Every admin write bumps the version row of the tables it changed in its own transaction,
+    see record_catalog_change(). Workers read all versions with one primary key scan at most
+    every probe_interval seconds, and immediately after a write made by the worker itself.
+
+    :param probe_interval: Seconds between probes
+    """
+
+    def __init__(self, probe_interval=VERSION_PROBE_INTERVAL):
+        self.probe_interval = probe_interval
+        self._versions = None
+        self._probed_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Probe again on the next get()."""
+        self._probed_at = 0.0
+
+    def get(self):
+        """
+        :return: Dict of table name to version
+        """
+        if self._versions is None or time.monotonic() - self._probed_at >= self.probe_interval:
+            with self._lock:
+                if self._versions is None or time.monotonic() - self._probed_at >= self.probe_interval:
+                    probed_at = time.monotonic()
+                    self._versions = self._probe()
+                    self._probed_at = probed_at
+        return self._versions
+
+    @staticmethod
+    def _probe():
+        connection = get_db_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT table_name, version FROM catalog_versions")
+            versions = {table_name: version for table_name, version in cursor.fetchall()}
+            cursor.close()
+            return versions
+        finally:
+            connection.close()
+
+
+catalog_versions = CatalogVersions()
+
+
+def get_table_versions():
+    """The catalog table versions as last probed by this worker."""
+    return catalog_versions.get()
+
+
+def catalog_etag(tables, variant=""):
+    """
+    A strong entity tag for data read from the given tables, which changes whenever one of them
+    changes. Comes from the versions this worker last probed, so checking it needs no query within
+    the probe interval. The versions are read before the data, so a tag is never newer than its data.
+
+    :param tables: Names of the tables the data is read from, see CATALOG_TABLES
+    :param variant: Anything else the data depends on, e.g. the query string of the request
+    :return: The tag, or None if a table has no version
+    """
+    versions = get_table_versions()
+    if any(table not in versions for table in tables):
+        return None
+    key = "|".join([",".join(f"{table}={versions[table]}" for table in tables), variant])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def record_catalog_change(connection, *tables):
+    """
+    Bumps the shared versions of the given tables. Must run on the connection of the admin write,
+    before its commit, so the bump becomes visible to other workers together with the change.
+    A cursor of its own is used, so rowcount and lastrowid of the write stay readable.
+
+    :param connection: Connection of the transaction making the change
+    :param tables: Names of the changed tables, see CATALOG_TABLES
+    """
+    placeholders = ", ".join(["%s"] * len(tables))
+    cursor = connection.cursor()
+    cursor.execute(
+        f"UPDATE catalog_versions SET version = version + 1 WHERE table_name IN ({placeholders})",
+        tables
+    )
+    cursor.close()
+    # This worker sees its own change on its next read instead of after the probe interval.
+    catalog_versions.invalidate()
@@ -1,13 +1,344 @@
+import os
+import threading
+import time
+from queue import LifoQueue, Empty
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+from services.metrics import InstrumentedCollection, instrument_connect
+
 DB_CONFIG = {
-    'user': 'root',
-    'password': '',
-    'host': 'localhost',
-    'database': 'manual',
+    'user': os.environ.get('MYSQL_USER', 'root'),
+    'password': os.environ.get('MYSQL_PASSWORD', ''),
+    'host': os.environ.get('MYSQL_HOST', 'localhost'),
+    'database': os.environ.get('MYSQL_DATABASE', 'manual'),
+}
+
+POOL_CONFIG = {
+    # Maximum number of open MySQL connections per process.
+    'pool_size': 10,
+    # Seconds to wait for a free connection before raising PoolError.
+    'checkout_timeout': 5.0,
+    # Connections older than this many seconds are closed and reopened on borrow.
+    'recycle': 3600,
+    # Ping idle connections on borrow and replace the ones that went away.
+    'health_check': True,
 }
 
-from pymongo import MongoClient
 
-MONGO_URI = "mongodb://localhost:27017/"
-mongo_client = MongoClient(MONGO_URI)
-mongo_db = mongo_client["manual"]
-quiz_collection = mongo_db["quizes"]
\ No newline at end of file
+class PooledConnection:
+    """
+    Thin wrapper around a MySQL connection borrowed from a ConnectionPool.
+
+    Behaves like the wrapped connection, except that close() hands the
+    connection back to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool, connection, created_at):
+        self._pool = pool
+        self._connection = connection
+        self.created_at = created_at
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        """Return the connection to the pool. Safe to call more than once."""
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        self._pool._release(connection, self.created_at)
+
+    def discard(self):
+        """Close the connection instead of returning it, e.g. when it still has unread results."""
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        self._pool._release(connection, self.created_at, reuse=False)
+
+
+class ConnectionPool:
+    """
+    A small thread-safe pool of MySQL connections.
+
+    Connections inherited from a parent process are never handed out, a forked child
+    starts with an empty pool of its own.
+
+    :param connect: Callable opening a new raw connection
+    :param pool_size: Maximum number of connections handed out at once
+    :param checkout_timeout: Seconds to wait for a free connection
+    :param recycle: Maximum connection age in seconds, None to keep forever
+    :param health_check: Ping connections on borrow and reopen dead ones
+    """
+
+    def __init__(self, connect, pool_size=10, checkout_timeout=5.0, recycle=3600, health_check=True):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        self._connect = connect
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.recycle = recycle
+        self.health_check = health_check
+
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+
+    def get_connection(self):
+        """
+        Borrow a connection, opening a new one if no healthy idle connection exists.
+
+        :raises PoolError: If no connection becomes free within checkout_timeout
+        """
+        if self._pid != os.getpid():
+            # The sockets belong to the parent process. They are left open for it, not closed.
+            self._reset()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolError(f"No MySQL connection available within {self.checkout_timeout}s.")
+        try:
+            connection, created_at = self._take_idle()
+            if connection is None:
+                connection, created_at = self._connect(), time.monotonic()
+            return PooledConnection(self, connection, created_at)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _take_idle(self):
+        """Pop idle connections until a usable one is found."""
+        while True:
+            try:
+                connection, created_at = self._idle.get_nowait()
+            except Empty:
+                return None, None
+            if self._is_usable(connection, created_at):
+                return connection, created_at
+            self._discard(connection)
+
+    def _is_usable(self, connection, created_at):
+        if self.recycle is not None and time.monotonic() - created_at > self.recycle:
+            return False
+        if self.health_check:
+            try:
+                return connection.is_connected()
+            except Exception:
+                return False
+        return True
+
+    def _release(self, connection, created_at, reuse=True):
+        try:
+            if not reuse:
+                self._discard(connection)
+                return
+            # Never hand out a connection with a half-finished transaction.
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put((connection, created_at))
+        except Exception:
+            self._discard(connection)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        """Close every idle connection. Borrowed connections are closed when returned."""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except Empty:
+                return
+            self._discard(connection)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(instrument_connect(lambda: mysql.connector.connect(**DB_CONFIG)), **POOL_CONFIG)
+    return _pool
+
+
+def reset_pool_after_fork():
+    """
+    Drops the pool inherited from the parent process, so a forked worker opens its own connections.
+    A pool also notices the fork itself on its next borrow, this only releases the parent's pool early.
+    The MongoDB clients are created per process, see get_mongo_db().
+    """
+    global _pool
+    _pool = None
+
+
+def get_db_connection():
+    """Borrow a MySQL connection from the shared pool. Call close() to give it back."""
+    return get_pool().get_connection()
+
+
+def release_connection(connection, cursor=None):
+    """
+    Closes the cursor, if one was created, and gives a borrowed connection back to the pool.
+    A connection that went away is discarded instead, either way its pool slot is freed.
+    """
+    try:
+        if cursor is not None:
+            cursor.close()
+        connected = connection.is_connected()
+    except Exception:
+        connected = False
+    if connected:
+        connection.close()
+    else:
+        connection.discard()
+
+
+# Rows fetched per round trip by stream_rows().
+STREAM_BATCH_SIZE = 1000
+
+
+def stream_rows(query, params=(), batch_size=STREAM_BATCH_SIZE):
+    """
+    Yields the rows of a query as dicts without buffering the whole result, batch_size rows at a time.
+    The connection stays borrowed until the generator is exhausted or closed.
+    """
+    connection = get_db_connection()
+    exhausted = False
+    try:
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+        cursor.close()
+        exhausted = True
+    finally:
+        # A connection with unread rows cannot run the next query, so it is not reused.
+        if exhausted:
+            connection.close()
+        else:
+            connection.discard()
+
+
+# MongoDB, configured from the environment. Clients are created on first use in each process,
+# so importing a service opens no connection and a forked worker never uses its parent's client.
+MONGO_URI = os.environ.get('MONGO_URI', "mongodb://localhost:27017/")
+MONGO_DATABASE = os.environ.get('MONGO_DATABASE', "manual")
+
+
+class ProcessDatabase:
+    """
+    A MongoDB database whose client is created on first use in each process.
+
+    :param connect: Callable returning the database of a new client
+    """
+
+    def __init__(self, connect):
+        self._connect = connect
+        # (pid, database, collections by name), swapped as a whole
+        self._state = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        state = self._state
+        if state is None or state[0] != os.getpid():
+            with self._lock:
+                state = self._state
+                if state is None or state[0] != os.getpid():
+                    state = (os.getpid(), self._connect(), {})
+                    self._state = state
+        return state
+
+    def get_database(self):
+        return self._current()[1]
+
+    def get_collection(self, name):
+        _, database, collections = self._current()
+        collection = collections.get(name)
+        if collection is None:
+            collection = collections.setdefault(name, database[name])
+        return collection
+
+
+def _connect_mongo():
+    from pymongo import MongoClient
+    from services.mongo_indexes import ensure_indexes
+    client = MongoClient(MONGO_URI, connect=False)
+    database = client[MONGO_DATABASE]
+    # However the app was started, the unique quiz_id index exists before a quiz is written.
+    # Other threads wait for it on the ProcessDatabase lock. If it cannot be created the client is
+    # not kept, so the error reaches the caller and the next use connects and tries again.
+    try:
+        ensure_indexes(database["quizes"])
+    except Exception as e:
+        print(f"Error creating MongoDB indexes: {e}")
+        client.close()
+        raise
+    return database
+
+
+def _connect_async_mongo():
+    # The indexes are created with the synchronous client of the process, once, before the first
+    # quiz is written through Motor.
+    mongo_database.get_database()
+    # Motor binds to the running event loop on first use.
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(MONGO_URI)[MONGO_DATABASE]
+
+
+mongo_database = ProcessDatabase(_connect_mongo)
+async_mongo_database = ProcessDatabase(_connect_async_mongo)
+
+
+def get_mongo_db():
+    """The MongoDB database of this process."""
+    return mongo_database.get_database()
+
+
+def get_async_mongo_db():
+    """The Motor database of this process, for the asyncio quiz filler."""
+    return async_mongo_database.get_database()
+
+
+class LazyCollection:
+    """
+    Stands for a collection of the client of the current process and looks it up on every use,
+    so modules can hold it from import on.
+
+    :param name: Name of the collection
+    :param database: The ProcessDatabase it belongs to
+    """
+
+    def __init__(self, name, database=mongo_database):
+        self.name = name
+        self._database = database
+
+    def __getattr__(self, attribute):
+        if attribute.startswith('_'):
+            # Like pymongo's Collection, so probes such as mock.patch() looking for _is_coroutine
+            # do not connect and create the indexes.
+            raise AttributeError(attribute)
+        return getattr(self._database.get_collection(self.name), attribute)
+
+
+quiz_collection = InstrumentedCollection(LazyCollection("quizes"))
+snapshot_collection = InstrumentedCollection(LazyCollection("quiz_snapshots"))
+
+# The same collections for the asyncio quiz filler served from asgi.py.
+async_quiz_collection = LazyCollection("quizes", async_mongo_database)
+async_snapshot_collection = LazyCollection("quiz_snapshots", async_mongo_database)
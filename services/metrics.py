@@ -0,0 +1,244 @@
+"""
+In-process request and database metrics, exposed in the Prometheus text format.
+
+Request latency is recorded per Flask endpoint by views/metrics_views.py. MongoDB collections and
+MySQL connections are wrapped by InstrumentedCollection and instrument_connect(), which time
+every call and charge it both to a per-operation histogram and to the request being served, so the
+time of a request can be split into MongoDB, MySQL and the rest (Python and JSON serialization).
+
+Recording is a couple of perf_counter() calls and a short locked update per observation.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds, from 0.5ms to 10s.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+MONGO_OPERATIONS = frozenset({
+    "find", "find_one", "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one", "delete_one", "delete_many",
+    "count_documents", "aggregate", "bulk_write", "create_index",
+})
+MYSQL_CONNECTION_OPERATIONS = frozenset({"commit", "rollback", "start_transaction"})
+MYSQL_CURSOR_OPERATIONS = frozenset({"execute", "executemany", "fetchone", "fetchmany", "fetchall", "callproc"})
+
+
+class Histogram:
+    """Counts observations per bucket, with their sum. Thread-safe."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        """:return: (cumulative counts per bucket and +Inf, sum)"""
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+
+class Metric:
+    """A named family of histograms or counters, one per set of label values."""
+
+    def __init__(self, name, kind, description, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.kind = kind
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _child(self, labels):
+        child = self._children.get(labels)
+        if child is None:
+            with self._lock:
+                child = self._children.get(labels)
+                if child is None:
+                    child = Histogram(self.buckets) if self.kind == "histogram" else [0, threading.Lock()]
+                    self._children[labels] = child
+        return child
+
+    def observe(self, value, *labels):
+        self._child(labels).observe(value)
+
+    def inc(self, *labels, amount=1):
+        counter = self._child(labels)
+        with counter[1]:
+            counter[0] += amount
+
+    def samples(self):
+        """:return: Dict of label values to the counter value, or to the Histogram"""
+        with self._lock:
+            children = dict(self._children)
+        return {labels: child[0] if self.kind == "counter" else child for labels, child in children.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        # Request threads may add label sets during a scrape, samples() copies them under the lock.
+        for labels, child in sorted(self.samples().items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            if self.kind == "counter":
+                lines.append(f"{self.name}{{{label_text}}} {_number(child)}")
+                continue
+            cumulative, total = child.snapshot()
+            prefix = label_text + "," if label_text else ""
+            for bound, count in zip(self.buckets + (float("inf"),), cumulative):
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {_number(total)}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative[-1]}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """The metrics of one process."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.request_seconds = Metric(
+            "manual_request_duration_seconds", "histogram", "Time to handle a request, per endpoint.",
+            ("endpoint", "method"), buckets)
+        self.requests = Metric(
+            "manual_requests_total", "counter", "Requests handled, per endpoint and status code.",
+            ("endpoint", "method", "status"))
+        self.backend_call_seconds = Metric(
+            "manual_backend_call_duration_seconds", "histogram", "Time of one database call, per operation.",
+            ("backend", "operation"), buckets)
+        self.request_backend_seconds = Metric(
+            "manual_request_backend_seconds_total", "counter", "Time spent in database calls, per endpoint.",
+            ("endpoint", "backend"))
+        self.request_backend_calls = Metric(
+            "manual_request_backend_calls_total", "counter", "Database calls made, per endpoint.",
+            ("endpoint", "backend"))
+        self._metrics = (self.request_seconds, self.requests, self.backend_call_seconds,
+                         self.request_backend_seconds, self.request_backend_calls)
+        self._local = threading.local()
+
+    def start_request(self):
+        """Starts charging database calls of this thread to a new request."""
+        self._local.backends = {}
+
+    def finish_request(self, endpoint, method, status, seconds):
+        """
+        Records a handled request and the database calls charged to it.
+
+        :return: Dict of backend to [seconds, calls] spent by the request
+        """
+        backends = getattr(self._local, "backends", None) or {}
+        self._local.backends = None
+        self.request_seconds.observe(seconds, endpoint, method)
+        self.requests.inc(endpoint, method, str(status))
+        for backend, (backend_seconds, calls) in backends.items():
+            self.request_backend_seconds.inc(endpoint, backend, amount=backend_seconds)
+            self.request_backend_calls.inc(endpoint, backend, amount=calls)
+        return backends
+
+    def observe_call(self, backend, operation, seconds):
+        self.backend_call_seconds.observe(seconds, backend, operation)
+        backends = getattr(self._local, "backends", None)
+        if backends is not None:
+            spent = backends.setdefault(backend, [0.0, 0])
+            spent[0] += seconds
+            spent[1] += 1
+
+    def render(self):
+        """:return: All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def _timed(method, backend, operation, registry):
+    def call(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            registry.observe_call(backend, operation, time.perf_counter() - started)
+    return call
+
+
+class InstrumentedCollection:
+    """
+    A MongoDB collection whose operations are timed. Cursors returned by find() are timed
+    when they are created, not while they are iterated.
+    """
+
+    def __init__(self, collection, registry=None):
+        self._collection = collection
+        self._registry = registry or metrics
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name in MONGO_OPERATIONS:
+            return _timed(attribute, "mongo", name, self._registry)
+        return attribute
+
+
+class InstrumentedCursor:
+    """A MySQL cursor whose statements and fetches are timed."""
+
+    def __init__(self, cursor, registry):
+        self._cursor = cursor
+        self._registry = registry
+
+    def __getattr__(self, name):
+        attribute = getattr(self._cursor, name)
+        if name in MYSQL_CURSOR_OPERATIONS:
+            return _timed(attribute, "mysql", name, self._registry)
+        return attribute
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class InstrumentedConnection:
+    """A MySQL connection whose cursors, commits and rollbacks are timed."""
+
+    def __init__(self, connection, registry=None):
+        self._connection = connection
+        self._registry = registry or metrics
+
+    def __getattr__(self, name):
+        attribute = getattr(self._connection, name)
+        if name in MYSQL_CONNECTION_OPERATIONS:
+            return _timed(attribute, "mysql", name, self._registry)
+        return attribute
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._registry)
+
+
+def instrument_connect(connect, registry=None):
+    """
+    :param connect: Callable opening a raw MySQL connection
+    :return: Callable opening an instrumented connection, timing the connect itself too
+    """
+    registry = registry or metrics
+    timed_connect = _timed(connect, "mysql", "connect", registry)
+    return lambda: InstrumentedConnection(timed_connect(), registry)
@@ -0,0 +1,27 @@
+from services.db_config import quiz_collection
+
+# Quizzes are kept forever for traceability. Set to a number of seconds to let MongoDB
+# expire quiz sessions that many seconds after they were created.
+QUIZ_TTL_SECONDS = None
+
+
+def ensure_indexes(collection=None):
+    """
+    Creates the indexes the quiz filler read and write paths rely on. Runs whenever a process
+    creates its MongoDB client, MongoDB does nothing for indexes that already exist with the
+    same options. Snapshots are looked up by their `_id`, which is always indexed.
+
+    :param collection: The quiz collection, services.db_config.quiz_collection by default
+    """
+    from pymongo import ASCENDING
+
+    if collection is None:
+        collection = quiz_collection
+
+    # Every filler request looks its quiz up by quiz_id, and there must never be two of them.
+    collection.create_index([("quiz_id", ASCENDING)], name="quiz_id_unique", unique=True)
+    # Finds the quizzes answered against a catalog version when auditing a recommendation.
+    collection.create_index([("snapshot_id", ASCENDING)], name="snapshot_id")
+    if QUIZ_TTL_SECONDS:
+        collection.create_index(
+            [("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=QUIZ_TTL_SECONDS)
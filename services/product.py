@@ -1,6 +1,8 @@
 import mysql.connector
 from mysql.connector import Error
-from services.db_config import DB_CONFIG
+from services.db_config import get_db_connection, release_connection, stream_rows
+from services.bulk_status import change_statuses
+from services.catalog_version import record_catalog_change
 
 
 def create_product(name: str, description: str = None):
@@ -10,8 +12,9 @@ def create_product(name: str, description: str = None):
     :param name: Name of the product
     :param description: Description of the product (optional)
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         query = """
@@ -20,14 +23,14 @@ def create_product(name: str, description: str = None):
         """
         cursor.execute(query, (name, description))
 
+        record_catalog_change(connection, 'products')
         connection.commit()
 
         print("Product created successfully.")
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
 
 def publish_product(product_id: int):
@@ -37,8 +40,9 @@ def publish_product(product_id: int):
     :param product_id: The ID of the product to publish
     :raises: Exception if the product is not in 'draft' status
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         select_query = "SELECT status FROM products WHERE id = %s"
@@ -54,6 +58,7 @@ def publish_product(product_id: int):
         if current_status == 'draft':
             update_query = "UPDATE products SET status = 'published' WHERE id = %s"
             cursor.execute(update_query, (product_id,))
+            record_catalog_change(connection, 'products')
             connection.commit()
             print("Product published successfully.")
         else:
@@ -61,8 +66,7 @@ def publish_product(product_id: int):
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
 
 def disable_product(product_id: int):
@@ -72,8 +76,9 @@ def disable_product(product_id: int):
     :param product_id: The ID of the product to disable
     :raises: Exception if the product is not in 'published' status
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         select_query = "SELECT status FROM products WHERE id = %s"
@@ -89,6 +94,7 @@ def disable_product(product_id: int):
         if current_status == 'published':
             update_query = "UPDATE products SET status = 'disabled' WHERE id = %s"
             cursor.execute(update_query, (product_id,))
+            record_catalog_change(connection, 'products')
             connection.commit()
             print("Product disabled successfully.")
         else:
@@ -96,14 +102,34 @@ def disable_product(product_id: int):
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
+
+
+def publish_products(product_ids):
+    """
+    Publishes many products at once, the ones currently 'draft'.
+
+    :param product_ids: The IDs of the products to publish
+    :return: The outcome per product, see change_statuses
+    """
+    return change_statuses('products', product_ids, 'published', ('draft',))
+
+
+def disable_products(product_ids):
+    """
+    Disables many products at once, the ones currently 'published'.
+
+    :param product_ids: The IDs of the products to disable
+    :return: The outcome per product, see change_statuses
+    """
+    return change_statuses('products', product_ids, 'disabled', ('published',))
 
 
 def get_all_products():
     """Fetch all products."""
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor(dictionary=True)
 
         query = "SELECT id, name, description, status FROM products"
@@ -116,15 +142,43 @@ def get_all_products():
         print(f"Error: {e}")
         raise e
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_connection(connection, cursor)
+
+
+def get_products_page(after_id: int = 0, limit: int = 100):
+    """
+    Fetch one page of products, ordered by id.
+
+    :param after_id: Only products with a greater id, the last id of the previous page
+    :param limit: Maximum number of products
+    :return: List of products
+    """
+    connection = get_db_connection()
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True)
+
+        query = "SELECT id, name, description, status FROM products WHERE id > %s ORDER BY id LIMIT %s"
+        cursor.execute(query, (after_id, limit))
+        return cursor.fetchall()
+
+    except Error as e:
+        print(f"Error: {e}")
+        raise e
+    finally:
+        release_connection(connection, cursor)
+
+
+def stream_products(after_id: int = 0):
+    """Yields the products with a greater id than after_id, ordered by id, see stream_rows()."""
+    return stream_rows("SELECT id, name, description, status FROM products WHERE id > %s ORDER BY id", (after_id,))
 
 
 def update_product(product_id, name, description, status):
     """Update product details."""
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
         query = """
         UPDATE products
@@ -132,12 +186,11 @@ def update_product(product_id, name, description, status):
         WHERE id = %s
         """
         cursor.execute(query, (name, description, status, product_id))
+        record_catalog_change(connection, 'products')
         connection.commit()
 
     except Error as e:
         print(f"Error: {e}")
         raise e
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_connection(connection, cursor)
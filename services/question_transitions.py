@@ -1,13 +1,12 @@
-from mysql.connector import connect, Error
-from services.db_config import DB_CONFIG
-
-def get_db_connection():
-    return connect(**DB_CONFIG)
+from mysql.connector import Error
+from services.db_config import get_db_connection, release_connection, stream_rows
+from services.catalog_version import record_catalog_change
 
 
 def get_question_transitions():
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = get_db_connection()
         cursor = connection.cursor(dictionary=True)
         query = "SELECT * FROM question_transitions"
         cursor.execute(query)
@@ -17,14 +16,39 @@ def get_question_transitions():
         print(f"Error fetching question transitions: {e}")
         return []
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_connection(connection, cursor)
+
+
+def get_question_transitions_page(after_id=0, limit=100):
+    """
+    Fetch one page of question transitions, ordered by id.
+
+    :param after_id: Only transitions with a greater id, the last id of the previous page
+    :param limit: Maximum number of transitions
+    """
+    connection = get_db_connection()
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        query = "SELECT * FROM question_transitions WHERE id > %s ORDER BY id LIMIT %s"
+        cursor.execute(query, (after_id, limit))
+        return cursor.fetchall()
+    except Error as e:
+        print(f"Error fetching question transitions: {e}")
+        raise
+    finally:
+        release_connection(connection, cursor)
+
+
+def stream_question_transitions(after_id=0):
+    """Yields the question transitions with a greater id than after_id, ordered by id, see stream_rows()."""
+    return stream_rows("SELECT * FROM question_transitions WHERE id > %s ORDER BY id", (after_id,))
 
 
 def get_question_transition_by_id(transition_id):
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = get_db_connection()
         cursor = connection.cursor(dictionary=True)
         query = "SELECT * FROM question_transitions WHERE id = %s"
         cursor.execute(query, (transition_id,))
@@ -34,22 +58,26 @@ def get_question_transition_by_id(transition_id):
         print(f"Error fetching question transition: {e}")
         return None
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_connection(connection, cursor)
 
 
 def create_question_transition(answer_id, next_question_id=None, product_id=None):
     """
     Inserts a new question transition into the database.
+
+    :raises CatalogValidationError: If the transition would add quiz graph issues, see check_transition_change()
     """
     if not (next_question_id or product_id):
         raise ValueError("Either next_question_id or product_id must be provided.")
     if next_question_id and product_id:
         raise ValueError("Only one of next_question_id or product_id can be provided, not both.")
+    check_transition_change(transition={
+        "answer_id": answer_id, "next_question_id": next_question_id or None, "product_id": product_id or None
+    })
 
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = get_db_connection()
         cursor = connection.cursor()
 
         query = """
@@ -57,6 +85,7 @@ def create_question_transition(answer_id, next_question_id=None, product_id=None
         VALUES (%s, %s, %s)
         """
         cursor.execute(query, (answer_id, next_question_id or None, product_id or None))
+        record_catalog_change(connection, 'question_transitions')
         connection.commit()
 
         return cursor.rowcount
@@ -64,9 +93,7 @@ def create_question_transition(answer_id, next_question_id=None, product_id=None
         print(f"Error: {err}")
         raise
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_connection(connection, cursor)
 
 
 def update_question_transition(transition_id, answer_id, next_question_id=None, product_id=None):
@@ -78,14 +105,19 @@ def update_question_transition(transition_id, answer_id, next_question_id=None,
     :param next_question_id: (Optional) The ID of the next question.
     :param product_id: (Optional) The ID of the product. Only one of next_question_id or product_id should be provided.
     :return: Number of rows affected or None in case of an error.
+    :raises CatalogValidationError: If the change would add quiz graph issues, see check_transition_change()
     """
     if not (next_question_id or product_id):
         raise ValueError("Either next_question_id or product_id must be provided.")
     if next_question_id and product_id:
         raise ValueError("Only one of next_question_id or product_id can be provided, not both.")
+    check_transition_change(transition_id, {
+        "answer_id": answer_id, "next_question_id": next_question_id or None, "product_id": product_id or None
+    })
 
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = get_db_connection()
         cursor = connection.cursor()
 
         query = """
@@ -94,6 +126,7 @@ def update_question_transition(transition_id, answer_id, next_question_id=None,
         WHERE id = %s
         """
         cursor.execute(query, (answer_id, next_question_id or None, product_id or None, transition_id))
+        record_catalog_change(connection, 'question_transitions')
         connection.commit()
 
         return cursor.rowcount
@@ -101,23 +134,29 @@ def update_question_transition(transition_id, answer_id, next_question_id=None,
         print(f"Error updating question transition: {e}")
         return None
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_connection(connection, cursor)
 
 
 def delete_question_transition(transition_id):
+    check_transition_change(transition_id)
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = get_db_connection()
         cursor = connection.cursor()
         query = "DELETE FROM question_transitions WHERE id = %s"
         cursor.execute(query, (transition_id,))
+        record_catalog_change(connection, 'question_transitions')
         connection.commit()
         return cursor.rowcount
     except Error as e:
         print(f"Error deleting question transition: {e}")
         return None
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_connection(connection, cursor)
+
+
+def check_transition_change(transition_id=None, transition=None):
+    """Checks a transition write against the quiz graph, see services.catalog.check_transition_change()."""
+    # services.catalog reads the transitions through this module, so it is imported on use.
+    from services.catalog import check_transition_change
+    check_transition_change(transition_id, transition)
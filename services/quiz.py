@@ -1,13 +1,16 @@
 import mysql.connector
 from mysql.connector import Error
 from typing import List, Dict
-from services.db_config import DB_CONFIG
+from services.db_config import get_db_connection, release_connection, stream_rows
+from services.bulk_status import change_statuses
+from services.catalog_version import record_catalog_change
 
 
 def get_all_questions():
     """Fetch all questions along with their answers."""
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor(dictionary=True)
 
         query = """
@@ -43,9 +46,77 @@ def get_all_questions():
         print(f"Error: {e}")
         raise e
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_connection(connection, cursor)
+
+def _group_answers(rows):
+    """Folds question and answer rows of a join ordered by question id into questions with their answers."""
+    question = None
+    for row in rows:
+        if question is None or question['id'] != row['question_id']:
+            if question is not None:
+                yield question
+            question = {
+                'id': row['question_id'],
+                'text': row['question_text'],
+                'status': row['question_status'],
+                'answers': []
+            }
+        if row['answer_id']:
+            question['answers'].append({
+                'id': row['answer_id'],
+                'text': row['answer_text'],
+                'status': row['answer_status']
+            })
+    if question is not None:
+        yield question
+
+
+def get_questions_page(after_id: int = 0, limit: int = 100):
+    """
+    Fetch one page of questions along with their answers, ordered by id.
+
+    :param after_id: Only questions with a greater id, the last id of the previous page
+    :param limit: Maximum number of questions
+    :return: List of questions
+    """
+    connection = get_db_connection()
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True)
+
+        query = """
+        SELECT q.id AS question_id, q.text AS question_text, q.status AS question_status,
+               a.id AS answer_id, a.text AS answer_text, a.status AS answer_status
+        FROM (SELECT id, text, status FROM questions WHERE id > %s ORDER BY id LIMIT %s) q
+        LEFT JOIN answers a ON q.id = a.question_id
+        ORDER BY q.id, a.id
+        """
+
+        cursor.execute(query, (after_id, limit))
+        return list(_group_answers(cursor.fetchall()))
+
+    except Error as e:
+        print(f"Error: {e}")
+        raise e
+    finally:
+        release_connection(connection, cursor)
+
+
+def stream_questions(after_id: int = 0):
+    """
+    Yields the questions with a greater id than after_id along with their answers, ordered by id.
+    Rows are read in batches from an unbuffered cursor, see stream_rows().
+    """
+    query = """
+    SELECT q.id AS question_id, q.text AS question_text, q.status AS question_status,
+           a.id AS answer_id, a.text AS answer_text, a.status AS answer_status
+    FROM questions q
+    LEFT JOIN answers a ON q.id = a.question_id
+    WHERE q.id > %s
+    ORDER BY q.id, a.id
+    """
+    yield from _group_answers(stream_rows(query, (after_id,)))
+
 
 def create_question(text: str):
     """
@@ -53,20 +124,21 @@ def create_question(text: str):
 
     :param text: Text of the question
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         query = "INSERT INTO questions (text, status) VALUES (%s, 'draft')"
         cursor.execute(query, (text,))
 
+        record_catalog_change(connection, 'questions')
         connection.commit()
         print("Question created successfully.")
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
 
 def publish_question(question_id: int):
@@ -75,8 +147,9 @@ def publish_question(question_id: int):
 
     :param question_id: The ID of the question to publish
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         select_query = "SELECT status FROM questions WHERE id = %s"
@@ -90,6 +163,7 @@ def publish_question(question_id: int):
         current_status = result[0]
         update_query = "UPDATE questions SET status = 'published' WHERE id = %s"
         cursor.execute(update_query, (question_id,))
+        record_catalog_change(connection, 'questions')
         connection.commit()
         print("Question published successfully.")
         # if current_status == 'draft':
@@ -102,8 +176,7 @@ def publish_question(question_id: int):
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
 
 def disable_question(question_id: int):
@@ -112,8 +185,9 @@ def disable_question(question_id: int):
 
     :param question_id: The ID of the question to disable
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         select_query = "SELECT status FROM questions WHERE id = %s"
@@ -129,6 +203,7 @@ def disable_question(question_id: int):
         if current_status == 'published':
             update_query = "UPDATE questions SET status = 'disabled' WHERE id = %s"
             cursor.execute(update_query, (question_id,))
+            record_catalog_change(connection, 'questions')
             connection.commit()
             print("Question disabled successfully.")
         else:
@@ -136,8 +211,7 @@ def disable_question(question_id: int):
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
 
 def create_answer(text: str, question_id: int):
@@ -147,20 +221,21 @@ def create_answer(text: str, question_id: int):
     :param text: Text of the answer
     :param question_id: The ID of the question to which the answer belongs
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         query = "INSERT INTO answers (text, question_id, status) VALUES (%s, %s, 'draft')"
         cursor.execute(query, (text, question_id))
 
+        record_catalog_change(connection, 'answers')
         connection.commit()
         print("Answer created successfully.")
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
 
 def publish_answer(answer_id: int):
@@ -169,8 +244,9 @@ def publish_answer(answer_id: int):
 
     :param answer_id: The ID of the answer to publish
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         select_query = "SELECT status FROM answers WHERE id = %s"
@@ -186,6 +262,7 @@ def publish_answer(answer_id: int):
         if current_status == 'draft':
             update_query = "UPDATE answers SET status = 'published' WHERE id = %s"
             cursor.execute(update_query, (answer_id,))
+            record_catalog_change(connection, 'answers')
             connection.commit()
             print("Answer published successfully.")
         else:
@@ -193,8 +270,7 @@ def publish_answer(answer_id: int):
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
 
 def disable_answer(answer_id: int):
@@ -203,8 +279,9 @@ def disable_answer(answer_id: int):
 
     :param answer_id: The ID of the answer to disable
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         select_query = "SELECT status FROM answers WHERE id = %s"
@@ -220,6 +297,7 @@ def disable_answer(answer_id: int):
         if current_status == 'published':
             update_query = "UPDATE answers SET status = 'disabled' WHERE id = %s"
             cursor.execute(update_query, (answer_id,))
+            record_catalog_change(connection, 'answers')
             connection.commit()
             print("Answer disabled successfully.")
         else:
@@ -227,8 +305,48 @@ def disable_answer(answer_id: int):
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
+
+
+def publish_questions(question_ids: List[int]):
+    """
+    Publishes many questions at once. Like publish_question, from any status.
+
+    :param question_ids: The IDs of the questions to publish
+    :return: The outcome per question, see change_statuses
+    """
+    return change_statuses('questions', question_ids, 'published', ('draft', 'disabled'))
+
+
+def disable_questions(question_ids: List[int]):
+    """
+    Disables many questions at once, the ones currently 'published'.
+
+    :param question_ids: The IDs of the questions to disable
+    :return: The outcome per question, see change_statuses
+    """
+    return change_statuses('questions', question_ids, 'disabled', ('published',))
+
+
+def publish_answers(answer_ids: List[int]):
+    """
+    Publishes many answers at once, the ones currently 'draft'.
+
+    :param answer_ids: The IDs of the answers to publish
+    :return: The outcome per answer, see change_statuses
+    """
+    return change_statuses('answers', answer_ids, 'published', ('draft',))
+
+
+def disable_answers(answer_ids: List[int]):
+    """
+    Disables many answers at once, the ones currently 'published'.
+
+    :param answer_ids: The IDs of the answers to disable
+    :return: The outcome per answer, see change_statuses
+    """
+    return change_statuses('answers', answer_ids, 'disabled', ('published',))
+
 
 def create_restriction(answer_id: int, product_id: int):
     """
@@ -237,20 +355,21 @@ def create_restriction(answer_id: int, product_id: int):
     :param answer_id: The ID of the answer
     :param product_id: The ID of the product
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         query = "INSERT INTO product_restrictions (product_id, answer_id) VALUES (%s, %s)"
         cursor.execute(query, (product_id, answer_id))
 
+        record_catalog_change(connection, 'product_restrictions')
         connection.commit()
         print("Product restriction created successfully.")
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
 
 def remove_restriction_by_id(product_restriction_id: int):
@@ -259,20 +378,21 @@ def remove_restriction_by_id(product_restriction_id: int):
 
     :param product_restriction_id: The ID of the product restriction to remove
     """
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
 
         delete_query = "DELETE FROM product_restrictions WHERE id = %s"
         cursor.execute(delete_query, (product_restriction_id,))
 
+        record_catalog_change(connection, 'product_restrictions')
         connection.commit()
         print(f"Product restriction with ID {product_restriction_id} removed successfully.")
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
 
 def get_product_restrictions(answer_id: int) -> List[Dict[str, any]]:
@@ -283,8 +403,9 @@ def get_product_restrictions(answer_id: int) -> List[Dict[str, any]]:
     :return: A list of dictionaries with product restrictions
     """
     restrictions = []
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor(dictionary=True)
 
         query = "SELECT * FROM product_restrictions WHERE answer_id = %s"
@@ -294,8 +415,7 @@ def get_product_restrictions(answer_id: int) -> List[Dict[str, any]]:
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
     return restrictions
 
@@ -306,8 +426,9 @@ def get_all_product_restrictions() -> List[Dict[str, any]]:
     :return: A list of dictionaries with all product restrictions.
     """
     restrictions = []
+    connection = get_db_connection()
+    cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor(dictionary=True)
 
         # Fetch all product restrictions
@@ -318,7 +439,6 @@ def get_all_product_restrictions() -> List[Dict[str, any]]:
     except mysql.connector.Error as err:
         print(f"Error: {err}")
     finally:
-        cursor.close()
-        connection.close()
+        release_connection(connection, cursor)
 
     return restrictions
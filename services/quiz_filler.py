@@ -1,94 +1,146 @@
-from domain.quiz_filler import QuizFiller
-from services.product import get_all_products
-from services.quiz import get_all_questions, get_all_product_restrictions
-from services.question_transitions import get_question_transitions
+from datetime import datetime, timezone
+from domain.quiz_filler import QuizFiller, QuizConflictError
+from domain.quiz_json import QuizResult
+from services.catalog import get_current_quiz_snapshot
 from services.db_config import quiz_collection
+from services.quiz_snapshot import get_quiz_snapshot
+
+# Fields each read path needs. quiz_snapshot is only present on quizzes created
+# before snapshots were deduplicated.
+CURRENT_QUESTION_PROJECTION = {"_id": 0, "snapshot_id": 1, "quiz_snapshot": 1, "progress": 1}
+ANSWER_PROJECTION = {
+    "_id": 0, "snapshot_id": 1, "quiz_snapshot": 1,
+    "progress.answers_given": 1, "progress.current_question_id": 1, "progress.version": 1
+}
+RESET_PROJECTION = {
+    "_id": 0, "snapshot_id": 1, "quiz_snapshot": 1,
+    "progress.answers_given": 1, "progress.version": 1
+}
+
+# How often a change is reapplied on a freshly loaded quiz when a concurrent request saved first.
+MAX_SAVE_ATTEMPTS = 3
+
+
+def initial_progress(quiz_snapshot):
+    """The progress of a quiz nobody answered yet."""
+    return {
+        "answers_given": [],
+        "current_question_id": quiz_snapshot.first_question_id,
+        "recommended_products": [],
+        "version": 0
+    }
+
+
+def new_quiz_document(quiz_id, quiz_snapshot, progress):
+    """The fields a new quiz is inserted with."""
+    return {
+        "quiz_id": quiz_id,
+        "snapshot_id": quiz_snapshot.snapshot_id,
+        "created_at": datetime.now(timezone.utc),
+        "progress": progress
+    }
 
 
 def init_quiz(quiz_id):
     """
-    Initializes a new quiz by fetching data from MySQL and
-    inserting the initialized quiz data along with the initial progress into MongoDB.
+    Initializes a new quiz from the cached catalog, which is only read from MySQL again after
+    an admin change, and inserts the initial progress into MongoDB.
+    The catalog itself is stored once per content hash and the quiz only references it.
+
+    :return: A QuizFiller for the new quiz, built from the data just written
     """
     try:
-        questions = get_all_questions()
-        products = get_all_products()
-        product_restrictions = get_all_product_restrictions()
-        question_transitions = get_question_transitions()
-
-        quiz_data = {
-            "quiz_id": quiz_id,
-            "quiz_snapshot": {
-                "questions": questions,
-                "products": products,
-                "product_restrictions": product_restrictions,
-                "question_transitions": question_transitions
-            },
-            "progress": {
-                "answers_given": [],
-                "current_question_id": next((q["id"] for q in questions if q["status"] == "published"), None),
-                "recommended_products": []
-            }
-        }
-
-        quiz_collection.update_one(
+        quiz_snapshot = get_current_quiz_snapshot()
+        progress = initial_progress(quiz_snapshot)
+
+        result = quiz_collection.update_one(
             {"quiz_id": quiz_id},
-            {"$set": quiz_data},
+            {"$setOnInsert": new_quiz_document(quiz_id, quiz_snapshot, progress)},
             upsert=True
         )
 
+        if result.upserted_id is None:
+            # A concurrent request created the quiz first, continue with its progress.
+            return get_quiz(quiz_id)
+
         print(f"Quiz initialized {quiz_id} and stored in MongoDB.")
+        return QuizFiller(quiz_id, quiz_snapshot, progress)
     except Exception as e:
         print(f"Error initializing quiz for quiz {quiz_id}: {e}")
         raise e
 
-def get_quiz(quiz_id, force_create=False):
+
+def get_quiz(quiz_id, force_create=False, projection=CURRENT_QUESTION_PROJECTION):
     """
     Retrieves the quiz from MongoDB.
     If force_create is True, it initializes a new quiz if none exists.
 
     :param quiz_id: The ID of the quiz to retrieve the quiz for
     :param force_create: If True, create a new quiz if no quiz exists for the id
+    :param projection: The quiz document fields the caller needs
     :return: A QuizFiller object if a quiz is found or created
     """
-    quiz_data = quiz_collection.find_one({"quiz_id": quiz_id})
+    quiz_data = quiz_collection.find_one({"quiz_id": quiz_id}, projection)
 
     if quiz_data:
+        # Quizzes created before snapshots were deduplicated embed their own copy.
+        if 'snapshot_id' in quiz_data:
+            quiz_snapshot = get_quiz_snapshot(quiz_data['snapshot_id'])
+        else:
+            quiz_snapshot = quiz_data['quiz_snapshot']
+
         return QuizFiller(
             quiz_id,
-            quiz_data['quiz_snapshot'],
+            quiz_snapshot,
             quiz_data.get('progress', {})
         )
     elif force_create:
-        init_quiz(quiz_id)
-        return get_quiz(quiz_id)
+        return init_quiz(quiz_id)
     else:
         raise ValueError(f"No quiz found for id {quiz_id}")
 
 
 def get_quiz_current_question(quiz_id):
-    quiz_filler = get_quiz(quiz_id, force_create=True)
+    return current_question_result(get_quiz(quiz_id, force_create=True))
+
 
+def current_question_result(quiz_filler):
     # Check if there are recommended products stored in progress
     if 'recommended_products' in quiz_filler.progress and quiz_filler.progress['recommended_products']:
-        return {
+        return QuizResult(quiz_filler.snapshot, {
             "recommended_products": quiz_filler.progress['recommended_products'],
             "answers_given": quiz_filler.progress['answers_given']  # Include previous answers
-        }
+        })
 
     # Otherwise, get the current question and also return previous answers
     current_question = quiz_filler.get_current_question()
-    quiz_filler.save_progress()  # Save the progress back to MongoDB
 
-    return {
+    return QuizResult(quiz_filler.snapshot, {
         "current_question": current_question,
         "answers_given": quiz_filler.progress['answers_given']  # Include previous answers
-    }
+    })
 
 
-def answer_current_question(quiz_id, answer_id):
-    quiz_filler = get_quiz(quiz_id)
+def _update_quiz(quiz_id, projection, change):
+    """
+    Loads the quiz, applies the change and saves the progress with a compare-and-set on its version.
+    If another request saved in between, the quiz is reloaded and the change applied again, so
+    concurrent requests never interleave their writes and no per-quiz lock is needed.
+
+    :param change: Callable applying the change to a QuizFiller and returning its result
+    :return: The saved QuizFiller and the result of the change
+    :raises QuizConflictError: If the quiz could not be saved within MAX_SAVE_ATTEMPTS
+    """
+    for _ in range(MAX_SAVE_ATTEMPTS):
+        quiz_filler = get_quiz(quiz_id, projection=projection)
+        result = change(quiz_filler)
+        if quiz_filler.save_progress():
+            return quiz_filler, result
+    raise QuizConflictError(f"Quiz {quiz_id} is being changed concurrently, please retry.")
 
+
+def apply_answer(quiz_filler, answer_id):
+    """Answers the current question of the quiz, see QuizFiller.answer()."""
     current_question = quiz_filler.get_current_question()
 
     if current_question is None:
@@ -97,52 +149,101 @@ def answer_current_question(quiz_id, answer_id):
     if any(answer['question_id'] == current_question['id'] for answer in quiz_filler.progress['answers_given']):
         raise ValueError("This question has already been answered.")
 
-    result = quiz_filler.answer(answer_id, current_question)
+    return quiz_filler.answer(answer_id, current_question)
+
 
-    quiz_filler.save_progress()
+def apply_answers(quiz_filler, answer_ids):
+    """
+    Answers consecutive questions of the quiz in memory, in the given order.
+    Stops at the first rejected answer, at a recommendation or at the end of the quiz.
 
+    :return: The number of accepted answers, the result of the last accepted answer
+             (the current question if none was accepted) and the rejection message, if any
+    """
+    accepted, result, error = 0, quiz_filler.get_current_question(), None
+    for answer_id in answer_ids:
+        try:
+            result = apply_answer(quiz_filler, answer_id)
+        except ValueError as e:
+            error = str(e)
+            break
+        accepted += 1
+        if result is None or "recommended_products" in result:
+            break
+    return accepted, result, error
+
+
+def answers_result(quiz_filler, accepted, result, error):
+    response = {
+        "answers_accepted": accepted,
+        "answers_given": quiz_filler.progress['answers_given']
+    }
+    if result is None:
+        response["message"] = "No more questions"
+    elif "recommended_products" in result:
+        response["recommended_products"] = result["recommended_products"]
+    else:
+        response["next_question"] = result
+    if error:
+        response["error"] = error
+    return QuizResult(quiz_filler.snapshot, response)
+
+
+def answer_result(quiz_filler, result):
     # If result contains recommended products, return them at the top level
     if "recommended_products" in result:
-        return {
+        return QuizResult(quiz_filler.snapshot, {
             "recommended_products": result["recommended_products"],
             "answers_given": quiz_filler.progress['answers_given']
-        }
+        })
 
     # Otherwise, return the next question
-    return {
+    return QuizResult(quiz_filler.snapshot, {
         "next_question": result,
         "answers_given": quiz_filler.progress['answers_given']
-    }
+    })
 
-def reset_to_previous_question(quiz_id, question_id):
-    quiz_filler = get_quiz(quiz_id)  # Load the quiz for the given ID
 
-    # Step 1: Check if the question exists in the answers_given list
-    answers_given = quiz_filler.progress['answers_given']
-    question_index = None
+def reset_result(quiz_filler):
+    # Return the response similar to get_quiz_current_question
+    current_question = quiz_filler.get_current_question()
 
-    for index, answer in enumerate(answers_given):
-        if answer['question_id'] == question_id:
-            question_index = index
-            break
+    return QuizResult(quiz_filler.snapshot, {
+        "current_question": current_question,
+        "answers_given": quiz_filler.progress['answers_given']  # Return updated answers_given list
+    })
 
-    if question_index is None:
-        raise ValueError(f"Question with ID {question_id} has not been answered yet.")
 
-    # Step 2: Remove the specified question and all following answers
-    quiz_filler.progress['answers_given'] = answers_given[:question_index]
+def answer_current_question(quiz_id, answer_id):
+    quiz_filler, result = _update_quiz(
+        quiz_id,
+        ANSWER_PROJECTION,
+        lambda quiz_filler: apply_answer(quiz_filler, answer_id)
+    )
+    return answer_result(quiz_filler, result)
 
-    # Step 3: Set the specified question as the current question
-    quiz_filler.progress['current_question_id'] = question_id
 
-    # Step 4: Save the updated progress
-    quiz_filler.save_progress()
+def answer_questions(quiz_id, answer_ids):
+    """
+    Answers several questions at once, see apply_answers(). The accepted answers are
+    saved with a single write after a single read, however many there are.
 
-    # Step 5: Return the response similar to get_quiz_current_question
-    current_question = quiz_filler.get_current_question()
+    :param answer_ids: The answer ids, in the order of the questions they answer
+    """
+    quiz_filler, (accepted, result, error) = _update_quiz(
+        quiz_id,
+        ANSWER_PROJECTION,
+        lambda quiz_filler: apply_answers(quiz_filler, answer_ids)
+    )
+    return answers_result(quiz_filler, accepted, result, error)
 
-    return {
-        "current_question": current_question,
-        "answers_given": quiz_filler.progress['answers_given']  # Return updated answers_given list
-    }
 
+def reset_to_previous_question(quiz_id, question_id):
+    # Remove the specified question and all following answers and make it the current question.
+    # Only the truncation and the new current question are saved.
+    quiz_filler, _ = _update_quiz(
+        quiz_id,
+        RESET_PROJECTION,
+        lambda quiz_filler: quiz_filler.reset_to_question(question_id)
+    )
+    return reset_result(quiz_filler)
@@ -0,0 +1,107 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from domain.quiz_snapshot import QuizSnapshot
+from services.cache import LRUCache
+from services.db_config import snapshot_collection
+
+SNAPSHOT_FIELDS = ("questions", "products", "product_restrictions", "question_transitions")
+
+SNAPSHOT_CACHE_CONFIG = {
+    # Number of decoded snapshots kept per process.
+    'max_entries': 64,
+    # Upper bound on the summed JSON size of cached snapshots.
+    'max_bytes': 256 * 1024 * 1024,
+}
+
+snapshot_cache = LRUCache(**SNAPSHOT_CACHE_CONFIG)
+
+
+def _canonical(quiz_snapshot):
+    """
+    Returns a copy of the snapshot with every list ordered by id, so that the same
+    catalog hashes to the same id regardless of the row order MySQL returned.
+    """
+    canonical = {field: sorted(quiz_snapshot[field], key=lambda row: row['id']) for field in SNAPSHOT_FIELDS}
+    canonical['questions'] = [
+        dict(question, answers=sorted(question.get('answers', []), key=lambda answer: answer['id']))
+        for question in canonical['questions']
+    ]
+    return canonical
+
+
+def compute_snapshot_id(quiz_snapshot):
+    """
+    Content hash of a quiz catalog snapshot.
+
+    :param quiz_snapshot: Dict with questions, products, product_restrictions and question_transitions
+    :return: Hex encoded sha256 of the canonical JSON form of the snapshot
+    """
+    payload = json.dumps(_canonical(quiz_snapshot), sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def save_snapshot(quiz_snapshot, snapshot_id=None):
+    """
+    Stores the snapshot once in the snapshots collection, keyed by its content hash.
+    Snapshots are immutable and never removed, so every quiz keeps pointing at the
+    exact catalog version it was answered against.
+
+    :param snapshot_id: The already computed content hash of the snapshot, if known
+    :return: The snapshot id
+    """
+    snapshot_id = snapshot_id or compute_snapshot_id(quiz_snapshot)
+    snapshot_collection.update_one(
+        {"_id": snapshot_id},
+        {"$setOnInsert": {
+            **{field: quiz_snapshot[field] for field in SNAPSHOT_FIELDS},
+            "created_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
+    return snapshot_id
+
+
+def get_snapshot(snapshot_id):
+    """
+    Loads a stored snapshot by id.
+
+    :raises ValueError: If no snapshot with this id exists
+    """
+    snapshot = snapshot_collection.find_one({"_id": snapshot_id}, {"_id": 0, "created_at": 0})
+    if snapshot is None:
+        raise ValueError(f"No quiz snapshot found for id {snapshot_id}")
+    return snapshot
+
+
+def cache_quiz_snapshot(snapshot_id, snapshot):
+    quiz_snapshot = QuizSnapshot(snapshot, snapshot_id)
+    snapshot_cache.put(snapshot_id, quiz_snapshot, len(json.dumps(snapshot, default=str)))
+    return quiz_snapshot
+
+
+def get_quiz_snapshot(snapshot_id):
+    """
+    Returns the decoded QuizSnapshot for an id, loading it from MongoDB only on a cache miss.
+    Snapshots are immutable, so cached entries never need invalidation.
+    """
+    quiz_snapshot = snapshot_cache.get(snapshot_id)
+    if quiz_snapshot is None:
+        quiz_snapshot = cache_quiz_snapshot(snapshot_id, get_snapshot(snapshot_id))
+    return quiz_snapshot
+
+
+def store_quiz_snapshot(snapshot):
+    """
+    Makes sure the snapshot is stored and returns it decoded. A snapshot found in the cache
+    has already been stored by this process, so it is not written again.
+
+    :param snapshot: Dict with questions, products, product_restrictions and question_transitions
+    :return: The QuizSnapshot
+    """
+    snapshot_id = compute_snapshot_id(snapshot)
+    quiz_snapshot = snapshot_cache.get(snapshot_id)
+    if quiz_snapshot is None:
+        save_snapshot(snapshot, snapshot_id)
+        quiz_snapshot = cache_quiz_snapshot(snapshot_id, snapshot)
+    return quiz_snapshot
@@ -0,0 +1,113 @@
+"""
+Counting of database round trips, for tests that hold the hot paths to a budget.
+
+    with count_round_trips() as round_trips:
+        answer_current_question(5, 1)
+    self.assertLessEqual(round_trips.mongo, 2)
+
+Or from a TestCase using RoundTripBudgetMixin:
+
+    with self.assertRoundTrips(mongo=2, mysql_connects=0, mysql_queries=0):
+        answer_current_question(5, 1)
+
+The collections and the connection pool in use are wrapped, whether they are stand-ins or mocks,
+with the same wrappers services/metrics.py times production calls with.
+"""
+import contextlib
+import importlib
+import threading
+from collections import Counter
+from unittest.mock import patch
+
+import services.db_config as db_config
+from services.metrics import InstrumentedCollection, InstrumentedConnection
+
+# Module attributes holding MongoDB collections the services use.
+COLLECTION_TARGETS = (
+    'services.quiz_filler.quiz_collection',
+    'domain.quiz_filler.quiz_collection',
+    'services.quiz_snapshot.snapshot_collection',
+)
+
+MYSQL_QUERY_OPERATIONS = ("execute", "executemany", "callproc")
+
+
+class RoundTrips:
+    """Database calls counted by (backend, operation)."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def observe_call(self, backend, operation, seconds):
+        with self._lock:
+            self.calls[backend, operation] += 1
+
+    @property
+    def mongo(self):
+        """MongoDB operations, every one is a round trip."""
+        return sum(count for (backend, _), count in self.calls.items() if backend == "mongo")
+
+    @property
+    def mysql_connects(self):
+        """MySQL connections borrowed from the pool."""
+        return self.calls["mysql", "connect"]
+
+    @property
+    def mysql_queries(self):
+        """MySQL statements executed."""
+        return sum(self.calls["mysql", operation] for operation in MYSQL_QUERY_OPERATIONS)
+
+    def as_dict(self):
+        return {"mongo": self.mongo, "mysql_connects": self.mysql_connects, "mysql_queries": self.mysql_queries}
+
+
+class _CountingPool:
+
+    def __init__(self, pool, round_trips):
+        self._pool = pool
+        self._round_trips = round_trips
+
+    def get_connection(self):
+        self._round_trips.observe_call("mysql", "connect", 0.0)
+        return InstrumentedConnection(self._pool.get_connection(), self._round_trips)
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+@contextlib.contextmanager
+def count_round_trips(collection_targets=COLLECTION_TARGETS):
+    """Counts the database calls made inside the block, see RoundTrips."""
+    round_trips = RoundTrips()
+    patchers = [patch('services.db_config._pool', _CountingPool(db_config.get_pool(), round_trips))]
+    for target in collection_targets:
+        module_name, attribute = target.rsplit('.', 1)
+        collection = getattr(importlib.import_module(module_name), attribute)
+        patchers.append(patch(target, InstrumentedCollection(collection, round_trips)))
+    for patcher in patchers:
+        patcher.start()
+    try:
+        yield round_trips
+    finally:
+        for patcher in reversed(patchers):
+            patcher.stop()
+
+
+class RoundTripBudgetMixin:
+    """Adds assertRoundTrips() to a unittest.TestCase."""
+
+    @contextlib.contextmanager
+    def assertRoundTrips(self, **budget):
+        """
+        Fails if the block makes more database round trips than the budget.
+
+        :param budget: Maximum per counter of RoundTrips.as_dict(): mongo, mysql_connects, mysql_queries.
+                       Counters left out are not checked.
+        """
+        with count_round_trips() as round_trips:
+            yield round_trips
+        counted = round_trips.as_dict()
+        over = {name: counted[name] for name, limit in budget.items() if counted[name] > limit}
+        if over:
+            self.fail(f"Round trips over budget {budget}: {over}, calls: {dict(round_trips.calls)}")
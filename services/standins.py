@@ -0,0 +1,330 @@
+"""
+Local stand-ins for the databases, for tests and benchmarks on a machine without MySQL or MongoDB.
+
+SqliteDatabase speaks enough of the mysql.connector connection and cursor API for the
+queries in services/*, backed by a SQLite file with the same tables as ddl/initial.ddl.
+
+MemoryCollection and AsyncMemoryCollection speak enough of the pymongo and motor collection API
+for the quiz filler, optionally adding a fixed latency per call to model the network round trip.
+"""
+import asyncio
+import copy
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+SQLITE_SCHEMA = """
+CREATE TABLE questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text VARCHAR(1000) NOT NULL,
+    status TEXT CHECK (status IN ('draft', 'published', 'disabled')) DEFAULT 'draft'
+);
+
+CREATE TABLE answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id INT NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    text VARCHAR(1000) NOT NULL,
+    status TEXT CHECK (status IN ('draft', 'published', 'disabled')) DEFAULT 'draft'
+);
+
+CREATE TABLE products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL,
+    description VARCHAR(1000),
+    status TEXT CHECK (status IN ('draft', 'published', 'disabled')) DEFAULT 'draft'
+);
+
+CREATE TABLE question_transitions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    answer_id INT NOT NULL REFERENCES answers(id) ON DELETE CASCADE,
+    next_question_id INT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    product_id INT NULL REFERENCES products(id) ON DELETE CASCADE
+);
+
+CREATE TABLE product_restrictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INT NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    answer_id INT NOT NULL REFERENCES answers(id) ON DELETE CASCADE
+);
+
+CREATE TABLE catalog_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO catalog_versions (table_name) VALUES
+    ('questions'), ('answers'), ('products'), ('product_restrictions'), ('question_transitions');
+"""
+
+# MySQL only syntax the services use that SQLite does not understand.
+_MYSQL_ONLY = re.compile(r"\s+FOR UPDATE\b", re.IGNORECASE)
+
+# MySQL system variables the services read, as a server allocating consecutive AUTO_INCREMENT ids
+# for a multi-row INSERT, which SQLite does within its single writer.
+_SYSTEM_VARIABLES = {"innodb_autoinc_lock_mode": 1, "auto_increment_increment": 1}
+_SYSTEM_VARIABLE = re.compile(r"@@(\w+)")
+
+
+def _sqlite_query(query):
+    query = _SYSTEM_VARIABLE.sub(lambda match: str(_SYSTEM_VARIABLES[match.group(1)]), query)
+    return _MYSQL_ONLY.sub("", query).replace("%s", "?")
+
+
+class SqliteCursor:
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection._sqlite.cursor()
+        self._dictionary = dictionary
+        # Set by an INSERT through executemany(), which SQLite reports no lastrowid for
+        self._first_row_id = None
+
+    def execute(self, query, params=()):
+        self._connection.queries += 1
+        self._first_row_id = None
+        self._cursor.execute(_sqlite_query(query), tuple(params or ()))
+
+    def executemany(self, query, seq_of_params):
+        self._connection.queries += 1
+        self._first_row_id = None
+        self._cursor.executemany(_sqlite_query(query), [tuple(p) for p in seq_of_params])
+        if query.lstrip().upper().startswith("INSERT") and self._cursor.rowcount > 0:
+            # Like the multi-row INSERT MySQL Connector sends, lastrowid is the id of the first row.
+            (last_row_id,) = self._connection._sqlite.execute("SELECT last_insert_rowid()").fetchone()
+            self._first_row_id = last_row_id - self._cursor.rowcount + 1
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip((column[0] for column in self._cursor.description), row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return (self._row(row) for row in self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid if self._first_row_id is None else self._first_row_id
+
+    def close(self):
+        self._cursor.close()
+
+
+class SqliteConnection:
+
+    def __init__(self, path):
+        self._sqlite = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._sqlite.execute("PRAGMA foreign_keys = ON")
+        self.queries = 0
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SqliteCursor(self, dictionary=dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._sqlite.in_transaction
+
+    def start_transaction(self):
+        self._sqlite.execute("BEGIN")
+
+    def commit(self):
+        self._sqlite.commit()
+
+    def rollback(self):
+        self._sqlite.rollback()
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self._sqlite.close()
+
+
+class SqliteDatabase:
+    """
+    A throwaway SQLite database with the quiz schema.
+
+    :param path: Database file, a temporary file is created and removed on close() if omitted
+    """
+
+    def __init__(self, path=None):
+        self._owns_file = path is None
+        if path is None:
+            handle, path = tempfile.mkstemp(suffix=".sqlite")
+            os.close(handle)
+        self.path = path
+        with sqlite3.connect(path) as connection:
+            connection.executescript(SQLITE_SCHEMA)
+
+    def connect(self):
+        """Opens a new connection, usable as the connect callable of a ConnectionPool."""
+        return SqliteConnection(self.path)
+
+    def close(self):
+        if self._owns_file and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _get_path(document, path):
+    for key in path.split("."):
+        if not isinstance(document, dict) or key not in document:
+            return None
+        document = document[key]
+    return document
+
+
+def _set_path(document, path, value):
+    *parents, key = path.split(".")
+    for parent in parents:
+        document = document.setdefault(parent, {})
+    document[key] = value
+
+
+def _matches(document, query):
+    for path, condition in query.items():
+        value = _get_path(document, path)
+        if isinstance(condition, dict) and "$in" in condition:
+            if value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(document, projection):
+    if not projection:
+        return copy.deepcopy(document)
+    included = [path for path, flag in projection.items() if flag and path != "_id"]
+    if included:
+        projected = {}
+        for path in included:
+            value = _get_path(document, path)
+            if value is not None:
+                _set_path(projected, path, copy.deepcopy(value))
+        if projection.get("_id", 1) and "_id" in document:
+            projected["_id"] = document["_id"]
+        return projected
+    projected = copy.deepcopy(document)
+    for path in projection:
+        projected.pop(path, None)
+    return projected
+
+
+def _apply_update(document, update, inserted):
+    for path, value in update.get("$set", {}).items():
+        _set_path(document, path, copy.deepcopy(value))
+    if inserted:
+        for path, value in update.get("$setOnInsert", {}).items():
+            _set_path(document, path, copy.deepcopy(value))
+    for path, amount in update.get("$inc", {}).items():
+        _set_path(document, path, (_get_path(document, path) or 0) + amount)
+    for path, push in update.get("$push", {}).items():
+        items = _get_path(document, path) or []
+        items = items + copy.deepcopy(push["$each"])
+        if "$slice" in push:
+            items = items[:push["$slice"]]
+        _set_path(document, path, items)
+
+
+class MemoryCollection:
+    """
+    A MongoDB collection held in a dict, with the query and update operators the services use.
+
+    :param latency: Seconds every call sleeps, as a stand-in for the round trip to the server
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.documents = {}
+        self.calls = 0
+        self._next_id = 0
+        # Unique single field indexes, field -> value -> _id
+        self._unique = {}
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _find(self, query):
+        if "_id" in query and not isinstance(query["_id"], dict):
+            document = self.documents.get(query["_id"])
+            return document if document is not None and _matches(document, query) else None
+        for field, index in self._unique.items():
+            if field in query and not isinstance(query[field], dict):
+                document = self.documents.get(index.get(query[field]))
+                return document if document is not None and _matches(document, query) else None
+        return next((document for document in self.documents.values() if _matches(document, query)), None)
+
+    def _find_one(self, query, projection=None):
+        with self._lock:
+            document = self._find(query)
+            return None if document is None else _project(document, projection)
+
+    def _update_one(self, query, update, upsert=False):
+        with self._lock:
+            document = self._find(query)
+            if document is not None:
+                _apply_update(document, update, inserted=False)
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+            if not upsert:
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+            document = {path: value for path, value in query.items() if not isinstance(value, dict)}
+            if "_id" not in document:
+                self._next_id += 1
+                document["_id"] = self._next_id
+            _apply_update(document, update, inserted=True)
+            self.documents[document["_id"]] = document
+            for field, index in self._unique.items():
+                index[_get_path(document, field)] = document["_id"]
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=document["_id"])
+
+    def find_one(self, query, projection=None):
+        self._wait()
+        return self._find_one(query, projection)
+
+    def update_one(self, query, update, upsert=False):
+        self._wait()
+        return self._update_one(query, update, upsert)
+
+    def create_index(self, keys, unique=False, **kwargs):
+        """Only unique single field indexes are kept, for lookups by that field."""
+        if unique and len(keys) == 1:
+            field = keys[0][0]
+            with self._lock:
+                self._unique[field] = {_get_path(document, field): _id for _id, document in self.documents.items()}
+        return kwargs.get("name", "index")
+
+
+class AsyncMemoryCollection(MemoryCollection):
+    """MemoryCollection with the coroutine API of motor, sleeping without blocking the event loop."""
+
+    async def _wait(self):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def find_one(self, query, projection=None):
+        await self._wait()
+        return self._find_one(query, projection)
+
+    async def update_one(self, query, update, upsert=False):
+        await self._wait()
+        return self._update_one(query, update, upsert)
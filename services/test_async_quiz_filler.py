@@ -0,0 +1,105 @@
+import threading
+import unittest
+from unittest.mock import patch
+from domain.quiz_filler import QuizConflictError
+from domain.quiz_snapshot import QuizSnapshot
+from services import async_quiz_filler
+from services.async_quiz_filler import get_quiz_current_question, answer_current_question, reset_to_previous_question
+from services.cache import LRUCache
+from services.standins import AsyncMemoryCollection
+
+
+class TestAsyncQuizFiller(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.quiz_snapshot = QuizSnapshot({
+            "questions": [
+                {"id": 1, "text": "am I old?", "status": "published", "answers": [
+                    {"id": 1, "text": "yes", "status": "published"},
+                    {"id": 2, "text": "no", "status": "published"}
+                ]},
+                {"id": 2, "text": "am I pretty?", "status": "published", "answers": [
+                    {"id": 3, "text": "yes", "status": "published"},
+                    {"id": 4, "text": "no", "status": "published"}
+                ]}
+            ],
+            "products": [{"id": 1, "name": "Product A", "description": "Desc A", "status": "draft"}],
+            "product_restrictions": [],
+            "question_transitions": [
+                {"id": 1, "answer_id": 1, "next_question_id": 2, "product_id": None},
+                {"id": 2, "answer_id": 2, "next_question_id": 2, "product_id": None},
+                {"id": 3, "answer_id": 3, "next_question_id": None, "product_id": 1}
+            ]
+        }, "abc")
+        self.quiz_collection = AsyncMemoryCollection()
+        patches = [
+            patch('services.async_quiz_filler.async_quiz_collection', self.quiz_collection),
+            patch('services.async_quiz_filler.get_current_quiz_snapshot', return_value=self.quiz_snapshot),
+            patch('services.async_quiz_filler.get_quiz_snapshot', side_effect=self.get_quiz_snapshot),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def get_quiz_snapshot(self, snapshot_id):
+        return self.quiz_snapshot
+
+    async def test_quiz_flow(self):
+        result = await get_quiz_current_question(5)
+        self.assertEqual(result["current_question"]["id"], 1)
+
+        result = await answer_current_question(5, 1)
+        self.assertEqual(result["next_question"]["id"], 2)
+
+        result = await answer_current_question(5, 3)
+        self.assertEqual([product["id"] for product in result["recommended_products"]], [1])
+
+        result = await reset_to_previous_question(5, 2)
+        self.assertEqual(result["current_question"]["id"], 2)
+        self.assertEqual(result["answers_given"], [{"question_id": 1, "answer_id": 1}])
+
+        stored = self.quiz_collection._find_one({"quiz_id": 5})
+        self.assertEqual(stored["snapshot_id"], "abc")
+        self.assertEqual(stored["progress"]["answers_given"], [{"question_id": 1, "answer_id": 1}])
+        self.assertEqual(stored["progress"]["version"], 3)
+
+    async def test_invalid_answer(self):
+        await get_quiz_current_question(5)
+
+        with self.assertRaises(ValueError):
+            await answer_current_question(5, 3)
+
+    async def test_answer_gives_up_after_max_attempts(self):
+        await get_quiz_current_question(5)
+
+        # Another request saves right after every read, so the loaded version is always stale.
+        async def bump_version(query, projection=None):
+            quiz_data = self.quiz_collection._find_one(query, projection)
+            self.quiz_collection._update_one({"quiz_id": 5}, {"$inc": {"progress.version": 1}})
+            return quiz_data
+
+        with patch.object(self.quiz_collection, 'find_one', side_effect=bump_version):
+            with self.assertRaises(QuizConflictError):
+                await answer_current_question(5, 1)
+
+
+class TestAsyncSnapshotCacheMiss(unittest.IsolatedAsyncioTestCase):
+
+    async def test_snapshot_is_decoded_off_the_event_loop(self):
+        snapshot = {"questions": [], "products": [], "product_restrictions": [], "question_transitions": []}
+        snapshot_collection = AsyncMemoryCollection()
+        await snapshot_collection.update_one({"_id": "abc"}, {"$setOnInsert": snapshot}, upsert=True)
+        decoded_in = []
+
+        def cache_quiz_snapshot(snapshot_id, snapshot):
+            decoded_in.append(threading.get_ident())
+            return QuizSnapshot(snapshot, snapshot_id)
+
+        with patch('services.async_quiz_filler.async_snapshot_collection', snapshot_collection), \
+                patch('services.async_quiz_filler.snapshot_cache', LRUCache()), \
+                patch('services.async_quiz_filler.cache_quiz_snapshot', side_effect=cache_quiz_snapshot):
+            quiz_snapshot = await async_quiz_filler.get_quiz_snapshot("abc")
+
+        self.assertEqual(quiz_snapshot.snapshot_id, "abc")
+        self.assertEqual(len(decoded_in), 1)
+        self.assertNotEqual(decoded_in[0], threading.get_ident())
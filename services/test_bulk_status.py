@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from mysql.connector import Error
+from services.bulk_status import change_statuses
+from services.catalog_version import CatalogVersions
+from services.db_config import ConnectionPool
+from services.product import publish_products, disable_products
+from services.quiz import publish_questions, publish_answers
+from services.standins import SqliteDatabase
+
+
+class TestBulkStatus(unittest.TestCase):
+
+    def setUp(self):
+        self.database = SqliteDatabase()
+        self.addCleanup(self.database.close)
+        pool_patch = patch('services.db_config._pool', ConnectionPool(self.database.connect, pool_size=2))
+        pool_patch.start()
+        self.addCleanup(pool_patch.stop)
+
+        connection = self.database.connect()
+        connection._sqlite.executescript("""
+            INSERT INTO products (id, name, status) VALUES (1, 'a', 'draft'), (2, 'b', 'published'), (3, 'c', 'disabled');
+            INSERT INTO questions (id, text, status) VALUES (1, 'q1', 'draft'), (2, 'q2', 'disabled');
+            INSERT INTO answers (id, question_id, text, status) VALUES (1, 1, 'yes', 'disabled');
+        """)
+        connection.close()
+
+    def statuses(self, table):
+        connection = self.database.connect()
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT id, status FROM {table} ORDER BY id")
+        statuses = dict(cursor.fetchall())
+        connection.close()
+        return statuses
+
+    def test_publish_products_reports_per_id_outcomes(self):
+        results = publish_products([1, 2, 3, 9, 1])
+
+        self.assertEqual(results, [
+            {"id": 1, "outcome": "updated", "status": "published"},
+            {"id": 2, "outcome": "unchanged", "status": "published"},
+            {"id": 3, "outcome": "rejected", "status": "disabled"},
+            {"id": 9, "outcome": "not_found", "status": None},
+        ])
+        self.assertEqual(self.statuses("products"), {1: "published", 2: "published", 3: "disabled"})
+
+    def test_disable_products(self):
+        results = disable_products([1, 2])
+
+        self.assertEqual([result["outcome"] for result in results], ["rejected", "updated"])
+        self.assertEqual(self.statuses("products"), {1: "draft", 2: "disabled", 3: "disabled"})
+
+    def test_questions_are_published_from_any_status(self):
+        results = publish_questions([1, 2])
+
+        self.assertEqual([result["outcome"] for result in results], ["updated", "updated"])
+        self.assertEqual(self.statuses("questions"), {1: "published", 2: "published"})
+
+    def test_catalog_change_is_recorded_once_and_only_when_something_changed(self):
+        before = CatalogVersions(probe_interval=0).get()
+
+        publish_products([1, 3])
+        publish_answers([1])
+
+        after = CatalogVersions(probe_interval=0).get()
+        self.assertEqual(after["products"], before["products"] + 1)
+        self.assertEqual(after["answers"], before["answers"])
+
+    @patch('services.bulk_status.get_db_connection')
+    def test_cursor_and_connection_are_released_when_the_change_fails(self, mock_get_db_connection):
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_get_db_connection.return_value = mock_connection
+        mock_connection.cursor.return_value = mock_cursor
+        mock_connection.is_connected.return_value = True
+        mock_cursor.execute.side_effect = Error("Lock wait timeout exceeded")
+
+        with self.assertRaises(Error):
+            change_statuses("products", [1], "published", ("draft",))
+
+        mock_connection.rollback.assert_called_once()
+        mock_cursor.close.assert_called_once()
+        mock_connection.close.assert_called_once()
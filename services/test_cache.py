@@ -0,0 +1,54 @@
+import unittest
+from services.cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_hit_and_miss_counters(self):
+        cache = LRUCache(max_entries=2)
+
+        cache.put("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = LRUCache(max_entries=2)
+
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_evicts_by_size(self):
+        cache = LRUCache(max_entries=10, max_bytes=100)
+
+        cache.put("a", 1, size=60)
+        cache.put("b", 2, size=60)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["bytes"], 60)
+
+    def test_oversized_value_is_not_cached(self):
+        cache = LRUCache(max_entries=10, max_bytes=100)
+
+        cache.put("a", 1, size=101)
+
+        self.assertEqual(len(cache), 0)
+
+    def test_replacing_a_key_updates_size(self):
+        cache = LRUCache(max_entries=10, max_bytes=100)
+
+        cache.put("a", 1, size=60)
+        cache.put("a", 2, size=30)
+
+        self.assertEqual(cache.get("a"), 2)
+        self.assertEqual(cache.stats()["bytes"], 30)
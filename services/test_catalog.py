@@ -0,0 +1,152 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from domain.quiz_snapshot import QuizSnapshot
+from services.catalog import (
+    CatalogCache, CatalogValidationError, check_publish, check_transition_change, load_catalog, validate_catalog, get_catalog,
+    get_current_quiz_snapshot
+)
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.questions = [
+            {"id": 1, "text": "am I old?", "status": "published", "answers": [
+                {"id": 1, "text": "yes", "status": "published"},
+                {"id": 2, "text": "no", "status": "published"}
+            ]}
+        ]
+        self.products = [{"id": 1, "name": "Product A", "description": "Desc A", "status": "draft"}]
+        self.transitions = [{"id": 1, "answer_id": 1, "next_question_id": None, "product_id": 1}]
+
+    def patch_loaders(self):
+        # A fresh cache per test, reading its table versions from a mock instead of MySQL.
+        self.versions = MagicMock()
+        self.versions.get.return_value = {"questions": 1, "answers": 1, "products": 1}
+        patches = [
+            patch('services.catalog.catalog_cache', CatalogCache(self.versions)),
+            patch('services.catalog.store_quiz_snapshot', side_effect=lambda catalog: QuizSnapshot(catalog, "abc")),
+            patch('services.catalog.get_all_questions', return_value=self.questions),
+            patch('services.catalog.get_all_products', return_value=self.products),
+            patch('services.catalog.get_all_product_restrictions', return_value=[]),
+            patch('services.catalog.get_question_transitions', return_value=self.transitions),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_load_catalog(self):
+        self.patch_loaders()
+
+        catalog = load_catalog()
+
+        self.assertEqual(catalog["questions"], self.questions)
+        self.assertEqual(catalog["question_transitions"], self.transitions)
+
+    def test_validate_catalog_reports_dead_end(self):
+        self.patch_loaders()
+
+        result = validate_catalog()
+
+        self.assertFalse(result["valid"])
+        self.assertEqual(result["issues"], [
+            {"kind": "dead_end", "entity_id": 2, "message": "Answer 2 has no transition."}
+        ])
+
+    def test_get_catalog_is_cached_until_a_write(self):
+        self.patch_loaders()
+
+        first = get_catalog()
+        with patch('services.catalog.load_catalog') as mock_load_catalog:
+            self.assertIs(get_catalog(), first)
+            self.assertEqual(get_current_quiz_snapshot().snapshot_id, "abc")
+        mock_load_catalog.assert_not_called()
+
+        self.versions.get.return_value = {"questions": 1, "answers": 1, "products": 2}
+
+        self.assertIsNot(get_catalog(), first)
+
+    def test_only_changed_fields_are_reloaded(self):
+        self.patch_loaders()
+        get_catalog()
+
+        self.versions.get.return_value = {"questions": 1, "answers": 2, "products": 1}
+        with patch('services.catalog.load_catalog', wraps=load_catalog) as mock_load_catalog:
+            catalog = get_catalog()
+
+        mock_load_catalog.assert_called_once_with(["questions"])
+        self.assertEqual(catalog["products"], self.products)
+
+    def patch_two_questions(self):
+        # Question 2 comes first in catalog order but is a draft, so question 1 starts the quiz and leads to it.
+        self.questions[:] = [
+            {"id": 2, "text": "am I pretty?", "status": "draft", "answers": [
+                {"id": 3, "text": "yes", "status": "draft"}
+            ]},
+            dict(self.questions[0], answers=self.questions[0]["answers"][:1]),
+        ]
+        self.transitions[:] = [
+            {"id": 1, "answer_id": 1, "next_question_id": 2, "product_id": None},
+            {"id": 2, "answer_id": 3, "next_question_id": None, "product_id": 1},
+        ]
+        self.patch_loaders()
+
+    def test_check_publish_rejects_a_publish_that_strands_a_question(self):
+        self.patch_two_questions()
+
+        with self.assertRaises(CatalogValidationError) as raised:
+            check_publish([2])
+
+        self.assertEqual(raised.exception.issues, [{
+            "kind": "unreachable_question", "entity_id": 1,
+            "message": "Question 1 cannot be reached from the first question."
+        }])
+
+    def test_check_publish_accepts_a_publish_without_new_issues(self):
+        self.patch_two_questions()
+
+        check_publish([1])
+
+    def test_check_publish_ignores_existing_issues(self):
+        self.patch_loaders()
+
+        # Answer 2 is already a dead end.
+        check_publish([1])
+
+    def test_checks_use_the_cached_catalog_after_probing_the_versions(self):
+        self.patch_two_questions()
+        get_catalog()
+
+        with patch('services.catalog.load_catalog') as mock_load_catalog:
+            check_publish([1])
+            check_transition_change(2, {"answer_id": 3, "next_question_id": None, "product_id": 1})
+
+        mock_load_catalog.assert_not_called()
+        self.assertEqual(self.versions.invalidate.call_count, 2)
+
+    def test_check_transition_change_rejects_a_delete_leaving_a_dead_end(self):
+        self.patch_two_questions()
+
+        with self.assertRaises(CatalogValidationError) as raised:
+            check_transition_change(2)
+
+        self.assertEqual(raised.exception.issues, [
+            {"kind": "dead_end", "entity_id": 3, "message": "Answer 3 has no transition."}
+        ])
+
+    def test_check_transition_change_rejects_an_update_adding_a_cycle(self):
+        self.patch_two_questions()
+
+        with self.assertRaises(CatalogValidationError) as raised:
+            check_transition_change(2, {"answer_id": 3, "next_question_id": 2, "product_id": None})
+
+        self.assertIn("cycle", [issue["kind"] for issue in raised.exception.issues])
+
+    def test_check_transition_change_accepts_a_transition_closing_a_dead_end(self):
+        self.patch_loaders()
+
+        # Answer 2 is a dead end until it gets a transition.
+        check_transition_change(transition={"answer_id": 2, "next_question_id": None, "product_id": 1})
+
+        with self.assertRaises(CatalogValidationError):
+            check_transition_change(transition={"answer_id": 2, "next_question_id": 1, "product_id": None})
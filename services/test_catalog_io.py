@@ -0,0 +1,189 @@
+import json
+import unittest
+from unittest.mock import patch
+from services.catalog_io import CatalogImportError, parse_ndjson, parse_document, import_catalog, export_catalog
+from services.catalog_version import CatalogVersions
+from services.db_config import ConnectionPool
+from services.quiz import get_all_questions
+from services.question_transitions import get_question_transitions
+from services.standins import SqliteDatabase
+
+CATALOG_NDJSON = """\
+{"type": "question", "ref": "q1", "text": "am i old", "status": "published"}
+{"type": "question", "ref": "q2", "text": "am i pretty", "status": "published"}
+{"type": "answer", "ref": "a1", "question": "q1", "text": "yes", "status": "published"}
+{"type": "answer", "ref": "a2", "question": "q2", "text": "no"}
+{"type": "product", "ref": "p1", "name": "name1", "description": "desc1"}
+{"type": "question_transition", "answer": "a1", "next_question": "q2"}
+{"type": "question_transition", "answer": "a2", "product": "p1"}
+{"type": "product_restriction", "answer": "a1", "product": "p1"}
+"""
+
+
+class TestCatalogIO(unittest.TestCase):
+
+    def setUp(self):
+        self.use_database(SqliteDatabase())
+
+    def use_database(self, database):
+        self.database = database
+        self.addCleanup(database.close)
+        pool_patch = patch('services.db_config._pool', ConnectionPool(database.connect, pool_size=2))
+        pool_patch.start()
+        self.addCleanup(pool_patch.stop)
+
+    def test_import_resolves_references(self):
+        # Existing rows move the ids of the imported ones.
+        connection = self.database.connect()
+        connection._sqlite.execute("INSERT INTO questions (text) VALUES ('existing')")
+        connection.commit()
+        connection.close()
+
+        counts = import_catalog(parse_ndjson(CATALOG_NDJSON.splitlines()))
+
+        self.assertEqual(counts, {"questions": 2, "answers": 2, "products": 1,
+                                  "question_transitions": 2, "product_restrictions": 1})
+        questions = {question["text"]: question for question in get_all_questions()}
+        self.assertEqual(questions["am i old"]["id"], 2)
+        self.assertEqual(questions["am i old"]["answers"][0]["text"], "yes")
+        self.assertEqual(questions["am i pretty"]["answers"][0]["status"], "draft")
+        transitions = get_question_transitions()
+        self.assertEqual(transitions[0]["next_question_id"], questions["am i pretty"]["id"])
+        self.assertEqual(transitions[1]["answer_id"], questions["am i pretty"]["answers"][0]["id"])
+
+    def test_import_takes_ids_from_auto_increment(self):
+        # A deleted row leaves the counter ahead of MAX(id), the import must not reuse its id.
+        connection = self.database.connect()
+        connection._sqlite.execute("INSERT INTO questions (text) VALUES ('deleted')")
+        connection._sqlite.execute("DELETE FROM questions")
+        connection.commit()
+        connection.close()
+
+        import_catalog(parse_ndjson(CATALOG_NDJSON.splitlines()))
+
+        questions = {question["text"]: question for question in get_all_questions()}
+        self.assertEqual(questions["am i old"]["id"], 2)
+        self.assertEqual(get_question_transitions()[0]["next_question_id"], questions["am i pretty"]["id"])
+
+    def import_counting_statements(self, records):
+        connections = []
+
+        def connect():
+            connections.append(self.database.connect())
+            return connections[-1]
+
+        with patch('services.db_config._pool', ConnectionPool(connect, pool_size=1)):
+            import_catalog(records)
+        return sum(connection.queries for connection in connections)
+
+    def ten_questions(self):
+        records = [{"type": "question", "ref": f"q{number}", "text": f"question {number}"} for number in range(10)]
+        records += [{"type": "answer", "ref": "first", "question": "q0", "text": "first"},
+                    {"type": "answer", "ref": "last", "question": "q9", "text": "last"}]
+        return parse_ndjson(json.dumps(record) for record in records)
+
+    def assert_answers_belong_to_their_questions(self):
+        questions = {question["text"]: question for question in get_all_questions()}
+        self.assertEqual([answer["text"] for answer in questions["question 0"]["answers"]], ["first"])
+        self.assertEqual([answer["text"] for answer in questions["question 9"]["answers"]], ["last"])
+
+    @patch('services.catalog_io.INSERT_BATCH_SIZE', 4)
+    def test_rows_are_inserted_in_batches_when_their_ids_are_consecutive(self):
+        statements = self.import_counting_statements(self.ten_questions())
+
+        # Lock mode, 3 batches of questions, 1 of answers and the catalog change
+        self.assertEqual(statements, 6)
+        self.assert_answers_belong_to_their_questions()
+
+    @patch.dict('services.standins._SYSTEM_VARIABLES', {"innodb_autoinc_lock_mode": 2})
+    def test_rows_are_inserted_one_at_a_time_with_interleaved_ids(self):
+        statements = self.import_counting_statements(self.ten_questions())
+
+        self.assertEqual(statements, 1 + 10 + 2 + 1)
+        self.assert_answers_belong_to_their_questions()
+
+    def test_import_records_one_catalog_change(self):
+        before = CatalogVersions(probe_interval=0).get()
+
+        import_catalog(parse_ndjson(CATALOG_NDJSON.splitlines()))
+
+        after = CatalogVersions(probe_interval=0).get()
+        self.assertEqual({table: after[table] - before[table] for table in after}, {
+            "questions": 1, "answers": 1, "products": 1, "question_transitions": 1, "product_restrictions": 1})
+
+    def test_invalid_catalog_writes_nothing(self):
+        records = parse_ndjson(CATALOG_NDJSON.splitlines() + [
+            '{"type": "question_transition", "answer": "a9", "product": "p1"}',
+            '{"type": "product", "ref": "p1", "name": "again"}',
+        ])
+
+        with self.assertRaises(CatalogImportError) as raised:
+            import_catalog(records)
+
+        self.assertEqual(raised.exception.errors, [
+            "line 10: duplicate product ref 'p1'",
+            "line 9: answer 'a9' is neither a ref of the file nor an id",
+        ])
+        self.assertEqual(get_all_questions(), [])
+
+    def test_failed_insert_rolls_back(self):
+        # Answer of a question id that does not exist fails the foreign key after the questions were inserted.
+        records = parse_document({"questions": [{"text": "am i old"}]}) + \
+            parse_ndjson(['{"type": "answer", "question": 99, "text": "yes"}'])
+
+        with self.assertRaises(Exception):
+            import_catalog(records)
+
+        self.assertEqual(get_all_questions(), [])
+
+    def test_document_format(self):
+        counts = import_catalog(parse_document({
+            "questions": [{"ref": "q1", "text": "am i old", "answers": [{"ref": "a1", "text": "yes"}]}],
+            "products": [{"ref": "p1", "name": "name1"}],
+            "question_transitions": [{"answer": "a1", "product": "p1"}],
+        }))
+
+        self.assertEqual(counts, {"questions": 1, "answers": 1, "products": 1, "question_transitions": 1})
+
+    def test_export_imports_back_as_the_same_catalog(self):
+        import_catalog(parse_ndjson(CATALOG_NDJSON.splitlines()))
+        exported = list(export_catalog())
+        questions = get_all_questions()
+
+        self.use_database(SqliteDatabase())
+        import_catalog(parse_ndjson(exported))
+
+        self.assertEqual(get_all_questions(), questions)
+        self.assertEqual(json.loads(exported[0]), {"type": "question", "ref": "q1", "text": "am i old",
+                                                   "status": "published"})
+        self.assertEqual(list(export_catalog()), exported)
+
+    def test_malformed_records_are_reported(self):
+        records = parse_ndjson([
+            '{"type": ["question"], "text": "am i old"}',
+            '{"type": "question", "ref": ["q1"], "text": "am i old"}',
+            '{"type": "answer", "question": {"ref": "q1"}, "text": 1}',
+        ])
+
+        with self.assertRaises(CatalogImportError) as raised:
+            import_catalog(records)
+
+        self.assertEqual(raised.exception.errors, [
+            "line 1: unknown type ['question']",
+            "line 2: ref must be a string",
+            "line 3: text must be a string",
+            "line 3: question {'ref': 'q1'} is neither a ref of the file nor an id",
+        ])
+
+    def test_malformed_document_is_reported(self):
+        with self.assertRaises(CatalogImportError) as raised:
+            parse_document({
+                "questions": [{"text": "am i old", "answers": "yes"}, "am i pretty"],
+                "products": {"name": "name1"},
+            })
+
+        self.assertEqual(raised.exception.errors, [
+            "questions[0].answers: expected a list",
+            "questions[1]: expected a JSON object",
+            "products: expected a list",
+        ])
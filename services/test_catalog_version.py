@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch
+from services.catalog import CatalogCache
+from services.catalog_version import CatalogVersions, get_table_versions, catalog_etag
+from services.db_config import ConnectionPool
+from services.product import create_product
+from services.standins import SqliteDatabase
+
+
+class TestCatalogVersions(unittest.TestCase):
+
+    def setUp(self):
+        self.database = SqliteDatabase()
+        self.addCleanup(self.database.close)
+        pool_patch = patch('services.db_config._pool', ConnectionPool(self.database.connect, pool_size=2))
+        pool_patch.start()
+        self.addCleanup(pool_patch.stop)
+
+    def test_write_bumps_only_the_changed_table(self):
+        before = CatalogVersions(probe_interval=0).get()
+
+        create_product("New Product", "Desc")
+
+        after = CatalogVersions(probe_interval=0).get()
+        self.assertEqual(after["products"], before["products"] + 1)
+        self.assertEqual(after["questions"], before["questions"])
+
+    def test_own_write_is_seen_before_the_probe_interval(self):
+        versions = get_table_versions()
+
+        create_product("New Product", "Desc")
+
+        self.assertEqual(get_table_versions()["products"], versions["products"] + 1)
+
+    def test_etag_changes_only_with_its_tables(self):
+        questions = catalog_etag(("questions", "answers"))
+        products = catalog_etag(("products",))
+
+        create_product("New Product", "Desc")
+
+        self.assertEqual(catalog_etag(("questions", "answers")), questions)
+        self.assertNotIn(catalog_etag(("products",)), (products, questions))
+        self.assertNotEqual(catalog_etag(("products",), "limit=10"), catalog_etag(("products",)))
+
+    def test_etag_check_needs_no_query_within_the_probe_interval(self):
+        get_table_versions()
+
+        with patch('services.catalog_version.get_db_connection') as mock_get_db_connection:
+            catalog_etag(("products",))
+
+        mock_get_db_connection.assert_not_called()
+
+    def test_other_worker_reloads_only_the_changed_field(self):
+        # Two workers, each with its own view of the versions and its own cached catalog.
+        worker_a = CatalogCache(CatalogVersions(probe_interval=0))
+        worker_b = CatalogCache(CatalogVersions(probe_interval=0))
+        with patch('services.catalog.store_quiz_snapshot'):
+            worker_a.get_catalog()
+            worker_b.get_catalog()
+
+            create_product("New Product", "Desc")
+
+            with patch('services.catalog.load_catalog', return_value={"products": []}) as mock_load_catalog:
+                worker_b.get_catalog()
+        mock_load_catalog.assert_called_once_with(["products"])
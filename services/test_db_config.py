@@ -0,0 +1,225 @@
+import subprocess
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from mysql.connector.errors import PoolError
+from services.db_config import (
+    ConnectionPool, LazyCollection, ProcessDatabase, release_connection, stream_rows,
+    _connect_mongo, _connect_async_mongo
+)
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.opened = []
+
+        def connect():
+            connection = MagicMock()
+            connection.is_connected.return_value = True
+            connection.in_transaction = False
+            self.opened.append(connection)
+            return connection
+
+        self.connect = connect
+
+    def test_connection_is_reused_after_close(self):
+        pool = ConnectionPool(self.connect, pool_size=2)
+
+        first = pool.get_connection()
+        first.cursor()
+        first.close()
+        second = pool.get_connection()
+
+        self.assertEqual(len(self.opened), 1)
+        self.opened[0].close.assert_not_called()
+        self.assertEqual(self.opened[0].cursor.call_count, 1)
+        second.close()
+
+    def test_close_is_idempotent(self):
+        pool = ConnectionPool(self.connect, pool_size=1)
+
+        connection = pool.get_connection()
+        connection.close()
+        connection.close()
+
+        # A double close must not free a second slot.
+        pool.get_connection()
+        pool.checkout_timeout = 0.01
+        with self.assertRaises(PoolError):
+            pool.get_connection()
+
+    def test_checkout_timeout_when_exhausted(self):
+        pool = ConnectionPool(self.connect, pool_size=1, checkout_timeout=0.01)
+
+        pool.get_connection()
+
+        with self.assertRaises(PoolError):
+            pool.get_connection()
+
+    def test_dead_connection_is_replaced_on_borrow(self):
+        pool = ConnectionPool(self.connect, pool_size=1)
+
+        pool.get_connection().close()
+        self.opened[0].is_connected.return_value = False
+        pool.get_connection()
+
+        self.assertEqual(len(self.opened), 2)
+        self.opened[0].close.assert_called_once()
+
+    def test_stale_connection_is_recycled(self):
+        pool = ConnectionPool(self.connect, pool_size=1, recycle=0)
+
+        pool.get_connection().close()
+        time.sleep(0.001)
+        pool.get_connection()
+
+        self.assertEqual(len(self.opened), 2)
+        self.opened[0].close.assert_called_once()
+
+    def test_open_transaction_is_rolled_back_on_release(self):
+        pool = ConnectionPool(self.connect, pool_size=1)
+
+        connection = pool.get_connection()
+        self.opened[0].in_transaction = True
+        connection.close()
+
+        self.opened[0].rollback.assert_called_once()
+
+    def test_failed_connect_frees_the_slot(self):
+        def failing_connect():
+            raise PoolError("boom")
+
+        pool = ConnectionPool(failing_connect, pool_size=1, checkout_timeout=0.01)
+
+        for _ in range(2):
+            with self.assertRaises(PoolError):
+                pool.get_connection()
+
+    def test_connections_of_the_parent_are_not_used_after_fork(self):
+        pool = ConnectionPool(self.connect, pool_size=1)
+        pool.get_connection().close()
+        # As if forked with a connection borrowed, the slot would never be freed in the child.
+        pool.get_connection()
+
+        with patch('services.db_config.os.getpid', return_value=-1):
+            pool.get_connection()
+
+        self.assertEqual(len(self.opened), 2)
+        # Closing would end the session of the parent on the shared socket.
+        self.opened[0].close.assert_not_called()
+
+    def test_release_discards_a_dead_connection_and_frees_its_slot(self):
+        pool = ConnectionPool(self.connect, pool_size=1, checkout_timeout=0.01)
+
+        connection = pool.get_connection()
+        cursor = connection.cursor()
+        self.opened[0].is_connected.return_value = False
+        release_connection(connection, cursor)
+        pool.get_connection()
+
+        cursor.close.assert_called_once()
+        self.opened[0].close.assert_called_once()
+        self.assertEqual(len(self.opened), 2)
+
+    def test_release_without_cursor_returns_a_live_connection(self):
+        pool = ConnectionPool(self.connect, pool_size=1, checkout_timeout=0.01)
+
+        release_connection(pool.get_connection())
+        pool.get_connection()
+
+        self.opened[0].close.assert_not_called()
+        self.assertEqual(len(self.opened), 1)
+
+    def test_abandoned_stream_does_not_return_its_connection(self):
+        def connect():
+            connection = self.connect()
+            connection.cursor.return_value.fetchmany.side_effect = [[{"id": 1}, {"id": 2}], []]
+            return connection
+
+        pool = ConnectionPool(connect, pool_size=1)
+        with patch('services.db_config._pool', pool):
+            rows = stream_rows("SELECT id FROM questions", batch_size=2)
+            next(rows)
+            rows.close()
+            pool.get_connection()
+
+        self.assertEqual(len(self.opened), 2)
+        self.opened[0].close.assert_called_once()
+
+    def test_exhausted_stream_returns_its_connection(self):
+        def connect():
+            connection = self.connect()
+            connection.cursor.return_value.fetchmany.side_effect = [[{"id": 1}, {"id": 2}], []]
+            return connection
+
+        pool = ConnectionPool(connect, pool_size=1)
+        with patch('services.db_config._pool', pool):
+            self.assertEqual(list(stream_rows("SELECT id FROM questions", batch_size=2)), [{"id": 1}, {"id": 2}])
+            pool.get_connection()
+
+        self.assertEqual(len(self.opened), 1)
+
+
+class TestProcessDatabase(unittest.TestCase):
+
+    def test_client_is_created_on_first_use_once_per_process(self):
+        connect = MagicMock()
+        database = ProcessDatabase(connect)
+        connect.assert_not_called()
+
+        self.assertIs(database.get_collection("quizes"), database.get_collection("quizes"))
+        self.assertEqual(connect.call_count, 1)
+        with patch('services.db_config.os.getpid', return_value=-1):
+            database.get_database()
+
+        self.assertEqual(connect.call_count, 2)
+
+    def test_private_attributes_of_a_lazy_collection_do_not_connect(self):
+        connect = MagicMock()
+        collection = LazyCollection("quizes", ProcessDatabase(connect))
+
+        self.assertIsNone(getattr(collection, '_is_coroutine', None))
+        connect.assert_not_called()
+
+        collection.find_one
+        self.assertEqual(connect.call_count, 1)
+
+    @patch('pymongo.MongoClient')
+    def test_new_mongodb_client_creates_the_quiz_indexes(self, mock_client):
+        database = _connect_mongo()
+
+        quizes = database["quizes"]
+        quizes.create_index.assert_any_call([("quiz_id", 1)], name="quiz_id_unique", unique=True)
+
+    @patch('services.mongo_indexes.ensure_indexes', side_effect=[Exception("No servers found"), None])
+    @patch('pymongo.MongoClient')
+    def test_creating_the_indexes_is_retried_on_the_next_use(self, mock_client, mock_ensure_indexes):
+        database = ProcessDatabase(_connect_mongo)
+
+        with self.assertRaises(Exception):
+            database.get_collection("quizes")
+        mock_client.return_value.close.assert_called_once()
+        database.get_collection("quizes")
+
+        self.assertEqual(mock_ensure_indexes.call_count, 2)
+        self.assertEqual(mock_client.call_count, 2)
+
+    @patch('motor.motor_asyncio.AsyncIOMotorClient')
+    @patch('services.db_config.mongo_database')
+    def test_new_motor_client_creates_the_quiz_indexes_first(self, mock_mongo_database, mock_motor_client):
+        _connect_async_mongo()
+
+        mock_mongo_database.get_database.assert_called_once_with()
+        mock_motor_client.assert_called_once()
+
+    def test_importing_the_services_opens_no_mongodb_client(self):
+        loaded = subprocess.run(
+            [sys.executable, "-c", "import sys, threading, services.quiz_filler, services.async_quiz_filler; "
+                                   "print(sorted(m for m in ('pymongo', 'motor') if m in sys.modules), "
+                                   "threading.active_count())"],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+
+        self.assertEqual(loaded, ["[]", "1"])
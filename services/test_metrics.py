@@ -0,0 +1,119 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+from services.metrics import Histogram, Metrics, InstrumentedCollection, instrument_connect
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_counts_are_cumulative(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.snapshot(), ([2, 3, 4], 3.65))
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics(buckets=(0.01, 0.1))
+
+    def test_backend_calls_are_charged_to_the_request(self):
+        self.metrics.start_request()
+        self.metrics.observe_call("mongo", "find_one", 0.002)
+        self.metrics.observe_call("mongo", "update_one", 0.003)
+        self.metrics.observe_call("mysql", "execute", 0.001)
+
+        backends = self.metrics.finish_request("quiz_filler.answer_question", "POST", 200, 0.02)
+
+        self.assertEqual(backends, {"mongo": [0.005, 2], "mysql": [0.001, 1]})
+        self.assertEqual(self.metrics.request_backend_calls.samples(), {
+            ("quiz_filler.answer_question", "mongo"): 2, ("quiz_filler.answer_question", "mysql"): 1})
+
+    def test_calls_outside_a_request_are_not_charged(self):
+        self.metrics.observe_call("mongo", "create_index", 0.5)
+
+        self.assertEqual(self.metrics.finish_request("metrics.get_metrics", "GET", 200, 0.001), {})
+        self.assertEqual(self.metrics.request_backend_seconds.samples(), {})
+        self.assertEqual(self.metrics.backend_call_seconds.samples()["mongo", "create_index"].snapshot(),
+                         ([0, 0, 1], 0.5))
+
+    def test_render_prometheus_text(self):
+        self.metrics.start_request()
+        self.metrics.finish_request("quiz_filler.answer_question", "POST", 200, 0.05)
+
+        text = self.metrics.render()
+
+        self.assertIn("# TYPE manual_request_duration_seconds histogram\n", text)
+        self.assertIn('manual_request_duration_seconds_bucket{endpoint="quiz_filler.answer_question",'
+                      'method="POST",le="0.01"} 0\n', text)
+        self.assertIn('manual_request_duration_seconds_bucket{endpoint="quiz_filler.answer_question",'
+                      'method="POST",le="+Inf"} 1\n', text)
+        self.assertIn('manual_request_duration_seconds_count{endpoint="quiz_filler.answer_question",'
+                      'method="POST"} 1\n', text)
+        self.assertIn('manual_requests_total{endpoint="quiz_filler.answer_question",method="POST",status="200"} 1\n',
+                      text)
+
+    def test_render_reads_the_label_sets_under_the_lock_they_are_added_under(self):
+        histogram = self.metrics.backend_call_seconds
+        histogram.observe(0.002, "mongo", "find_one")
+        rendered = []
+
+        with histogram._lock:
+            # A request thread is adding a label set, the scrape waits for it.
+            scrape = threading.Thread(target=lambda: rendered.append(histogram.render()))
+            scrape.start()
+            scrape.join(0.1)
+            self.assertEqual(rendered, [])
+        scrape.join()
+
+        self.assertIn('manual_backend_call_duration_seconds_count{backend="mongo",operation="find_one"} 1',
+                      rendered[0])
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics()
+        self.metrics.start_request()
+
+    def test_collection_operations_are_timed(self):
+        collection = MagicMock()
+        collection.find_one.return_value = {"quiz_id": 1}
+        instrumented = InstrumentedCollection(collection, self.metrics)
+
+        self.assertEqual(instrumented.find_one({"quiz_id": 1}), {"quiz_id": 1})
+        instrumented.name
+
+        collection.find_one.assert_called_once_with({"quiz_id": 1})
+        self.assertEqual(list(self.metrics.backend_call_seconds.samples()), [("mongo", "find_one")])
+
+    def test_failed_operations_are_timed(self):
+        collection = MagicMock()
+        collection.update_one.side_effect = RuntimeError("down")
+
+        with self.assertRaises(RuntimeError):
+            InstrumentedCollection(collection, self.metrics).update_one({}, {})
+
+        self.assertEqual(self.metrics.finish_request("e", "POST", 500, 0.1)["mongo"][1], 1)
+
+    def test_connection_and_cursor_calls_are_timed(self):
+        raw = MagicMock()
+        connection = instrument_connect(lambda: raw, self.metrics)()
+
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+        connection.commit()
+        connection.is_connected()
+
+        raw.cursor.assert_called_once_with(dictionary=True)
+        raw.cursor.return_value.execute.assert_called_once_with("SELECT 1")
+        self.assertEqual(sorted(self.metrics.backend_call_seconds.samples()), [
+            ("mysql", "commit"), ("mysql", "connect"), ("mysql", "execute"), ("mysql", "fetchall")])
+
+
+if __name__ == '__main__':
+    unittest.main()
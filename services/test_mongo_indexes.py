@@ -0,0 +1,25 @@
+import unittest
+from unittest.mock import patch, call
+from services import mongo_indexes
+from services.mongo_indexes import ensure_indexes
+
+
+class TestMongoIndexes(unittest.TestCase):
+
+    @patch('services.mongo_indexes.quiz_collection')
+    def test_ensure_indexes(self, mock_quiz_collection):
+        ensure_indexes()
+
+        mock_quiz_collection.create_index.assert_has_calls([
+            call([("quiz_id", 1)], name="quiz_id_unique", unique=True),
+            call([("snapshot_id", 1)], name="snapshot_id"),
+        ])
+        self.assertEqual(mock_quiz_collection.create_index.call_count, 2)
+
+    @patch.object(mongo_indexes, 'QUIZ_TTL_SECONDS', 3600)
+    @patch('services.mongo_indexes.quiz_collection')
+    def test_ensure_indexes_with_ttl(self, mock_quiz_collection):
+        ensure_indexes()
+
+        mock_quiz_collection.create_index.assert_any_call(
+            [("created_at", 1)], name="created_at_ttl", expireAfterSeconds=3600)
@@ -1,12 +1,18 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from services.product import create_product, publish_product, disable_product, get_all_products, update_product
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from services.db_config import ConnectionPool
+from services.product import (
+    create_product, publish_product, disable_product, get_all_products, update_product, get_products_page
+)
 
 
 class TestProductService(unittest.TestCase):
 
-    @patch('mysql.connector.connect')
-    def test_create_product_success(self, mock_connect):
+    @patch('services.product.record_catalog_change')
+    @patch('services.product.get_db_connection')
+    def test_create_product_success(self, mock_connect, mock_record_catalog_change):
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
         mock_connect.return_value = mock_conn
@@ -16,8 +22,9 @@ class TestProductService(unittest.TestCase):
 
         mock_cursor.execute.assert_called_once_with("\n            INSERT INTO products (name, description, status)\n            VALUES (%s, %s, 'draft')\n        ", ('Test Product', 'This is a test product'))
         mock_conn.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_conn, 'products')
 
-    @patch('mysql.connector.connect')
+    @patch('services.product.get_db_connection')
     def test_publish_product_success(self, mock_connect):
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
@@ -36,7 +43,7 @@ class TestProductService(unittest.TestCase):
         )
         mock_conn.commit.assert_called_once()
 
-    @patch('mysql.connector.connect')
+    @patch('services.product.get_db_connection')
     def test_publish_product_invalid_status(self, mock_connect):
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
@@ -52,7 +59,7 @@ class TestProductService(unittest.TestCase):
         )
         mock_conn.commit.assert_not_called()
 
-    @patch('mysql.connector.connect')
+    @patch('services.product.get_db_connection')
     def test_disable_product_success(self, mock_connect):
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
@@ -71,7 +78,22 @@ class TestProductService(unittest.TestCase):
         )
         mock_conn.commit.assert_called_once()
 
-    @patch('mysql.connector.connect')
+    @patch('services.product.get_db_connection')
+    def test_get_products_page(self, mock_connect):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connect.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [{"id": 11, "name": "Product", "description": "Desc", "status": "draft"}]
+
+        products = get_products_page(after_id=10, limit=1)
+
+        mock_cursor.execute.assert_called_once_with(
+            "SELECT id, name, description, status FROM products WHERE id > %s ORDER BY id LIMIT %s", (10, 1))
+        self.assertEqual(products[0]["id"], 11)
+        mock_conn.close.assert_called_once()
+
+    @patch('services.product.get_db_connection')
     def test_get_all_products(self, mock_connect):
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
@@ -92,8 +114,9 @@ class TestProductService(unittest.TestCase):
         self.assertEqual(products[0]["name"], "Product 1")
         self.assertEqual(products[1]["status"], "published")
 
-    @patch('mysql.connector.connect')
-    def test_update_product(self, mock_connect):
+    @patch('services.product.record_catalog_change')
+    @patch('services.product.get_db_connection')
+    def test_update_product(self, mock_connect, mock_record_catalog_change):
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
         mock_connect.return_value = mock_conn
@@ -104,3 +127,24 @@ class TestProductService(unittest.TestCase):
         mock_cursor.execute.assert_called_once_with('\n        UPDATE products\n        SET name = %s, description = %s, status = %s\n        WHERE id = %s\n        ', ('Updated Product', 'Updated Desc', 'draft', 1))
 
         mock_conn.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_conn, 'products')
+
+    def test_connections_lost_mid_request_do_not_exhaust_the_pool(self):
+        def connect():
+            connection = MagicMock()
+            connection.is_connected.return_value = False
+            connection.cursor.return_value.execute.side_effect = Error("Lost connection to MySQL server")
+            return connection
+        pool = ConnectionPool(connect, pool_size=2, checkout_timeout=0.01)
+
+        with patch('services.product.get_db_connection', pool.get_connection):
+            for _ in range(pool.pool_size + 1):
+                with self.assertRaises(Error):
+                    get_all_products()
+
+    @patch('services.product.get_db_connection')
+    def test_pool_error_is_not_hidden(self, mock_connect):
+        mock_connect.side_effect = PoolError("No MySQL connection available within 5.0s.")
+
+        with self.assertRaises(PoolError):
+            get_products_page()
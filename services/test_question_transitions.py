@@ -2,14 +2,36 @@ import unittest
 from unittest.mock import patch, MagicMock
 from services.question_transitions import (
     get_question_transitions,
+    get_question_transitions_page,
     get_question_transition_by_id,
     create_question_transition,
     update_question_transition,
     delete_question_transition
 )
+from services.catalog import CatalogValidationError
 
 class TestQuestionTransitionsServices(unittest.TestCase):
 
+    def setUp(self):
+        # The quiz graph check reads the catalog, see services/test_catalog.py.
+        patcher = patch('services.question_transitions.check_transition_change')
+        self.mock_check_transition_change = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('services.question_transitions.get_db_connection')
+    def test_get_question_transitions_page(self, mock_get_db_connection):
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_get_db_connection.return_value = mock_connection
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [{'id': 3, 'answer_id': 1, 'next_question_id': 2, 'product_id': None}]
+
+        transitions = get_question_transitions_page(after_id=2, limit=1)
+
+        mock_cursor.execute.assert_called_once_with(
+            "SELECT * FROM question_transitions WHERE id > %s ORDER BY id LIMIT %s", (2, 1))
+        self.assertEqual(transitions[0]['id'], 3)
+
     @patch('services.question_transitions.get_db_connection')
     def test_get_question_transitions(self, mock_get_db_connection):
         mock_connection = MagicMock()
@@ -28,8 +50,9 @@ class TestQuestionTransitionsServices(unittest.TestCase):
         self.assertEqual(transitions[0]['next_question_id'], 2)
         self.assertEqual(transitions[1]['product_id'], 1)
 
+    @patch('services.question_transitions.record_catalog_change')
     @patch('services.question_transitions.get_db_connection')
-    def test_create_question_transition_with_next_question(self, mock_get_db_connection):
+    def test_create_question_transition_with_next_question(self, mock_get_db_connection, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_get_db_connection.return_value = mock_connection
@@ -39,11 +62,15 @@ class TestQuestionTransitionsServices(unittest.TestCase):
         rowcount = create_question_transition(1, next_question_id=2, product_id=None)
 
         self.assertEqual(rowcount, 1)
+        self.mock_check_transition_change.assert_called_once_with(
+            transition={"answer_id": 1, "next_question_id": 2, "product_id": None})
         mock_cursor.execute.assert_called_with('\n        INSERT INTO question_transitions (answer_id, next_question_id, product_id)\n        VALUES (%s, %s, %s)\n        ', (1, 2, None))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'question_transitions')
 
+    @patch('services.question_transitions.record_catalog_change')
     @patch('services.question_transitions.get_db_connection')
-    def test_create_question_transition_with_product_id(self, mock_get_db_connection):
+    def test_create_question_transition_with_product_id(self, mock_get_db_connection, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_get_db_connection.return_value = mock_connection
@@ -55,9 +82,11 @@ class TestQuestionTransitionsServices(unittest.TestCase):
         self.assertEqual(rowcount, 1)
         mock_cursor.execute.assert_called_with('\n        INSERT INTO question_transitions (answer_id, next_question_id, product_id)\n        VALUES (%s, %s, %s)\n        ', (1, None, 1))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'question_transitions')
 
+    @patch('services.question_transitions.record_catalog_change')
     @patch('services.question_transitions.get_db_connection')
-    def test_update_question_transition(self, mock_get_db_connection):
+    def test_update_question_transition(self, mock_get_db_connection, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_get_db_connection.return_value = mock_connection
@@ -67,11 +96,15 @@ class TestQuestionTransitionsServices(unittest.TestCase):
         rowcount = update_question_transition(1, 1, next_question_id=2, product_id=None)
 
         self.assertEqual(rowcount, 1)
+        self.mock_check_transition_change.assert_called_once_with(
+            1, {"answer_id": 1, "next_question_id": 2, "product_id": None})
         mock_cursor.execute.assert_called_with('\n        UPDATE question_transitions\n        SET answer_id = %s, next_question_id = %s, product_id = %s\n        WHERE id = %s\n        ', (1, 2, None, 1))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'question_transitions')
 
+    @patch('services.question_transitions.record_catalog_change')
     @patch('services.question_transitions.get_db_connection')
-    def test_delete_question_transition(self, mock_get_db_connection):
+    def test_delete_question_transition(self, mock_get_db_connection, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_get_db_connection.return_value = mock_connection
@@ -81,5 +114,22 @@ class TestQuestionTransitionsServices(unittest.TestCase):
         rowcount = delete_question_transition(1)
 
         self.assertEqual(rowcount, 1)
+        self.mock_check_transition_change.assert_called_once_with(1)
         mock_cursor.execute.assert_called_with("DELETE FROM question_transitions WHERE id = %s", (1,))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'question_transitions')
+
+    @patch('services.question_transitions.get_db_connection')
+    def test_transition_writes_adding_issues_are_rejected_before_writing(self, mock_get_db_connection):
+        self.mock_check_transition_change.side_effect = CatalogValidationError([
+            {"kind": "dead_end", "entity_id": 3, "message": "Answer 3 has no transition."}
+        ])
+
+        with self.assertRaises(CatalogValidationError):
+            create_question_transition(1, next_question_id=2)
+        with self.assertRaises(CatalogValidationError):
+            update_question_transition(1, 1, product_id=1)
+        with self.assertRaises(CatalogValidationError):
+            delete_question_transition(1)
+
+        mock_get_db_connection.assert_not_called()
@@ -1,7 +1,11 @@
 import unittest
 from unittest.mock import patch, MagicMock
+from services.catalog_io import parse_document, import_catalog
+from services.db_config import ConnectionPool
 from services.quiz import (
     get_all_questions,
+    get_questions_page,
+    stream_questions,
     create_question,
     publish_question,
     disable_question,
@@ -12,10 +16,11 @@ from services.quiz import (
     remove_restriction_by_id,
     get_product_restrictions
 )
+from services.standins import SqliteDatabase
 
 class TestQuizServices(unittest.TestCase):
 
-    @patch('services.quiz.mysql.connector.connect')
+    @patch('services.quiz.get_db_connection')
     def test_get_all_questinos(self, mock_connect):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
@@ -38,8 +43,9 @@ class TestQuizServices(unittest.TestCase):
         self.assertEqual(len(result), 1)  # One question
         self.assertEqual(len(result[0]['answers']), 2)  # Two answers under the same question
 
-    @patch('services.quiz.mysql.connector.connect')
-    def test_create_question(self, mock_connect):
+    @patch('services.quiz.record_catalog_change')
+    @patch('services.quiz.get_db_connection')
+    def test_create_question(self, mock_connect, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_connect.return_value = mock_connection
@@ -49,9 +55,11 @@ class TestQuizServices(unittest.TestCase):
 
         mock_cursor.execute.assert_called_with("INSERT INTO questions (text, status) VALUES (%s, 'draft')", ("New Question",))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'questions')
 
-    @patch('services.quiz.mysql.connector.connect')
-    def test_publish_question(self, mock_connect):
+    @patch('services.quiz.record_catalog_change')
+    @patch('services.quiz.get_db_connection')
+    def test_publish_question(self, mock_connect, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_connect.return_value = mock_connection
@@ -63,9 +71,11 @@ class TestQuizServices(unittest.TestCase):
 
         mock_cursor.execute.assert_called_with("UPDATE questions SET status = 'published' WHERE id = %s", (1,))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'questions')
 
-    @patch('services.quiz.mysql.connector.connect')
-    def test_disable_question(self, mock_connect):
+    @patch('services.quiz.record_catalog_change')
+    @patch('services.quiz.get_db_connection')
+    def test_disable_question(self, mock_connect, mock_record_catalog_change):
         # Mock connection behavior
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
@@ -78,9 +88,11 @@ class TestQuizServices(unittest.TestCase):
 
         mock_cursor.execute.assert_called_with("UPDATE questions SET status = 'disabled' WHERE id = %s", (1,))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'questions')
 
-    @patch('services.quiz.mysql.connector.connect')
-    def test_create_answer(self, mock_connect):
+    @patch('services.quiz.record_catalog_change')
+    @patch('services.quiz.get_db_connection')
+    def test_create_answer(self, mock_connect, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_connect.return_value = mock_connection
@@ -90,9 +102,11 @@ class TestQuizServices(unittest.TestCase):
 
         mock_cursor.execute.assert_called_with("INSERT INTO answers (text, question_id, status) VALUES (%s, %s, 'draft')", ("New Answer", 1))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'answers')
 
-    @patch('services.quiz.mysql.connector.connect')
-    def test_publish_answer(self, mock_connect):
+    @patch('services.quiz.record_catalog_change')
+    @patch('services.quiz.get_db_connection')
+    def test_publish_answer(self, mock_connect, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_connect.return_value = mock_connection
@@ -104,9 +118,11 @@ class TestQuizServices(unittest.TestCase):
 
         mock_cursor.execute.assert_called_with("UPDATE answers SET status = 'published' WHERE id = %s", (1,))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'answers')
 
-    @patch('services.quiz.mysql.connector.connect')
-    def test_disable_answer(self, mock_connect):
+    @patch('services.quiz.record_catalog_change')
+    @patch('services.quiz.get_db_connection')
+    def test_disable_answer(self, mock_connect, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_connect.return_value = mock_connection
@@ -118,10 +134,12 @@ class TestQuizServices(unittest.TestCase):
 
         mock_cursor.execute.assert_called_with("UPDATE answers SET status = 'disabled' WHERE id = %s", (1,))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'answers')
 
 
-    @patch('services.quiz.mysql.connector.connect')
-    def test_remove_restriction_by_id(self, mock_connect):
+    @patch('services.quiz.record_catalog_change')
+    @patch('services.quiz.get_db_connection')
+    def test_remove_restriction_by_id(self, mock_connect, mock_record_catalog_change):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
         mock_connect.return_value = mock_connection
@@ -131,8 +149,9 @@ class TestQuizServices(unittest.TestCase):
 
         mock_cursor.execute.assert_called_with("DELETE FROM product_restrictions WHERE id = %s", (1,))
         mock_connection.commit.assert_called_once()
+        mock_record_catalog_change.assert_called_once_with(mock_connection, 'product_restrictions')
 
-    @patch('services.quiz.mysql.connector.connect')
+    @patch('services.quiz.get_db_connection')
     def test_get_product_restrictions(self, mock_connect):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
@@ -148,3 +167,35 @@ class TestQuizServices(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]['action'], "allow")
 
+
+class TestQuestionPages(unittest.TestCase):
+
+    def setUp(self):
+        database = SqliteDatabase()
+        self.addCleanup(database.close)
+        pool_patch = patch('services.db_config._pool', ConnectionPool(database.connect, pool_size=2))
+        pool_patch.start()
+        self.addCleanup(pool_patch.stop)
+        import_catalog(parse_document({"questions": [
+            {"text": "am i old", "answers": [{"text": "yes"}, {"text": "no"}]},
+            {"text": "am i pretty"},
+            {"text": "am i tall", "answers": [{"text": "yes"}]},
+        ]}))
+
+    def test_pages_follow_the_last_id(self):
+        first = get_questions_page(limit=2)
+        second = get_questions_page(after_id=first[-1]["id"], limit=2)
+
+        self.assertEqual([question["text"] for question in first], ["am i old", "am i pretty"])
+        self.assertEqual([answer["text"] for answer in first[0]["answers"]], ["yes", "no"])
+        self.assertEqual(first[1]["answers"], [])
+        self.assertEqual([question["text"] for question in second], ["am i tall"])
+
+    def test_stream_groups_answers_of_each_question(self):
+        with patch('services.db_config.STREAM_BATCH_SIZE', 1):
+            questions = list(stream_questions())
+
+        self.assertEqual([(question["text"], [answer["text"] for answer in question["answers"]])
+                          for question in questions],
+                         [("am i old", ["yes", "no"]), ("am i pretty", []), ("am i tall", ["yes"])])
+        self.assertEqual(list(stream_questions(after_id=questions[1]["id"])), questions[2:])
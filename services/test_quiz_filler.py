@@ -1,7 +1,42 @@
+import contextlib
+import io
 import unittest
 from unittest.mock import patch, MagicMock
-from services.quiz_filler import get_quiz_current_question, answer_current_question
-from domain.quiz_filler import QuizFiller
+from services.quiz_filler import (
+    init_quiz, get_quiz_current_question, answer_current_question, answer_questions, reset_to_previous_question
+)
+from domain.quiz_filler import QuizFiller, QuizConflictError
+from domain.quiz_snapshot import QuizSnapshot
+from services.quiz_snapshot import snapshot_cache
+from services.catalog import CatalogCache
+from services.catalog_io import parse_ndjson, import_catalog
+from services.catalog_version import CatalogVersions
+from services.db_config import ConnectionPool
+from services.round_trips import RoundTripBudgetMixin
+from services.standins import MemoryCollection, SqliteDatabase
+
+# Database round trips each hot path may make. Warm means the catalog and the quiz snapshot
+# are already cached in the process and the catalog versions were probed recently.
+ROUND_TRIP_BUDGETS = {
+    "init_quiz": dict(mongo=1, mysql_connects=0, mysql_queries=0),
+    # Versions probe plus one query per catalog table, and the snapshot stored once.
+    "init_quiz cold": dict(mongo=2, mysql_connects=5, mysql_queries=5),
+    "get_quiz_current_question": dict(mongo=1, mysql_connects=0, mysql_queries=0),
+    "get_quiz_current_question new quiz": dict(mongo=2, mysql_connects=0, mysql_queries=0),
+    "get_quiz_current_question cold snapshot": dict(mongo=2, mysql_connects=0, mysql_queries=0),
+    "answer_current_question": dict(mongo=2, mysql_connects=0, mysql_queries=0),
+    "reset_to_previous_question": dict(mongo=2, mysql_connects=0, mysql_queries=0),
+}
+
+BUDGET_CATALOG = """\
+{"type": "question", "ref": "q1", "text": "am I old?", "status": "published"}
+{"type": "question", "ref": "q2", "text": "am I pretty?", "status": "published"}
+{"type": "answer", "ref": "a1", "question": "q1", "text": "yes", "status": "published"}
+{"type": "answer", "ref": "a2", "question": "q2", "text": "no", "status": "published"}
+{"type": "product", "ref": "p1", "name": "Product A", "status": "published"}
+{"type": "question_transition", "answer": "a1", "next_question": "q2"}
+{"type": "question_transition", "answer": "a2", "product": "p1"}
+"""
 
 
 class TestQuizFiller(unittest.TestCase):
@@ -32,6 +67,51 @@ class TestQuizFiller(unittest.TestCase):
             ]
         }
 
+    def test_answer_moves_to_next_question(self):
+        quiz_filler = QuizFiller(5, self.quiz_snapshot)
+
+        next_question = quiz_filler.answer(1, quiz_filler.get_current_question())
+
+        self.assertEqual(next_question["id"], 2)
+        self.assertEqual(quiz_filler.progress["answers_given"], [{"question_id": 1, "answer_id": 1}])
+
+    def test_answer_recommends_products(self):
+        quiz_filler = QuizFiller(5, self.quiz_snapshot, progress={
+            "answers_given": [{"question_id": 1, "answer_id": 1}], "current_question_id": 2, "recommended_products": []
+        })
+
+        result = quiz_filler.answer(4, quiz_filler.get_current_question())
+
+        self.assertEqual([product["id"] for product in result["recommended_products"]], [2])
+
+    def test_answer_skips_restricted_products(self):
+        self.quiz_snapshot["product_restrictions"] = [{"id": 1, "answer_id": 1, "product_id": 2}]
+        self.quiz_snapshot["question_transitions"].append(
+            {"id": 5, "answer_id": 5, "next_question_id": None, "product_id": 2})
+        self.quiz_snapshot["question_transitions"].append(
+            {"id": 6, "answer_id": 5, "next_question_id": None, "product_id": 1})
+        quiz_filler = QuizFiller(5, self.quiz_snapshot, progress={
+            "answers_given": [{"question_id": 1, "answer_id": 1}], "current_question_id": 2, "recommended_products": []
+        })
+
+        result = quiz_filler.answer(5, quiz_filler.get_current_question())
+
+        self.assertEqual([product["id"] for product in result["recommended_products"]], [1])
+        self.assertEqual(quiz_filler.snapshot.graph.restricted_product_ids([1, 5]), {2})
+
+    def test_answer_rejects_answer_of_another_question(self):
+        quiz_filler = QuizFiller(5, self.quiz_snapshot)
+
+        with self.assertRaises(ValueError):
+            quiz_filler.answer(3, quiz_filler.get_current_question())
+
+    def test_quiz_graph_is_shared(self):
+        quiz_snapshot = QuizSnapshot(self.quiz_snapshot)
+        first = QuizFiller(5, quiz_snapshot)
+        second = QuizFiller(6, quiz_snapshot)
+
+        self.assertIs(first.snapshot.graph, second.snapshot.graph)
+
     @patch('services.quiz_filler.quiz_collection')
     def test_answer_current_question_invalid_answer(self, mock_quiz_collection):
         mock_quiz = QuizFiller(5, self.quiz_snapshot, progress={"answers_given": [], "current_question_id": 1})
@@ -54,3 +134,296 @@ class TestQuizFiller(unittest.TestCase):
         self.assertIn("recommended_products", result)
         self.assertEqual(len(result["recommended_products"]), 1)
         self.assertEqual(result["recommended_products"][0]["name"], "Product A")
+
+    @patch('domain.quiz_filler.quiz_collection')
+    @patch('services.quiz_filler.get_quiz_snapshot')
+    @patch('services.quiz_filler.quiz_collection')
+    def test_get_quiz_loads_shared_snapshot(self, mock_quiz_collection, mock_get_snapshot, mock_progress_collection):
+        mock_quiz_collection.find_one.return_value = {
+            "snapshot_id": "abc",
+            "progress": {"answers_given": [], "current_question_id": 1, "recommended_products": []}
+        }
+        mock_get_snapshot.return_value = QuizSnapshot(self.quiz_snapshot, "abc")
+
+        result = get_quiz_current_question(5)
+
+        mock_get_snapshot.assert_called_once_with("abc")
+        self.assertEqual(result["current_question"]["id"], 1)
+
+    def patch_catalog(self):
+        # A fresh catalog cache, so nothing an earlier test cached is served.
+        versions = MagicMock()
+        versions.get.return_value = {}
+        cache_patch = patch('services.catalog.catalog_cache', CatalogCache(versions))
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+        catalog = {
+            'services.catalog.get_all_questions': self.quiz_snapshot["questions"],
+            'services.catalog.get_all_products': self.quiz_snapshot["products"],
+            'services.catalog.get_all_product_restrictions': self.quiz_snapshot["product_restrictions"],
+            'services.catalog.get_question_transitions': self.quiz_snapshot["question_transitions"],
+        }
+        for target, rows in catalog.items():
+            patcher = patch(target, return_value=rows)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch('services.quiz_filler.get_current_quiz_snapshot')
+    @patch('services.quiz_filler.quiz_collection')
+    def test_init_quiz_references_snapshot(self, mock_quiz_collection, mock_get_current_quiz_snapshot):
+        mock_get_current_quiz_snapshot.return_value = QuizSnapshot(self.quiz_snapshot, "abc")
+
+        quiz_filler = init_quiz(5)
+
+        (query, update), _ = mock_quiz_collection.update_one.call_args
+        self.assertEqual(query, {"quiz_id": 5})
+        self.assertEqual(update["$setOnInsert"]["snapshot_id"], "abc")
+        self.assertNotIn("quiz_snapshot", update["$setOnInsert"])
+        self.assertEqual(quiz_filler.progress["current_question_id"], 1)
+
+    @patch('services.quiz_snapshot.snapshot_collection')
+    @patch('domain.quiz_filler.quiz_collection')
+    @patch('services.quiz_filler.quiz_collection')
+    def test_first_access_writes_once_and_skips_read_back(self, mock_quiz_collection, mock_progress_collection,
+                                                          mock_snapshot_collection):
+        self.patch_catalog()
+        snapshot_cache.clear()
+        self.addCleanup(snapshot_cache.clear)
+        mock_quiz_collection.find_one.return_value = None
+
+        result = get_quiz_current_question(5)
+
+        self.assertEqual(result["current_question"]["id"], 1)
+        mock_quiz_collection.find_one.assert_called_once()
+        mock_quiz_collection.update_one.assert_called_once()
+        mock_progress_collection.update_one.assert_not_called()
+
+        # The catalog and its stored snapshot are cached, so the next new quiz touches neither MySQL
+        # nor the snapshot collection.
+        mock_snapshot_collection.update_one.reset_mock()
+        with patch('services.catalog.load_catalog') as mock_load_catalog:
+            get_quiz_current_question(6)
+        mock_load_catalog.assert_not_called()
+        mock_snapshot_collection.update_one.assert_not_called()
+
+    @patch('services.quiz_filler.get_current_quiz_snapshot')
+    @patch('services.quiz_filler.quiz_collection')
+    def test_init_quiz_created_concurrently(self, mock_quiz_collection, mock_get_current_quiz_snapshot):
+        mock_get_current_quiz_snapshot.return_value = QuizSnapshot(self.quiz_snapshot, "abc")
+        mock_quiz_collection.update_one.return_value = MagicMock(upserted_id=None)
+        mock_quiz_collection.find_one.return_value = {"quiz_snapshot": self.quiz_snapshot, "progress": {
+            "answers_given": [{"question_id": 1, "answer_id": 1}], "current_question_id": 2, "version": 1}}
+
+        quiz_filler = init_quiz(5)
+
+        self.assertEqual(quiz_filler.progress["current_question_id"], 2)
+
+    @patch('domain.quiz_filler.quiz_collection')
+    @patch('services.quiz_filler.quiz_collection')
+    def test_answer_current_question_pushes_only_the_new_answer(self, mock_quiz_collection, mock_progress_collection):
+        mock_quiz_collection.find_one.return_value = {"quiz_snapshot": self.quiz_snapshot, "progress": {
+            "answers_given": [], "current_question_id": 1, "recommended_products": []
+        }}
+
+        result = answer_current_question(5, 1)
+
+        self.assertEqual(result["next_question"]["id"], 2)
+        mock_progress_collection.update_one.assert_called_once_with({"quiz_id": 5, "progress.version": {"$in": [0, None]}}, {
+            "$push": {"progress.answers_given": {"$each": [{"question_id": 1, "answer_id": 1}]}},
+            "$set": {"progress.current_question_id": 2},
+            "$inc": {"progress.version": 1}
+        })
+
+    @patch('domain.quiz_filler.quiz_collection')
+    @patch('services.quiz_filler.quiz_collection')
+    def test_reset_to_previous_question_slices_answers(self, mock_quiz_collection, mock_progress_collection):
+        mock_quiz_collection.find_one.return_value = {"quiz_snapshot": self.quiz_snapshot, "progress": {
+            "answers_given": [{"question_id": 1, "answer_id": 1}, {"question_id": 2, "answer_id": 4}],
+            "current_question_id": 2,
+            "recommended_products": [],
+            "version": 2
+        }}
+
+        result = reset_to_previous_question(5, 2)
+
+        mock_quiz_collection.find_one.assert_called_once_with(
+            {"quiz_id": 5},
+            {"_id": 0, "snapshot_id": 1, "quiz_snapshot": 1, "progress.answers_given": 1, "progress.version": 1})
+        self.assertEqual(result["current_question"]["id"], 2)
+        self.assertEqual(result["answers_given"], [{"question_id": 1, "answer_id": 1}])
+        mock_progress_collection.update_one.assert_called_once_with({"quiz_id": 5, "progress.version": 2}, {
+            "$push": {"progress.answers_given": {"$each": [], "$slice": 1}},
+            "$set": {"progress.current_question_id": 2},
+            "$inc": {"progress.version": 1}
+        })
+
+    @patch('domain.quiz_filler.quiz_collection')
+    @patch('services.quiz_filler.quiz_collection')
+    def test_get_quiz_current_question_does_not_write(self, mock_quiz_collection, mock_progress_collection):
+        mock_quiz_collection.find_one.return_value = {"quiz_snapshot": self.quiz_snapshot, "progress": {
+            "answers_given": [], "current_question_id": 1, "recommended_products": []
+        }}
+
+        get_quiz_current_question(5)
+
+        mock_progress_collection.update_one.assert_not_called()
+
+    def test_progress_update_after_reset_and_new_answer(self):
+        quiz_filler = QuizFiller(5, self.quiz_snapshot, progress={
+            "answers_given": [{"question_id": 1, "answer_id": 1}, {"question_id": 2, "answer_id": 4}],
+            "current_question_id": 2,
+            "recommended_products": []
+        })
+
+        quiz_filler.reset_to_question(1)
+        quiz_filler.answer(2, quiz_filler.get_current_question())
+
+        self.assertEqual(quiz_filler.progress_update(), {
+            "$set": {
+                "progress.answers_given": [{"question_id": 1, "answer_id": 2}],
+                "progress.current_question_id": 2
+            },
+            "$inc": {"progress.version": 1}
+        })
+
+    @patch('domain.quiz_filler.quiz_collection')
+    @patch('services.quiz_filler.quiz_collection')
+    def test_answer_current_question_retries_on_concurrent_save(self, mock_quiz_collection, mock_progress_collection):
+        mock_quiz_collection.find_one.side_effect = [
+            {"quiz_snapshot": self.quiz_snapshot, "progress": {
+                "answers_given": [], "current_question_id": 1, "version": 0}},
+            {"quiz_snapshot": self.quiz_snapshot, "progress": {
+                "answers_given": [{"question_id": 1, "answer_id": 1}], "current_question_id": 2, "version": 1}},
+        ]
+        mock_progress_collection.update_one.return_value = MagicMock(matched_count=0)
+
+        # The concurrent request already answered question 1, so the retry is validated against question 2.
+        with self.assertRaisesRegex(ValueError, "Invalid answer ID 1 for question 2"):
+            answer_current_question(5, 1)
+
+        self.assertEqual(mock_quiz_collection.find_one.call_count, 2)
+        mock_progress_collection.update_one.assert_called_once()
+
+    @patch('domain.quiz_filler.quiz_collection')
+    @patch('services.quiz_filler.quiz_collection')
+    def test_answer_current_question_gives_up_after_max_attempts(self, mock_quiz_collection, mock_progress_collection):
+        mock_quiz_collection.find_one.side_effect = lambda *args: {"quiz_snapshot": self.quiz_snapshot, "progress": {
+            "answers_given": [], "current_question_id": 1, "version": 3}}
+        mock_progress_collection.update_one.return_value = MagicMock(matched_count=0)
+
+        with self.assertRaises(QuizConflictError):
+            answer_current_question(5, 1)
+
+        self.assertEqual(mock_progress_collection.update_one.call_count, 3)
+        self.assertEqual(mock_progress_collection.update_one.call_args[0][0], {"quiz_id": 5, "progress.version": 3})
+
+    def patch_memory_collection(self, progress):
+        collection = MemoryCollection()
+        collection._update_one(
+            {"quiz_id": 5}, {"$setOnInsert": {"quiz_snapshot": self.quiz_snapshot, "progress": progress}}, upsert=True)
+        for target in ('services.quiz_filler.quiz_collection', 'domain.quiz_filler.quiz_collection'):
+            patcher = patch(target, collection)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return collection
+
+    def test_answer_questions_reads_and_writes_once(self):
+        collection = self.patch_memory_collection(
+            {"answers_given": [], "current_question_id": 1, "recommended_products": [], "version": 0})
+
+        result = answer_questions(5, [1, 4, 3])
+
+        # The third answer is ignored, the second one already recommends a product.
+        self.assertEqual(result["answers_accepted"], 2)
+        self.assertEqual([product["id"] for product in result["recommended_products"]], [2])
+        self.assertNotIn("error", result)
+        self.assertEqual(collection.calls, 2)
+        stored = collection._find_one({"quiz_id": 5})["progress"]
+        self.assertEqual(stored["answers_given"], [
+            {"question_id": 1, "answer_id": 1}, {"question_id": 2, "answer_id": 4}])
+        self.assertEqual(stored["version"], 1)
+
+    def test_answer_questions_saves_the_valid_prefix(self):
+        collection = self.patch_memory_collection(
+            {"answers_given": [], "current_question_id": 1, "recommended_products": [], "version": 0})
+
+        result = answer_questions(5, [1, 1, 4])
+
+        self.assertEqual(result["answers_accepted"], 1)
+        self.assertEqual(result["next_question"]["id"], 2)
+        self.assertEqual(result["error"], "Invalid answer ID 1 for question 2")
+        self.assertEqual(collection._find_one({"quiz_id": 5})["progress"]["answers_given"], [
+            {"question_id": 1, "answer_id": 1}])
+
+    def test_answer_questions_rejected_first_answer_does_not_write(self):
+        collection = self.patch_memory_collection(
+            {"answers_given": [], "current_question_id": 1, "recommended_products": [], "version": 0})
+
+        result = answer_questions(5, [3])
+
+        self.assertEqual(result["answers_accepted"], 0)
+        self.assertEqual(result["next_question"]["id"], 1)
+        self.assertEqual(collection.calls, 1)
+
+
+class TestRoundTripBudgets(RoundTripBudgetMixin, unittest.TestCase):
+    """Holds the hot paths to ROUND_TRIP_BUDGETS, on a SQLite catalog and in-memory collections."""
+
+    def setUp(self):
+        database = SqliteDatabase()
+        self.addCleanup(database.close)
+        quiz_collection = MemoryCollection()
+        quiz_collection.create_index([("quiz_id", 1)], unique=True)
+        patchers = [
+            patch('services.db_config._pool', ConnectionPool(database.connect, pool_size=2)),
+            patch('services.catalog.catalog_cache', CatalogCache(CatalogVersions(probe_interval=60))),
+            patch('services.quiz_filler.quiz_collection', quiz_collection),
+            patch('domain.quiz_filler.quiz_collection', quiz_collection),
+            patch('services.quiz_snapshot.snapshot_collection', MemoryCollection()),
+            contextlib.redirect_stdout(io.StringIO()),
+        ]
+        for patcher in patchers:
+            patcher.__enter__()
+            self.addCleanup(patcher.__exit__, None, None, None)
+        snapshot_cache.clear()
+        self.addCleanup(snapshot_cache.clear)
+        import_catalog(parse_ndjson(BUDGET_CATALOG.splitlines()))
+
+    def test_init_quiz(self):
+        with self.assertRoundTrips(**ROUND_TRIP_BUDGETS["init_quiz cold"]):
+            init_quiz(1)
+        with self.assertRoundTrips(**ROUND_TRIP_BUDGETS["init_quiz"]):
+            init_quiz(2)
+
+    def test_get_quiz_current_question(self):
+        init_quiz(1)
+
+        with self.assertRoundTrips(**ROUND_TRIP_BUDGETS["get_quiz_current_question"]):
+            get_quiz_current_question(1)
+        with self.assertRoundTrips(**ROUND_TRIP_BUDGETS["get_quiz_current_question new quiz"]):
+            get_quiz_current_question(2)
+        snapshot_cache.clear()
+        with self.assertRoundTrips(**ROUND_TRIP_BUDGETS["get_quiz_current_question cold snapshot"]):
+            get_quiz_current_question(1)
+
+    def test_answer_current_question(self):
+        init_quiz(1)
+
+        with self.assertRoundTrips(**ROUND_TRIP_BUDGETS["answer_current_question"]):
+            answer_current_question(1, 1)
+
+    def test_reset_to_previous_question(self):
+        init_quiz(1)
+        answer_current_question(1, 1)
+
+        with self.assertRoundTrips(**ROUND_TRIP_BUDGETS["reset_to_previous_question"]):
+            result = reset_to_previous_question(1, 1)
+
+        self.assertEqual(result["current_question"]["id"], 1)
+
+    def test_over_budget_fails(self):
+        init_quiz(1)
+
+        with self.assertRaisesRegex(AssertionError, r"over budget .*\{'mongo': 2\}"):
+            with self.assertRoundTrips(mongo=1):
+                answer_current_question(1, 1)
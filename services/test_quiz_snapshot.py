@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+from services.quiz_snapshot import compute_snapshot_id, save_snapshot, get_snapshot, get_quiz_snapshot, snapshot_cache
+
+
+class TestQuizSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.quiz_snapshot = {
+            "questions": [
+                {"id": 1, "text": "am I old?", "status": "published", "answers": [
+                    {"id": 1, "text": "yes", "status": "published"},
+                    {"id": 2, "text": "no", "status": "published"}
+                ]},
+                {"id": 2, "text": "am I pretty?", "status": "published", "answers": [
+                    {"id": 3, "text": "yes", "status": "published"}
+                ]}
+            ],
+            "products": [
+                {"id": 1, "name": "Product A", "description": "Desc A", "status": "draft"}
+            ],
+            "product_restrictions": [],
+            "question_transitions": [
+                {"id": 1, "answer_id": 1, "next_question_id": 2, "product_id": None},
+                {"id": 2, "answer_id": 3, "next_question_id": None, "product_id": 1}
+            ]
+        }
+
+    def test_snapshot_id_ignores_row_order(self):
+        reordered = dict(self.quiz_snapshot)
+        reordered["questions"] = [
+            dict(question, answers=list(reversed(question["answers"])))
+            for question in reversed(self.quiz_snapshot["questions"])
+        ]
+        reordered["question_transitions"] = list(reversed(self.quiz_snapshot["question_transitions"]))
+
+        self.assertEqual(compute_snapshot_id(self.quiz_snapshot), compute_snapshot_id(reordered))
+
+    def test_snapshot_id_changes_with_content(self):
+        changed = dict(self.quiz_snapshot)
+        changed["products"] = [{"id": 1, "name": "Product A", "description": "Desc A", "status": "published"}]
+
+        self.assertNotEqual(compute_snapshot_id(self.quiz_snapshot), compute_snapshot_id(changed))
+
+    @patch('services.quiz_snapshot.snapshot_collection')
+    def test_save_snapshot_inserts_once_by_hash(self, mock_snapshot_collection):
+        snapshot_id = save_snapshot(self.quiz_snapshot)
+
+        self.assertEqual(snapshot_id, compute_snapshot_id(self.quiz_snapshot))
+        (query, update), kwargs = mock_snapshot_collection.update_one.call_args
+        self.assertEqual(query, {"_id": snapshot_id})
+        self.assertEqual(list(update), ["$setOnInsert"])
+        self.assertEqual(update["$setOnInsert"]["questions"], self.quiz_snapshot["questions"])
+        self.assertTrue(kwargs["upsert"])
+
+    @patch('services.quiz_snapshot.snapshot_collection')
+    def test_get_snapshot_missing(self, mock_snapshot_collection):
+        mock_snapshot_collection.find_one.return_value = None
+
+        with self.assertRaises(ValueError):
+            get_snapshot("unknown")
+
+    @patch('services.quiz_snapshot.snapshot_collection')
+    def test_get_quiz_snapshot_is_cached(self, mock_snapshot_collection):
+        snapshot_cache.clear()
+        mock_snapshot_collection.find_one.return_value = self.quiz_snapshot
+
+        first = get_quiz_snapshot("abc")
+        second = get_quiz_snapshot("abc")
+
+        self.assertIs(first, second)
+        self.assertEqual(first.snapshot_id, "abc")
+        self.assertEqual(set(first.questions), {1, 2})
+        mock_snapshot_collection.find_one.assert_called_once()
+        snapshot_cache.clear()
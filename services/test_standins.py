@@ -0,0 +1,41 @@
+import unittest
+from services.standins import MemoryCollection
+
+
+class TestMemoryCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = MemoryCollection()
+        self.collection.create_index([("quiz_id", 1)], unique=True)
+        self.collection.update_one(
+            {"quiz_id": 1},
+            {"$setOnInsert": {"quiz_id": 1, "progress": {"answers_given": [1, 2, 3], "current_question_id": 4}}},
+            upsert=True
+        )
+
+    def test_upsert_only_inserts_once(self):
+        result = self.collection.update_one({"quiz_id": 1}, {"$setOnInsert": {"progress": {}}}, upsert=True)
+
+        self.assertIsNone(result.upserted_id)
+        self.assertEqual(self.collection.find_one({"quiz_id": 1})["progress"]["current_question_id"], 4)
+
+    def test_progress_update_operators(self):
+        result = self.collection.update_one(
+            {"quiz_id": 1, "progress.version": {"$in": [0, None]}},
+            {
+                "$push": {"progress.answers_given": {"$each": [9], "$slice": 2}},
+                "$set": {"progress.current_question_id": 2},
+                "$inc": {"progress.version": 1}
+            }
+        )
+
+        self.assertEqual(result.matched_count, 1)
+        self.assertEqual(
+            self.collection.find_one({"quiz_id": 1}, {"_id": 0, "progress.answers_given": 1, "progress.version": 1}),
+            {"progress": {"answers_given": [1, 2], "version": 1}}
+        )
+
+    def test_filter_mismatch_does_not_update(self):
+        result = self.collection.update_one({"quiz_id": 1, "progress.version": 3}, {"$inc": {"progress.version": 1}})
+
+        self.assertEqual(result.matched_count, 0)
@@ -0,0 +1,71 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from services import db_config
+from domain.catalog_file import CatalogFile
+from services.catalog import CatalogCache, export_catalog_file, get_current_quiz_snapshot
+from services.catalog_io import parse_document, import_catalog
+from services.catalog_version import CatalogVersions
+from services.db_config import ConnectionPool, reset_pool_after_fork
+from services.quiz_snapshot import get_quiz_snapshot, snapshot_cache
+from services.round_trips import count_round_trips
+from services.standins import SqliteDatabase, MemoryCollection
+from services.warmup import warm_up, warm_up_from_file
+
+
+class TestWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        database = SqliteDatabase()
+        self.addCleanup(database.close)
+        self.pool = ConnectionPool(database.connect, pool_size=2)
+        patchers = [
+            patch('services.db_config._pool', self.pool),
+            patch('services.catalog.catalog_cache', CatalogCache(CatalogVersions(probe_interval=60))),
+            patch('services.quiz_snapshot.snapshot_collection', MemoryCollection()),
+            contextlib.redirect_stdout(io.StringIO()),
+        ]
+        for patcher in patchers:
+            patcher.__enter__()
+            self.addCleanup(patcher.__exit__, None, None, None)
+        snapshot_cache.clear()
+        self.addCleanup(snapshot_cache.clear)
+        import_catalog(parse_document({"questions": [
+            {"text": "am i old", "status": "published", "answers": [{"text": "yes", "status": "published"}]}
+        ]}))
+
+    def test_warm_up_leaves_no_connection_open_and_the_catalog_loaded(self):
+        quiz_snapshot = warm_up()
+
+        self.assertTrue(self.pool._idle.empty())
+        with count_round_trips() as round_trips:
+            self.assertIs(get_current_quiz_snapshot(), quiz_snapshot)
+        self.assertEqual(round_trips.as_dict(), {"mongo": 0, "mysql_connects": 0, "mysql_queries": 0})
+        self.assertEqual(quiz_snapshot.graph.first_question_id, 1)
+
+    def test_warm_up_from_file_reads_no_catalog_from_mysql(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "catalog.bin")
+        snapshot_id = export_catalog_file(path)
+        snapshot_cache.clear()
+
+        with patch('services.catalog.catalog_cache', CatalogCache(CatalogVersions(probe_interval=60))):
+            catalog_file = warm_up_from_file(path)
+            with count_round_trips() as round_trips:
+                quiz_snapshot = get_current_quiz_snapshot()
+                self.assertIs(get_quiz_snapshot(snapshot_id), catalog_file)
+
+        self.assertIsInstance(quiz_snapshot, CatalogFile)
+        self.assertEqual(quiz_snapshot.snapshot_id, snapshot_id)
+        # Only the catalog_versions probe, which finds the file current.
+        self.assertEqual(round_trips.as_dict(), {"mongo": 0, "mysql_connects": 1, "mysql_queries": 1})
+        self.assertEqual(quiz_snapshot.first_question_id, 1)
+
+    def test_reset_pool_after_fork(self):
+        reset_pool_after_fork()
+
+        self.assertIsNone(db_config._pool)
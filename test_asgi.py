@@ -0,0 +1,38 @@
+import asyncio
+import unittest
+from app import app as flask_app
+from asgi import app
+
+
+class TestCors(unittest.TestCase):
+
+    def flask_and_quart(self, method, path, headers):
+        flask_response = flask_app.test_client().open(path, method=method, headers=headers)
+
+        async def quart_response():
+            return await app.test_client().open(path, method=method, headers=headers)
+
+        return flask_response.headers, asyncio.run(quart_response()).headers
+
+    def test_preflight_allows_the_same_headers_and_methods_as_the_flask_app(self):
+        flask_headers, quart_headers = self.flask_and_quart('OPTIONS', '/api/filler/1/answer', {
+            'Origin': 'http://localhost:3000',
+            'Access-Control-Request-Method': 'POST',
+            'Access-Control-Request-Headers': 'content-type',
+        })
+
+        self.assertEqual(quart_headers['Access-Control-Allow-Origin'], '*')
+        self.assertEqual(quart_headers['Access-Control-Allow-Headers'],
+                         flask_headers['Access-Control-Allow-Headers'])
+        self.assertEqual(
+            set(quart_headers['Access-Control-Allow-Methods'].split(', ')),
+            set(flask_headers['Access-Control-Allow-Methods'].split(', '))
+        )
+
+    def test_responses_expose_the_same_headers_as_the_flask_app(self):
+        flask_headers, quart_headers = self.flask_and_quart('OPTIONS', '/api/filler/1/current_question', {
+            'Origin': 'http://localhost:3000',
+        })
+
+        self.assertEqual(quart_headers['Access-Control-Expose-Headers'],
+                         flask_headers['Access-Control-Expose-Headers'])
@@ -0,0 +1,126 @@
+from quart import Blueprint, Response, request, jsonify
+from domain.quiz_filler import QuizConflictError
+from domain.quiz_json import render_quiz_json
+from services.async_quiz_filler import (
+    get_quiz_current_question, answer_current_question, answer_questions, reset_to_previous_question
+)
+
+async_quiz_filler_blueprint = Blueprint('async_quiz_filler', __name__)
+
+
+def quiz_json(payload, quiz_snapshot, status=200):
+    """A JSON response around the pre-rendered questions and products of the snapshot."""
+    return Response(render_quiz_json(payload, quiz_snapshot), status=status, mimetype='application/json')
+
+
+@async_quiz_filler_blueprint.route('/filler/<int:quiz_id>/current_question', methods=['GET'])
+async def get_current_question(quiz_id):
+    """
+    Retrieves the current question state for the given quiz or create a new quiz if no such exists.
+    Same responses as the synchronous endpoint in views/quiz_filler.py.
+    """
+    try:
+        result = await get_quiz_current_question(quiz_id)
+
+        # Return recommended products if the quiz is complete
+        if 'recommended_products' in result:
+            return quiz_json(result, result.quiz_snapshot)
+
+        # Return current question and previous answers
+        return quiz_json({
+            "current_question": result['current_question'],
+            "answers_given": result['answers_given']
+        }, result.quiz_snapshot)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@async_quiz_filler_blueprint.route('/filler/<int:quiz_id>/answer', methods=['POST'])
+async def answer_question(quiz_id):
+    """
+    Endpoint to answer the current question and get the next question along with previous answers.
+    """
+    try:
+        data = await request.get_json()
+        answer_id = data.get('answer_id')
+
+        if not answer_id:
+            return jsonify({"error": "answer_id is required"}), 400
+
+        result = await answer_current_question(quiz_id, answer_id)
+        # Check if recommended products exist
+        if result.get("recommended_products"):
+            return quiz_json({
+                "recommended_products": result["recommended_products"],
+                "answers_given": result["answers_given"]
+            }, result.quiz_snapshot)
+
+        # If there are still more questions to answer
+        if result.get("next_question"):
+            return quiz_json({
+                "next_question": result["next_question"],
+                "answers_given": result["answers_given"]
+            }, result.quiz_snapshot)
+
+        # If there are no more questions and no products recommended
+        return quiz_json({
+            "message": "No more questions",
+            "answers_given": result["answers_given"]
+        }, result.quiz_snapshot)
+
+    except QuizConflictError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@async_quiz_filler_blueprint.route('/filler/<int:quiz_id>/answers', methods=['POST'])
+async def answer_questions_endpoint(quiz_id):
+    """
+    Endpoint to answer several questions at once, see views/quiz_filler.py.
+    """
+    try:
+        data = await request.get_json()
+        answer_ids = data.get('answer_ids')
+
+        if not isinstance(answer_ids, list) or not answer_ids or \
+                not all(isinstance(answer_id, int) for answer_id in answer_ids):
+            return jsonify({"error": "answer_ids must be a non-empty list of answer ids"}), 400
+
+        result = await answer_questions(quiz_id, answer_ids)
+        if result["answers_accepted"] == 0:
+            return quiz_json(result, result.quiz_snapshot, 400)
+        return quiz_json(result, result.quiz_snapshot)
+
+    except QuizConflictError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@async_quiz_filler_blueprint.route('/filler/<int:quiz_id>/reset_to_previous_question/<int:question_id>', methods=['POST'])
+async def reset_to_previous_question_endpoint(quiz_id, question_id):
+    """
+    Endpoint to reset the quiz to a previous question.
+    Removes the given question and all following answers, and returns the current question and previous answers.
+    """
+    try:
+        result = await reset_to_previous_question(quiz_id, question_id)
+
+        # Return the current question and previous answers after resetting
+        return quiz_json({
+            "current_question": result['current_question'],
+            "answers_given": result['answers_given']
+        }, result.quiz_snapshot)
+
+    except QuizConflictError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
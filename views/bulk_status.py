@@ -0,0 +1,25 @@
+from flask import request, jsonify
+from services.catalog import CatalogValidationError
+
+
+def bulk_status_response(change_statuses, check=None):
+    """
+    Runs a bulk status change for the ids posted as {"ids": [...]} and returns the per-id outcomes.
+
+    :param change_statuses: Service function taking the list of ids
+    :param check: Optional function taking the list of ids first, raising CatalogValidationError to reject the change
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    # bool is a subclass of int, true and false are no ids.
+    if not isinstance(ids, list) or not ids or not all(
+            isinstance(row_id, int) and not isinstance(row_id, bool) for row_id in ids):
+        return jsonify({"error": "ids must be a non-empty list of ids"}), 400
+    try:
+        if check is not None:
+            check(ids)
+        return jsonify({"results": change_statuses(ids)}), 200
+    except CatalogValidationError as e:
+        return jsonify({"error": str(e), "issues": e.issues}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,75 @@
+import json
+from flask import Response, request, jsonify, stream_with_context
+from services.catalog import CATALOG_FIELD_TABLES
+from services.catalog_version import catalog_etag
+
+# Clients may keep a copy, but must revalidate it with If-None-Match before every use.
+CATALOG_CACHE_CONTROL = "private, no-cache"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _int_arg(name, default, minimum):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return number
+
+
+def _ndjson(items):
+    for item in items:
+        yield json.dumps(item, separators=(',', ':')) + "\n"
+
+
+def catalog_list_response(field, load_all, load_page, stream):
+    """
+    Answers a GET of a catalog list, in the mode chosen by the query string:
+
+    - no arguments: the whole list as a JSON array.
+    - after_id and/or limit: one page of at most limit (default 100, at most 1000) items with an id
+      greater than after_id (default 0), as a JSON array. X-Next-After-Id holds the after_id of the
+      next page and is left out on the last one.
+    - format=ndjson: every item with an id greater than after_id, one JSON object per line, sent
+      while the rows are read in batches.
+
+    Every mode sends an ETag from the versions of the list's tables and the query string, and
+    answers a matching If-None-Match with 304 Not Modified and no query at all.
+
+    :param field: The catalog field listed, see CATALOG_FIELD_TABLES
+    :param load_all: Callable returning the whole list
+    :param load_page: Callable taking after_id and limit and returning a page
+    :param stream: Callable taking after_id and returning an iterator of the items
+    """
+    try:
+        after_id = _int_arg('after_id', 0, 0)
+        limit = min(_int_arg('limit', DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    output_format = request.args.get('format', 'json')
+    if output_format not in ('json', 'ndjson'):
+        return jsonify({"error": "format must be json or ndjson"}), 400
+
+    etag = catalog_etag(CATALOG_FIELD_TABLES[field], request.query_string.decode())
+    if etag is not None and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif output_format == 'ndjson':
+        response = Response(stream_with_context(_ndjson(stream(after_id))), mimetype='application/x-ndjson')
+    elif 'after_id' in request.args or 'limit' in request.args:
+        # One item more than asked tells whether a next page exists.
+        items = load_page(after_id, limit + 1)
+        response = jsonify(items[:limit])
+        if len(items) > limit:
+            response.headers['X-Next-After-Id'] = str(items[limit - 1]['id'])
+    else:
+        response = jsonify(load_all())
+    if etag is not None:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = CATALOG_CACHE_CONTROL
+    return response
@@ -0,0 +1,42 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from services.catalog_io import CatalogImportError, parse_ndjson, parse_document, import_catalog, export_catalog
+
+catalog_blueprint = Blueprint('catalog', __name__)
+
+
+@catalog_blueprint.route('/import', methods=['POST'])
+def import_catalog_endpoint():
+    """
+    curl -X POST http://127.0.0.1:5000/api/catalog/import \
+    -H "Content-Type: application/x-ndjson" \
+    --data-binary @catalog.ndjson
+
+    Imports a whole catalog file in one transaction, see services/catalog_io.py for the format.
+    Accepts NDJSON (application/x-ndjson) or a single JSON document (application/json).
+    Nothing is written if the file is invalid.
+    """
+    try:
+        if request.mimetype == 'application/x-ndjson':
+            records = parse_ndjson(request.get_data().splitlines())
+        else:
+            document = request.get_json(silent=True)
+            if document is None:
+                return jsonify({"error": "Expected a JSON or NDJSON catalog"}), 400
+            records = parse_document(document)
+
+        counts = import_catalog(records)
+        return jsonify({"message": "Catalog imported successfully", "imported": counts}), 201
+    except CatalogImportError as e:
+        return jsonify({"error": str(e), "errors": e.errors}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@catalog_blueprint.route('/export', methods=['GET'])
+def export_catalog_endpoint():
+    """
+    curl -X GET http://127.0.0.1:5000/api/catalog/export > catalog.ndjson
+
+    Streams the whole catalog as NDJSON, in the format accepted by the import.
+    """
+    return Response(stream_with_context(export_catalog()), mimetype='application/x-ndjson')
@@ -0,0 +1,39 @@
+import time
+from flask import Blueprint, Response, g, request
+from services.metrics import metrics
+
+metrics_blueprint = Blueprint('metrics', __name__)
+
+
+@metrics_blueprint.before_app_request
+def start_timer():
+    g.request_started = time.perf_counter()
+    metrics.start_request()
+
+
+@metrics_blueprint.after_app_request
+def record_request(response):
+    """
+    Records the latency of every request of the app by endpoint, e.g. quiz_filler.answer_current_question,
+    and reports the database time of the request in a Server-Timing header.
+    """
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    backends = metrics.finish_request(request.endpoint or 'unmatched', request.method, response.status_code, seconds)
+    response.headers['Server-Timing'] = ", ".join(
+        [f"{backend};dur={spent * 1e3:.2f}" for backend, (spent, _) in sorted(backends.items())] +
+        [f"total;dur={seconds * 1e3:.2f}"]
+    )
+    return response
+
+
+@metrics_blueprint.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    curl -X GET http://127.0.0.1:5000/metrics
+
+    Request latency and database time in the Prometheus text format.
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
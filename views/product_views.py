@@ -1,10 +1,16 @@
 from flask import Blueprint, request, jsonify
+from views.catalog_lists import catalog_list_response
+from views.bulk_status import bulk_status_response
 from services.product import (
     create_product,
     publish_product,
     disable_product,
     get_all_products,
-    update_product
+    get_products_page,
+    stream_products,
+    update_product,
+    publish_products,
+    disable_products
 )
 from services.quiz import (
     create_restriction,
@@ -65,12 +71,13 @@ def disable_product_endpoint(product_id):
 def get_all_products_endpoint():
     """
     curl -X GET http://127.0.0.1:5000/api/product/products
+    curl -X GET "http://127.0.0.1:5000/api/product/products?after_id=100&limit=100"
+    curl -X GET "http://127.0.0.1:5000/api/product/products?format=ndjson"
 
-    Endpoint to get all products.
+    Endpoint to get all products, whole, by page or streamed, see catalog_list_response().
     """
     try:
-        result = get_all_products()
-        return jsonify(result), 200
+        return catalog_list_response("products", get_all_products, get_products_page, stream_products)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -145,3 +152,26 @@ def get_restrictions(answer_id):
         return jsonify(restrictions), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+@product_blueprint.route('/products/publish', methods=['POST'])
+def publish_products_endpoint():
+    """
+    curl -X POST http://127.0.0.1:5000/api/products/publish \
+    -H "Content-Type: application/json" \
+    -d '{"ids": [1, 2, 3]}'
+
+    Publishes many products in one transaction and reports the outcome per id:
+    updated, unchanged, rejected (status does not allow it) or not_found.
+    """
+    return bulk_status_response(publish_products)
+
+
+@product_blueprint.route('/products/disable', methods=['POST'])
+def disable_products_endpoint():
+    """
+    curl -X POST http://127.0.0.1:5000/api/products/disable \
+    -H "Content-Type: application/json" \
+    -d '{"ids": [1, 2, 3]}'
+    """
+    return bulk_status_response(disable_products)
@@ -1,11 +1,15 @@
 from flask import Blueprint, request, jsonify
+from views.catalog_lists import catalog_list_response
 from services.question_transitions import (
     get_question_transitions,
+    get_question_transitions_page,
+    stream_question_transitions,
     get_question_transition_by_id,
     create_question_transition,
     update_question_transition,
     delete_question_transition
 )
+from services.catalog import CatalogValidationError
 
 question_transitions_blueprint = Blueprint('question_transitions', __name__)
 
@@ -28,17 +32,23 @@ def create_question_transition_endpoint():
 
         create_question_transition(answer_id, next_question_id, product_id)
         return jsonify({"message": "question transition created successfully"}), 201
+    except CatalogValidationError as e:
+        return jsonify({"error": str(e), "issues": e.issues}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @question_transitions_blueprint.route('/question_transitions', methods=['GET'])
 def get_all_question_transitions():
     """
-    Endpoint to get all question transitions.
+    curl -X GET http://127.0.0.1:5000/api/question_transitions
+    curl -X GET "http://127.0.0.1:5000/api/question_transitions?after_id=100&limit=100"
+    curl -X GET "http://127.0.0.1:5000/api/question_transitions?format=ndjson"
+
+    Endpoint to get all question transitions, whole, by page or streamed, see catalog_list_response().
     """
     try:
-        transitions = get_question_transitions()
-        return jsonify(transitions), 200
+        return catalog_list_response("question_transitions", get_question_transitions,
+                                     get_question_transitions_page, stream_question_transitions)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -78,6 +88,8 @@ def update_question_transition_endpoint(transition_id):
             return jsonify({"message": "question transition updated successfully"}), 200
         else:
             return jsonify({"error": "question transition not found or no changes made"}), 404
+    except CatalogValidationError as e:
+        return jsonify({"error": str(e), "issues": e.issues}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -92,5 +104,7 @@ def delete_question_transition_endpoint(transition_id):
             return jsonify({"message": "question transition deleted successfully"}), 200
         else:
             return jsonify({"error": "question transition not found"}), 404
+    except CatalogValidationError as e:
+        return jsonify({"error": str(e), "issues": e.issues}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
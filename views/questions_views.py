@@ -1,4 +1,6 @@
 from flask import Blueprint, request, jsonify
+from views.catalog_lists import catalog_list_response
+from views.bulk_status import bulk_status_response
 from services.quiz import (
     create_question,
     publish_question,
@@ -9,8 +11,15 @@ from services.quiz import (
     create_restriction,
     remove_restriction_by_id,
     get_all_questions,
-    get_product_restrictions
+    get_questions_page,
+    stream_questions,
+    get_product_restrictions,
+    publish_questions,
+    disable_questions,
+    publish_answers,
+    disable_answers
 )
+from services.catalog import CatalogValidationError, check_publish, validate_catalog
 
 questions_blueprint = Blueprint('quiz', __name__)
 
@@ -40,8 +49,11 @@ def publish_question_endpoint(question_id):
     :return:
     """
     try:
+        check_publish([question_id])
         publish_question(question_id)
         return jsonify({"message": "Question published successfully"}), 200
+    except CatalogValidationError as e:
+        return jsonify({"error": str(e), "issues": e.issues}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -145,13 +157,73 @@ def remove_restriction_by_id_endpoint(product_restriction_id):
 @questions_blueprint.route('/questions', methods=['GET'])
 def get_all_questions_endpoint():
     """
-    curl -X GET http://127.0.0.1:5000/api/quiz/answers
+    curl -X GET http://127.0.0.1:5000/api/quiz/questions
+    curl -X GET "http://127.0.0.1:5000/api/quiz/questions?after_id=100&limit=100"
+    curl -X GET "http://127.0.0.1:5000/api/quiz/questions?format=ndjson"
 
-    Endpoint to get all answers with their associated questions.
+    Endpoint to get all questions with their answers, whole, by page or streamed, see catalog_list_response().
     """
     try:
-        result = get_all_questions()
+        return catalog_list_response("questions", get_all_questions, get_questions_page, stream_questions)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@questions_blueprint.route('/validation', methods=['GET'])
+def validate_quiz_endpoint():
+    """
+    curl -X GET http://127.0.0.1:5000/api/quiz/validation
+
+    Compiles the current questions, answers, transitions and restrictions into a quiz graph
+    and reports cycles, dead ends, unreachable questions and dangling references.
+    Publishing questions and changing transitions is rejected if it would add issues,
+    see check_publish() and check_transition_change().
+    """
+    try:
+        result = validate_catalog()
         return jsonify(result), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+@questions_blueprint.route('/questions/publish', methods=['POST'])
+def publish_questions_endpoint():
+    """
+    curl -X POST http://127.0.0.1:5000/api/quiz/questions/publish \
+    -H "Content-Type: application/json" \
+    -d '{"ids": [1, 2, 3]}'
+
+    Publishes many questions in one transaction and reports the outcome per id:
+    updated, unchanged, rejected (status does not allow it) or not_found.
+    """
+    return bulk_status_response(publish_questions, check=check_publish)
+
+
+@questions_blueprint.route('/questions/disable', methods=['POST'])
+def disable_questions_endpoint():
+    """
+    curl -X POST http://127.0.0.1:5000/api/quiz/questions/disable \
+    -H "Content-Type: application/json" \
+    -d '{"ids": [1, 2, 3]}'
+    """
+    return bulk_status_response(disable_questions)
+
+
+@questions_blueprint.route('/answers/publish', methods=['POST'])
+def publish_answers_endpoint():
+    """
+    curl -X POST http://127.0.0.1:5000/api/quiz/answers/publish \
+    -H "Content-Type: application/json" \
+    -d '{"ids": [1, 2, 3]}'
+    """
+    return bulk_status_response(publish_answers)
+
+
+@questions_blueprint.route('/answers/disable', methods=['POST'])
+def disable_answers_endpoint():
+    """
+    curl -X POST http://127.0.0.1:5000/api/quiz/answers/disable \
+    -H "Content-Type: application/json" \
+    -d '{"ids": [1, 2, 3]}'
+    """
+    return bulk_status_response(disable_answers)
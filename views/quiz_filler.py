@@ -1,9 +1,18 @@
-from flask import Blueprint, request, jsonify
-from services.quiz_filler import get_quiz_current_question, answer_current_question, reset_to_previous_question
+from flask import Blueprint, Response, request, jsonify
+from domain.quiz_filler import QuizConflictError
+from domain.quiz_json import render_quiz_json
+from services.quiz_filler import (
+    get_quiz_current_question, answer_current_question, answer_questions, reset_to_previous_question
+)
 
 quiz_filler_blueprint = Blueprint('quiz_filler', __name__)
 
 
+def quiz_json(payload, quiz_snapshot, status=200):
+    """A JSON response around the pre-rendered questions and products of the snapshot."""
+    return Response(render_quiz_json(payload, quiz_snapshot), status=status, mimetype='application/json')
+
+
 @quiz_filler_blueprint.route('/filler/<int:quiz_id>/current_question', methods=['GET'])
 def get_current_question(quiz_id):
     """
@@ -73,13 +82,13 @@ def get_current_question(quiz_id):
 
         # Return recommended products if the quiz is complete
         if 'recommended_products' in result:
-            return jsonify(result), 200
+            return quiz_json(result, result.quiz_snapshot)
 
         # Return current question and previous answers
-        return jsonify({
+        return quiz_json({
             "current_question": result['current_question'],
             "answers_given": result['answers_given']
-        }), 200
+        }, result.quiz_snapshot)
 
     except ValueError as e:
         return jsonify({"error": str(e)}), 500
@@ -100,27 +109,63 @@ def answer_question(quiz_id):
         result = answer_current_question(quiz_id, answer_id)
         # Check if recommended products exist
         if result.get("recommended_products"):
-            response = jsonify({
+            return quiz_json({
                 "recommended_products": result["recommended_products"],  # Return recommended products at the top level
                 "answers_given": result["answers_given"]
-            }), 200
-            return response
+            }, result.quiz_snapshot)
 
         # If there are still more questions to answer
         if result.get("next_question"):
-            response = jsonify({
+            return quiz_json({
                 "next_question": result["next_question"],
                 "answers_given": result["answers_given"]
-            }), 200
-            return response
+            }, result.quiz_snapshot)
 
         # If there are no more questions and no products recommended
-        response = jsonify({
+        return quiz_json({
             "message": "No more questions",
             "answers_given": result["answers_given"]
-        }), 200
-        return response
+        }, result.quiz_snapshot)
+
+    except QuizConflictError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@quiz_filler_blueprint.route('/filler/<int:quiz_id>/answers', methods=['POST'])
+def answer_questions_endpoint(quiz_id):
+    """
+    Endpoint to answer several questions at once, in order, starting at the current question.
+    Stops at the first invalid answer or as soon as products are recommended; the answers
+    accepted until then are saved. An invalid first answer is a 400, nothing is saved.
+    Example Request:
+        {"answer_ids": [1, 4]}
+    Example Response:
+        {
+          "answers_accepted": 1,
+          "answers_given": [{"answer_id": 1, "question_id": 1}],
+          "next_question": {"id": 2, "text": "am i pretty", "status": "published", "answers": [...]},
+          "error": "Invalid answer ID 7 for question 2"
+        }
+    """
+    try:
+        data = request.get_json()
+        answer_ids = data.get('answer_ids')
+
+        if not isinstance(answer_ids, list) or not answer_ids or \
+                not all(isinstance(answer_id, int) for answer_id in answer_ids):
+            return jsonify({"error": "answer_ids must be a non-empty list of answer ids"}), 400
+
+        result = answer_questions(quiz_id, answer_ids)
+        if result["answers_accepted"] == 0:
+            return quiz_json(result, result.quiz_snapshot, 400)
+        return quiz_json(result, result.quiz_snapshot)
 
+    except QuizConflictError as e:
+        return jsonify({"error": str(e)}), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -137,11 +182,13 @@ def reset_to_previous_question_endpoint(quiz_id, question_id):
         result = reset_to_previous_question(quiz_id, question_id)
 
         # Return the current question and previous answers after resetting
-        return jsonify({
+        return quiz_json({
             "current_question": result['current_question'],
             "answers_given": result['answers_given']
-        }), 200
+        }, result.quiz_snapshot)
 
+    except QuizConflictError as e:
+        return jsonify({"error": str(e)}), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
@@ -0,0 +1,26 @@
+import unittest
+from unittest.mock import patch
+from app import app
+
+
+class TestBulkStatusResponse(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    @patch('views.product_views.publish_products', return_value=[])
+    def test_ids_must_be_integers(self, mock_publish_products):
+        for ids in ([], [1, "2"], [True], [1, False], "1"):
+            with self.subTest(ids=ids):
+                response = self.client.post('/api/products/publish', json={"ids": ids})
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json(), {"error": "ids must be a non-empty list of ids"})
+        mock_publish_products.assert_not_called()
+
+    @patch('views.product_views.publish_products', return_value=[])
+    def test_integer_ids_are_changed(self, mock_publish_products):
+        response = self.client.post('/api/products/publish', json={"ids": [1, 2]})
+
+        self.assertEqual(response.status_code, 200)
+        mock_publish_products.assert_called_once_with([1, 2])
@@ -0,0 +1,98 @@
+import json
+import unittest
+from unittest.mock import patch
+from app import app
+from services.catalog_io import parse_document, import_catalog
+from services.catalog_version import CatalogVersions
+from services.db_config import ConnectionPool
+from services.standins import SqliteDatabase
+
+
+class TestCatalogLists(unittest.TestCase):
+
+    def setUp(self):
+        database = SqliteDatabase()
+        self.addCleanup(database.close)
+        patches = [
+            patch('services.db_config._pool', ConnectionPool(database.connect, pool_size=2)),
+            patch('services.catalog_version.catalog_versions', CatalogVersions(probe_interval=0)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        import_catalog(parse_document({
+            "questions": [{"text": "am i old", "answers": [{"text": "yes"}, {"text": "no"}]}, {"text": "am i pretty"}],
+            "products": [{"name": f"name{number}"} for number in range(1, 5)],
+        }))
+        self.client = app.test_client()
+
+    def product_ids(self, response):
+        return [product["id"] for product in response.get_json()]
+
+    def test_pages_link_to_the_next_one(self):
+        first = self.client.get('/api/product/products?limit=3')
+        last = self.client.get(f"/api/product/products?after_id={first.headers['X-Next-After-Id']}&limit=3")
+
+        self.assertEqual(self.product_ids(first), [1, 2, 3])
+        self.assertEqual(first.headers['X-Next-After-Id'], "3")
+        self.assertEqual(self.product_ids(last), [4])
+        self.assertNotIn('X-Next-After-Id', last.headers)
+
+    def test_a_full_last_page_has_no_next_page(self):
+        response = self.client.get('/api/product/products?limit=4')
+
+        self.assertEqual(self.product_ids(response), [1, 2, 3, 4])
+        self.assertNotIn('X-Next-After-Id', response.headers)
+
+    def test_question_pages_count_questions_not_answers(self):
+        response = self.client.get('/api/quiz/questions?limit=1')
+
+        questions = response.get_json()
+        self.assertEqual([question["id"] for question in questions], [1])
+        self.assertEqual(len(questions[0]["answers"]), 2)
+        self.assertEqual(response.headers['X-Next-After-Id'], "1")
+
+    def test_not_modified_until_the_list_changes(self):
+        etag = self.client.get('/api/product/products').headers['ETag']
+
+        with patch('views.product_views.get_all_products') as mock_get_all_products:
+            not_modified = self.client.get('/api/product/products', headers={'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.get_data(), b"")
+        mock_get_all_products.assert_not_called()
+
+        import_catalog(parse_document({"products": [{"name": "name5"}]}))
+        changed = self.client.get('/api/product/products', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_etag_depends_on_the_query_string(self):
+        whole = self.client.get('/api/product/products')
+        page = self.client.get('/api/product/products?limit=3')
+
+        self.assertNotEqual(whole.headers['ETag'], page.headers['ETag'])
+
+    def test_ndjson_streams_every_item_after_after_id(self):
+        response = self.client.get('/api/question_transitions?format=ndjson')
+        self.assertEqual(response.get_data(), b"")
+
+        response = self.client.get('/api/quiz/questions?format=ndjson&after_id=1')
+
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)["text"] for line in lines], ["am i pretty"])
+
+    def test_invalid_arguments(self):
+        for query, error in (("limit=0", "limit must be at least 1"),
+                             ("after_id=x", "after_id must be an integer"),
+                             ("after_id=-1", "after_id must be at least 0"),
+                             ("format=xml", "format must be json or ndjson")):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/product/products?{query}')
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json(), {"error": error})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+"""
+Production WSGI entry point for the Flask app of app.py.
+
+The catalog is loaded and compiled at import. With gunicorn.conf.py the import happens once in the
+master (preload_app), so every worker forked from it serves its first new quiz without a MySQL
+round trip. The MongoDB indexes are created by every process along with its client.
+
+    gunicorn -c gunicorn.conf.py
+
+With CATALOG_FILE set to a file written by `flask --app app export-catalog-file`, the compiled catalog
+is mapped from it instead, without querying MySQL.
+"""
+import os
+from app import app
+from services.warmup import warm_up, warm_up_from_file
+
+CATALOG_FILE = os.environ.get('CATALOG_FILE')
+
+try:
+    if CATALOG_FILE:
+        warm_up_from_file(CATALOG_FILE)
+    else:
+        warm_up()
+except Exception as e:
+    # Workers load the catalog on their first request instead.
+    print(f"Error warming up the catalog: {e}")